@@ -0,0 +1,192 @@
+"""
+Symmetry data augmentation for training batches.
+
+Every sample gets one random board symmetry (see game.symmetry), applied
+consistently to its observation, action mask, chosen action and any
+per-action vector (policy targets, logits). All transforms are gathers through
+precomputed index tables, so a batch costs one fancy-indexing pass per array.
+"""
+import numpy as np
+import tree
+from gymnasium import spaces
+from ray.rllib.connectors.connector_v2 import ConnectorV2
+from ray.rllib.core.columns import Columns
+from ray.rllib.utils.annotations import override
+from ray.rllib.utils.framework import try_import_torch
+from ray.rllib.utils.numpy import convert_to_numpy
+from ray.rllib.utils.torch_utils import convert_to_torch_tensor
+
+from game.symmetry import NUM_SYMMETRIES, get_symmetry_tables
+from global_constants import BOARD_SIZE
+
+torch, _ = try_import_torch()
+
+# Batch keys holding observations, chosen action indices and per-action vectors
+OBS_KEYS = ("obs", "new_obs")
+ACTION_KEYS = ("actions",)
+ACTION_VALUE_KEYS = ("action_mask", "action_dist_inputs", "policy")
+# Observation entries holding the board and the action mask
+BOARD_OBS_KEY = "board"
+MASK_OBS_KEY = "action_mask"
+
+
+class SymmetryAugmenter:
+    def __init__(self, observation_space=None, size=BOARD_SIZE):
+        """
+        observation_space: the env's Dict observation space; needed to transform
+                           flattened observations (RLlib's preprocessor output)
+        """
+        self.tables = get_symmetry_tables(size)
+        self.flat_gather = None
+        if observation_space is not None:
+            self.flat_gather = self._flat_gather(observation_space)
+
+    def _flat_gather(self, observation_space):
+        """(8, D) gathers for observations flattened key by key in space order."""
+        parts, offset = [], 0
+        for key, space in observation_space.spaces.items():
+            size = spaces.flatdim(space)
+            if key == BOARD_OBS_KEY:
+                parts.append(offset + self.tables.cell_gather)
+            elif key == MASK_OBS_KEY:
+                parts.append(offset + self.tables.action_gather)
+            else:
+                parts.append(np.broadcast_to(offset + np.arange(size), (NUM_SYMMETRIES, size)))
+            offset += size
+        return np.concatenate(parts, axis=1)
+
+    @staticmethod
+    def sample(batch_size, rng):
+        """Draw one symmetry index per sample."""
+        return rng.integers(NUM_SYMMETRIES, size=batch_size)
+
+    def boards(self, boards, g):
+        """Transform boards (B, size, size) with symmetry g[b] for sample b."""
+        boards = np.asarray(boards)
+        flat = boards.reshape(len(boards), -1)
+        rows = np.arange(len(boards))[:, None]
+        return flat[rows, self.tables.cell_gather[g]].reshape(boards.shape)
+
+    def action_values(self, values, g):
+        """Transform masks, policy targets or logits (B, num_actions)."""
+        values = np.asarray(values)
+        return values[np.arange(len(values))[:, None], self.tables.action_gather[g]]
+
+    def actions(self, actions, g):
+        """Transform chosen action indices (B,)."""
+        return self.tables.action_map[g, np.asarray(actions)]
+
+    def observations(self, obs, g):
+        """Transform a dict of batched observation arrays or a flattened (B, D) array."""
+        if isinstance(obs, dict):
+            out = dict(obs)
+            if BOARD_OBS_KEY in obs:
+                out[BOARD_OBS_KEY] = self.boards(obs[BOARD_OBS_KEY], g)
+            if MASK_OBS_KEY in obs:
+                out[MASK_OBS_KEY] = self.action_values(obs[MASK_OBS_KEY], g)
+            return out
+        if self.flat_gather is None:
+            raise ValueError("Flattened observations need the observation_space")
+        obs = np.asarray(obs)
+        return obs[np.arange(len(obs))[:, None], self.flat_gather[g]]
+
+    def augment(self, batch, rng, g=None):
+        """
+        Return a copy of `batch` (a mapping of batched arrays) with one random
+        symmetry per sample applied to every known key, and the symmetries used.
+        Keys not listed in OBS_KEYS/ACTION_KEYS/ACTION_VALUE_KEYS are copied as-is.
+        """
+        if g is None:
+            first = next(iter(batch.values()))
+            if isinstance(first, dict):
+                first = next(iter(first.values()))
+            g = self.sample(len(first), rng)
+        out = dict(batch)
+        for key in OBS_KEYS:
+            if key in batch:
+                out[key] = self.observations(batch[key], g)
+        for key in ACTION_KEYS:
+            if key in batch:
+                out[key] = self.actions(batch[key], g)
+        for key in ACTION_VALUE_KEYS:
+            if key in batch:
+                out[key] = self.action_values(batch[key], g)
+        return out, g
+
+
+class SymmetryAugmentation(ConnectorV2):
+    """
+    RLlib (new API stack) learner connector that rewrites the observations
+    and actions of every training episode with one random symmetry per
+    timestep, before the default pieces turn the episodes into the train
+    batch. The appended bootstrap observation gets the symmetry of the last
+    step.
+
+    PPO's ratio and KL term compare the new policy with the stored old-policy
+    logits and log-probabilities, and the networks are not equivariant, so
+    those are recomputed on the augmented observations with the learner's
+    module. It holds the weights the env runners sampled with as long as the
+    weights are synced after every update (synchronous PPO).
+
+    Augmented data goes into copies of the episode buffers; arrays other
+    consumers of the episodes hold are left as they are.
+
+        config.learners(learner_connector=lambda obs_space, act_space: SymmetryAugmentation())
+    """
+
+    def __init__(self, input_observation_space=None, input_action_space=None, *, size=BOARD_SIZE,
+                 seed=None, **kwargs):
+        super().__init__(input_observation_space, input_action_space, **kwargs)
+        self.augmenter = SymmetryAugmenter(size=size)
+        self._rng = np.random.default_rng(seed)
+
+    @override(ConnectorV2)
+    def __call__(self, *, rl_module, batch, episodes, explore=None, shared_data=None, **kwargs):
+        for sa_episode in self.single_agent_episode_iterator(episodes, agents_that_stepped_only=False):
+            steps = len(sa_episode)
+            if not steps:
+                continue
+            g = self.augmenter.sample(steps, self._rng)
+            obs = self.augmenter.observations(sa_episode.get_observations(), np.r_[g, g[-1]])
+            actions = self.augmenter.actions(sa_episode.get_actions(), g)
+            # set_observations() checks leaves against the whole Dict space and fails
+            _replace(sa_episode.observations, obs)
+            _replace(sa_episode.actions, actions)
+
+            module = rl_module if sa_episode.module_id is None else rl_module[sa_episode.module_id]
+            logits = _exploration_logits(module, {key: value[:steps] for key, value in obs.items()})
+            outputs = sa_episode.extra_model_outputs
+            if Columns.ACTION_DIST_INPUTS in outputs:
+                _replace(outputs[Columns.ACTION_DIST_INPUTS], logits)
+            if Columns.ACTION_LOGP in outputs:
+                logp = _log_softmax(logits)[np.arange(steps), actions]
+                _replace(outputs[Columns.ACTION_LOGP], logp.astype(np.float32))
+        return batch
+
+
+def _replace(buffer, values):
+    """Put `values` after the lookback of a numpy'd episode buffer, into a copy of its data."""
+    data = tree.map_structure(np.copy, buffer.data)
+
+    def put(array, value):
+        array[buffer.lookback:] = value
+
+    tree.map_structure(put, data, values)
+    buffer.data = data
+
+
+def _exploration_logits(module, obs):
+    """Action distribution inputs of `module` for a batch of observations, as a numpy array."""
+    batch = {Columns.OBS: obs}
+    if module.framework == "torch":
+        device = next(module.parameters()).device
+        with torch.no_grad():
+            out = module.forward_exploration(convert_to_torch_tensor(batch, device=device))
+    else:
+        out = module.forward_exploration(batch)
+    return convert_to_numpy(out[Columns.ACTION_DIST_INPUTS])
+
+
+def _log_softmax(logits):
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    return shifted - np.log(np.exp(shifted).sum(axis=1, keepdims=True))
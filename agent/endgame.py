@@ -0,0 +1,153 @@
+"""
+Exact endgame solver for Blokus.
+
+Once few legal placements are left the rest of the game can be searched to
+the end. The solver plays paranoid (the player to move at the root maximises
+its official score minus the best opponent score, everyone else minimises it)
+with alpha-beta and a memo keyed by the Zobrist hash of the board, the player
+to move, the players that are out and the monomino-last flags of the players
+who have placed every piece. A player's stones never touch along an edge, so
+the cells on the board determine every inventory; only the order of the last
+two placements, which decides the monomino bonus, is not on the board.
+Moves are placement IDs; None means "pass".
+"""
+import math
+
+import numpy as np
+
+from game.move_generator import Move_generator
+from game.placements import get_placement_table
+
+MEMO_EXACT, MEMO_LOWER, MEMO_UPPER = 0, 1, 2
+
+
+def legal_move_counts(game, inactive_players=()):
+    """Number of legal placements per player (0 for players in inactive_players)."""
+    move_gen = Move_generator(game.board)
+    return [
+        0 if idx in inactive_players else int(move_gen.get_valid_placements(player).size)
+        for idx, player in enumerate(game.players)
+    ]
+
+
+class EndgameSolver:
+    def __init__(self, threshold=20, memo_size=2_000_000):
+        """
+        threshold: the solver applies when all players together have fewer
+                   legal placements than this
+        memo_size: entries kept in the memo before it is cleared
+        """
+        self.threshold = threshold
+        self.memo_size = memo_size
+        self._memo = {}
+        self.nodes = 0
+
+    def applies(self, game, inactive_players=()):
+        """True if the combined legal-move count is below the threshold."""
+        return sum(legal_move_counts(game, inactive_players)) < self.threshold
+
+    def act(self, game, inactive_players=()):
+        """Return the optimal placement ID for game.current_player_index, or None to pass."""
+        move, _ = self.solve(game, inactive_players)
+        return move
+
+    def solve(self, game, inactive_players=()):
+        """
+        Solve the game to the end from game.current_player_index.
+        Returns (best move, optimal score differential of that player against
+        the best opponent under official scoring). `game` is not modified.
+        """
+        game = game.copy()
+        self._root = game.current_player_index
+        self._num_players = len(game.players)
+        self._table = get_placement_table(game.board.size)
+        self.nodes = 0
+        out = frozenset(inactive_players)
+        if self._root not in out:
+            legal = Move_generator(game.board).get_valid_placements(game.players[self._root])
+            if legal.size:
+                value, move = self._solve(game, self._root, out, -math.inf, math.inf)
+                return move, value
+            out = out | {self._root}
+        value, _ = self._solve(game, (self._root + 1) % self._num_players, out, -math.inf, math.inf)
+        return None, value
+
+    def clear(self):
+        """Drop all memoized positions."""
+        self._memo.clear()
+
+    def _solve(self, game, start, out, alpha, beta):
+        self.nodes += 1
+        idx, legal, out = self._next_to_move(game, start, out)
+        if idx is None:
+            return self._differential(game.scores()), None
+
+        # Equal cells can still score differently if a finished player's last piece differs
+        finished = tuple(not p.remaining_squares and p.last_piece_monomino for p in game.players)
+        key = (game.board.hash, idx, out, self._root, finished)
+        memo_move = None
+        entry = self._memo.get(key)
+        if entry is not None:
+            entry_value, flag, memo_move = entry
+            if flag == MEMO_EXACT:
+                return entry_value, memo_move
+            if flag == MEMO_LOWER:
+                alpha = max(alpha, entry_value)
+            else:
+                beta = min(beta, entry_value)
+            if alpha >= beta:
+                return entry_value, memo_move
+
+        # Previous best move first, then largest pieces
+        moves = [int(m) for m in legal[np.argsort(-self._table.num_cells[legal], kind="stable")]]
+        if memo_move is not None and memo_move in moves:
+            moves.remove(memo_move)
+            moves.insert(0, memo_move)
+
+        maximizing = idx == self._root
+        alpha_orig, beta_orig = alpha, beta
+        best_value = -math.inf if maximizing else math.inf
+        best_move = None
+        for move in moves:
+            record = game.make_move(idx, move)
+            value, _ = self._solve(game, (idx + 1) % self._num_players, out, alpha, beta)
+            game.unmake_move(record)
+            if maximizing:
+                if value > best_value:
+                    best_value, best_move = value, move
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_move = value, move
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_orig:
+            flag = MEMO_UPPER
+        elif best_value >= beta_orig:
+            flag = MEMO_LOWER
+        else:
+            flag = MEMO_EXACT
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[key] = (best_value, flag, best_move)
+        return best_value, best_move
+
+    def _next_to_move(self, game, start, out):
+        """First player from `start` who can move, its legal placements and the updated out set."""
+        move_gen = Move_generator(game.board)
+        newly_out = []
+        for offset in range(self._num_players):
+            idx = (start + offset) % self._num_players
+            if idx in out:
+                continue
+            legal = move_gen.get_valid_placements(game.players[idx])
+            if legal.size:
+                return idx, legal, out.union(newly_out) if newly_out else out
+            newly_out.append(idx)
+        return None, None, out.union(newly_out)
+
+    def _differential(self, scores):
+        own = scores[self._root]
+        return own - max(s for i, s in enumerate(scores) if i != self._root)
@@ -0,0 +1,223 @@
+"""
+Non-neural baseline policies working on the env observation and action mask.
+
+All policies share one batched code path: the valid actions of every game in
+the batch are flattened into one array, each is resolved to the placement the
+env would play (the first valid pivot, as in Move_generator) and scored with
+placement-table features, then the best action per game is picked with a
+segmented argmax. There is no Python loop over games.
+
+Observations are the env's: board (N, N) with 1 = own stone, -1 = opponent,
+0 = empty. Opponents are not told apart, so opponent anchors are approximated
+from the combined opponent stones.
+"""
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+import numpy as np
+
+from game.piece import ORIENTATIONS
+from game.placements import MAX_CELLS, get_placement_table
+from game.player import NUM_PIECES
+
+_EDGE_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+_CORNER_OFFSETS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+# Weight of the main feature over the piece size in the combined scores
+_PRIMARY_WEIGHT = 10.0
+
+
+@lru_cache(maxsize=None)
+def _action_tables(size):
+    """
+    candidates[a, k]: placement ID the action a resolves to with pivot k (-1 if none)
+    corners[id]: flat cells touching the placement diagonally but not along an
+                 edge (padded with size * size)
+    """
+    table = get_placement_table(size)
+    num_actions = size * size * NUM_PIECES * 8
+    candidates = np.full((num_actions, MAX_CELLS), -1, dtype=np.int32)
+    for o in ORIENTATIONS:
+        label = o.rotation * 2 + o.reflect
+        for k, (px, py) in enumerate(o.shape):
+            for x in range(size):
+                for y in range(size):
+                    ox, oy = x - px, y - py
+                    if 0 <= ox <= size - o.width and 0 <= oy <= size - o.height:
+                        action = ((x * size + y) * NUM_PIECES + o.piece_idx) * 8 + label
+                        candidates[action, k] = table.id_grid[o.index, oy, ox]
+
+    coords = table.coords.astype(np.int32)
+    x, y = coords[..., 0], coords[..., 1]
+    sentinel = size * size
+
+    def neighbours(offsets):
+        nx = (x[:, :, None] + np.array([dx for dx, _ in offsets])).reshape(len(table), -1)
+        ny = (y[:, :, None] + np.array([dy for _, dy in offsets])).reshape(len(table), -1)
+        inside = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+        return np.where(inside, ny * size + nx, sentinel)
+
+    cells = np.where(table.cell_mask, table.cells, sentinel)
+    edges = neighbours(_EDGE_OFFSETS)
+    corners = neighbours(_CORNER_OFFSETS)
+    excluded = ((corners[:, :, None] == cells[:, None, :]).any(axis=2)
+                | (corners[:, :, None] == edges[:, None, :]).any(axis=2))
+    corners = np.sort(np.where(excluded, sentinel, corners), axis=1)
+    corners[:, 1:][corners[:, 1:] == corners[:, :-1]] = sentinel
+    return candidates, corners
+
+
+def _shift_or(planes, offsets):
+    """OR of `planes` (B, N, N) shifted by each (dx, dy) offset."""
+    out = np.zeros_like(planes)
+    n = planes.shape[-1]
+    for dx, dy in offsets:
+        out[:, max(dy, 0):n + min(dy, 0), max(dx, 0):n + min(dx, 0)] |= \
+            planes[:, max(-dy, 0):n + min(-dy, 0), max(-dx, 0):n + min(-dx, 0)]
+    return out
+
+
+def _anchor_planes(stones, empty):
+    """Empty cells diagonal to `stones` but not edge-adjacent to them; corners if no stones yet."""
+    anchors = empty & _shift_or(stones, _CORNER_OFFSETS) & ~_shift_or(stones, _EDGE_OFFSETS)
+    first = ~stones.any(axis=(1, 2))
+    if first.any():
+        n = stones.shape[-1]
+        corners = np.zeros(stones.shape[1:], dtype=bool)
+        corners[[0, 0, n - 1, n - 1], [0, n - 1, 0, n - 1]] = True
+        anchors[first] = empty[first] & corners
+    return anchors
+
+
+class MoveFeatures:
+    """Per valid action of a batch: its game row, action index, resolved placement and features."""
+
+    def __init__(self, boards, masks):
+        boards = np.asarray(boards)
+        batch, size = boards.shape[0], boards.shape[-1]
+        table = get_placement_table(size)
+        candidates, corners = _action_tables(size)
+        skip = masks.shape[1] - 1
+
+        own, opponents, empty = boards == 1, boards == -1, boards == 0
+        # Cells the mover may not cover: occupied or sharing an edge with its stones
+        blocked = ~empty | _shift_or(own, _EDGE_OFFSETS)
+        own_anchors = _anchor_planes(own, empty)
+        opponent_anchors = _anchor_planes(opponents, empty)
+        # Cells that would become new anchors for the mover: free and not already anchors
+        fresh = ~blocked & ~own_anchors
+        # Free cells for the mover in the 5x5 window around each cell
+        padded = np.pad(~blocked, ((0, 0), (2, 2), (2, 2)))
+        window = np.lib.stride_tricks.sliding_window_view(padded, (5, 5), axis=(1, 2))
+        openness = window.sum(axis=(-1, -2))
+
+        def flat(planes, fill):
+            planes = planes.reshape(batch, -1)
+            return np.concatenate([planes, np.full((batch, 1), fill, dtype=planes.dtype)], axis=1)
+
+        rows, actions = np.nonzero(masks[:, :skip])
+        cands = candidates[actions]
+        cells = np.where(cands[..., None] >= 0, table.cells[np.maximum(cands, 0)], size * size)
+        valid = (cands >= 0) & ~flat(blocked, True)[rows[:, None, None], cells].any(axis=2)
+        placements = cands[np.arange(len(cands)), np.argmax(valid, axis=1)]
+
+        placement_cells = table.cells[placements]
+        new_corners = corners[placements]
+        self.rows = rows
+        self.actions = actions
+        self.placements = placements
+        self.skip_rows = np.flatnonzero(masks[:, skip])
+        self.batch = batch
+        self.skip = skip
+        self.size = table.num_cells[placements].astype(np.float64)
+        self.new_anchors = flat(fresh, False)[rows[:, None], new_corners].sum(axis=1)
+        covered = flat(opponent_anchors, False)[rows[:, None], placement_cells] & table.cell_mask[placements]
+        self.blocked_anchors = covered.sum(axis=1)
+        fresh_corners = flat(fresh, False)[rows[:, None], new_corners]
+        self.territory = (flat(openness, 0)[rows[:, None], new_corners] * fresh_corners).sum(axis=1)
+
+
+class HeuristicPolicy(ABC):
+    """Base class: subclasses score the valid moves in _scores(features)."""
+    name = None
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def act(self, obs, action_mask):
+        """Return one action index for a single observation and mask."""
+        board = np.asarray(obs["board"])[None]
+        return int(self.act_batch({"board": board}, np.asarray(action_mask, dtype=bool)[None])[0])
+
+    def act_batch(self, obs, action_masks):
+        """
+        obs: dict with "board" (B, N, N); action_masks: (B, num_actions) booleans
+        Returns (B,) action indices; a game with only the skip action skips.
+        """
+        masks = np.asarray(action_masks, dtype=bool)
+        features = MoveFeatures(obs["board"], masks)
+        scores = self._scores(features) + self.rng.random(len(features.rows)) * 1e-3
+
+        chosen = np.full(features.batch, features.skip, dtype=np.int64)
+        order = np.lexsort((scores, features.rows))
+        last = np.flatnonzero(np.r_[features.rows[order][1:] != features.rows[order][:-1], True])
+        chosen[features.rows[order][last]] = features.actions[order][last]
+        return chosen
+
+    @abstractmethod
+    def _scores(self, features):
+        """Score per valid move in `features`; the best move of each game is played."""
+
+
+class RandomPolicy(HeuristicPolicy):
+    """Uniformly random valid action."""
+    name = "random"
+
+    def _scores(self, features):
+        return self.rng.random(len(features.rows))
+
+    def act_batch(self, obs, action_masks):
+        # Same choice as the base class without computing the move features
+        masks = np.asarray(action_masks, dtype=bool)
+        keys = np.where(masks, self.rng.random(masks.shape), -1.0)
+        # Skip only when it is the sole option
+        keys[:, -1] = np.where(masks[:, :-1].any(axis=1), -1.0, keys[:, -1])
+        return keys.argmax(axis=1)
+
+
+class GreedyLargestPolicy(HeuristicPolicy):
+    """Largest piece first."""
+    name = "greedy_largest"
+
+    def _scores(self, features):
+        return features.size
+
+
+class CornerMaximiserPolicy(HeuristicPolicy):
+    """Most new anchor cells for the mover, then the largest piece."""
+    name = "corner_maximiser"
+
+    def _scores(self, features):
+        return _PRIMARY_WEIGHT * features.new_anchors + features.size
+
+
+class OpponentBlockerPolicy(HeuristicPolicy):
+    """Covers the most opponent anchor cells, then the largest piece."""
+    name = "opponent_blocker"
+
+    def _scores(self, features):
+        return _PRIMARY_WEIGHT * features.blocked_anchors + features.size
+
+
+class TerritoryGreedyPolicy(HeuristicPolicy):
+    """New anchors weighted by the free space around them, then the largest piece."""
+    name = "territory_greedy"
+
+    def _scores(self, features):
+        return features.territory + features.size
+
+
+HEURISTIC_POLICIES = {
+    cls.name: cls
+    for cls in (RandomPolicy, GreedyLargestPolicy, CornerMaximiserPolicy,
+                OpponentBlockerPolicy, TerritoryGreedyPolicy)
+}
@@ -0,0 +1,234 @@
+"""
+Local batched policy inference for multi-process self-play.
+
+Instead of every game worker running its own forward pass at batch size 1,
+an InferenceServer process holds the policy and serves all workers:
+- every client owns one slot of a shared-memory block, writes the
+  observation and action mask into it and posts the slot number on the
+  request queue, then waits on the slot's semaphore;
+- the server takes the first request and keeps collecting until it has
+  max_batch requests, every connected client is waiting or max_delay seconds
+  have passed, runs one act_batch over the batch, writes the actions back
+  into the slots and wakes the clients.
+Only slot numbers are pickled; observations and masks stay in shared memory.
+
+A policy is anything with act_batch(obs, action_masks) -> actions, like the
+agent.heuristics policies or selfplay.ModulePolicy. The server process builds
+it from policy_factory, so the model is only loaded there:
+
+    server = InferenceServer(functools.partial(ModulePolicy, path), num_slots=32)
+    with server, ProcessPoolExecutor(32, initializer=init, initargs=(server.client(),)) as pool:
+        ...
+    # in a worker (init stored the client): PolicyAgent(client) plays like any agent
+
+Clients are handed to processes on creation (Process arguments or pool
+initargs), so they all descend from the server's creator and share its
+resource tracker; the creator unlinks the shared memory in stop(). A client
+claims a slot on its first request; each process or thread that plays needs
+its own client and slot.
+"""
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from game.player import NUM_PIECES
+from global_constants import BOARD_SIZE
+
+# Seconds a waiting client sleeps between checks that the server is still running
+_POLL_INTERVAL = 0.5
+
+
+def slot_dtype(board_size=BOARD_SIZE):
+    """One request/response slot: the env observation, its action mask and the chosen action."""
+    return np.dtype([
+        ("board", "i1", (board_size, board_size)),
+        ("pieces_mask", "i1", (NUM_PIECES,)),
+        ("action_mask", "?", (board_size * board_size * NUM_PIECES * 8 + 1,)),
+        ("action", "<i8"),
+    ])
+
+
+def _serve(policy_factory, shm_name, num_slots, board_size, requests, done, claimed, ready, running, stats,
+           max_batch, max_delay):
+    try:
+        _serve_requests(policy_factory, shm_name, num_slots, board_size, requests, done, claimed, ready,
+                        running, stats, max_batch, max_delay)
+    finally:
+        # Also on errors (a policy that fails to build or raises), so waiting clients give up
+        running.value = 0
+
+
+def _serve_requests(policy_factory, shm_name, num_slots, board_size, requests, done, claimed, ready, running,
+                    stats, max_batch, max_delay):
+    shm = SharedMemory(name=shm_name)
+    slots = np.ndarray(num_slots, slot_dtype(board_size), buffer=shm.buf)
+    policy = policy_factory()
+    running.value = 1
+    ready.set()
+    stopping = False
+    while not stopping:
+        first = requests.get()
+        if first is None:
+            break
+        batch = [first]
+        deadline = time.perf_counter() + max_delay
+        # No more requests can come once every connected client is waiting
+        while len(batch) < min(max_batch, claimed.value):
+            try:
+                slot = requests.get(timeout=max(deadline - time.perf_counter(), 0))
+            except queue.Empty:
+                break
+            if slot is None:
+                stopping = True
+                break
+            batch.append(slot)
+
+        index = np.array(batch)
+        obs = {"board": slots["board"][index], "pieces_mask": slots["pieces_mask"][index]}
+        slots["action"][index] = policy.act_batch(obs, slots["action_mask"][index])
+        for slot in batch:
+            done[slot].release()
+        stats[0] += 1
+        stats[1] += len(batch)
+    del slots
+    shm.close()
+
+
+def _process_exists(pid):
+    """False once `pid` has exited, also while it waits to be reaped by its parent (Linux)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rpartition(")")[2].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class InferenceClient:
+    """
+    Worker side of an InferenceServer; act() has the heuristic policy
+    signature and raises RuntimeError if the server stops or dies before
+    answering.
+    """
+
+    def __init__(self, shm_name, num_slots, board_size, requests, done, claimed, running, server_pid):
+        self.shm_name = shm_name
+        self.num_slots = num_slots
+        self.board_size = board_size
+        self._requests = requests
+        self._done = done
+        self._claimed = claimed
+        self._running = running
+        self._server_pid = server_pid
+        self._shm = self._slots = self._slot = None
+
+    def __getstate__(self):
+        # Attachment and slot belong to the process that made the requests
+        state = self.__dict__.copy()
+        state["_shm"] = state["_slots"] = state["_slot"] = None
+        return state
+
+    def _connect(self):
+        with self._claimed.get_lock():
+            slot = self._claimed.value
+            if slot >= self.num_slots:
+                raise RuntimeError(f"All {self.num_slots} inference server slots are taken")
+            self._claimed.value += 1
+        self._shm = SharedMemory(name=self.shm_name)
+        self._slots = np.ndarray(self.num_slots, slot_dtype(self.board_size), buffer=self._shm.buf)
+        self._slot = slot
+
+    def act(self, obs, action_mask):
+        if self._slot is None:
+            self._connect()
+        slot, slots = self._slot, self._slots
+        slots["board"][slot] = obs["board"]
+        slots["pieces_mask"][slot] = obs["pieces_mask"]
+        slots["action_mask"][slot] = action_mask
+        self._requests.put(slot)
+        while not self._done[slot].acquire(timeout=_POLL_INTERVAL):
+            # The server clears `running` when it fails; the pid check catches a killed server
+            if not (self._running.value and _process_exists(self._server_pid.value)):
+                if self._done[slot].acquire(block=False):
+                    break
+                raise RuntimeError("Inference server stopped without answering")
+        return int(slots["action"][slot])
+
+
+class InferenceServer:
+    def __init__(self, policy_factory, num_slots, board_size=BOARD_SIZE, max_batch=128, max_delay=0.002):
+        """
+        policy_factory: picklable callable returning the policy, called in the server process
+        num_slots: most clients that can connect
+        max_batch: largest batch per act_batch call
+        max_delay: seconds the first request of a batch waits for more
+        """
+        self.policy_factory = policy_factory
+        self.num_slots = num_slots
+        self.board_size = board_size
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._shm = SharedMemory(create=True, size=num_slots * slot_dtype(board_size).itemsize)
+        self._requests = mp.Queue()
+        self._done = [mp.Semaphore(0) for _ in range(num_slots)]
+        self._claimed = mp.Value("i", 0)
+        self._ready = mp.Event()
+        # Set by the server process while it serves requests
+        self._running = mp.Value("b", 0)
+        self._server_pid = mp.Value("i", 0)
+        # Batches served, requests served
+        self._stats = mp.Array("q", 2)
+        self._process = None
+
+    def start(self, timeout=None):
+        """Start the server process and wait until its policy is built."""
+        self._process = mp.Process(
+            target=_serve, daemon=True,
+            args=(self.policy_factory, self._shm.name, self.num_slots, self.board_size, self._requests,
+                  self._done, self._claimed, self._ready, self._running, self._stats, self.max_batch,
+                  self.max_delay))
+        self._process.start()
+        self._server_pid.value = self._process.pid
+        start = time.perf_counter()
+        while not self._ready.wait(0.1):
+            if not self._process.is_alive():
+                raise RuntimeError(f"Inference server exited with code {self._process.exitcode}")
+            if timeout is not None and time.perf_counter() - start > timeout:
+                raise TimeoutError("Inference server did not start")
+        return self
+
+    def client(self):
+        return InferenceClient(self._shm.name, self.num_slots, self.board_size, self._requests,
+                               self._done, self._claimed, self._running, self._server_pid)
+
+    def stats(self):
+        """(batches, requests) served so far."""
+        return self._stats[0], self._stats[1]
+
+    def stop(self):
+        if self._process is not None:
+            self._requests.put(None)
+            self._process.join()
+            self._process = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,310 @@
+"""
+League self-play for the RLlib multi-agent env (new API stack).
+
+The learner ("main") plays one seat per episode; the other seats are taken by
+frozen snapshots of earlier learner weights:
+- SnapshotPool keeps a bounded pool of snapshots on disk (one pickle per
+  snapshot plus pool.json with the match statistics), samples opponents by
+  prioritized fictitious self-play (PFSP) and evicts by quality and recency.
+- LeagueManager loads sampled snapshots into a few frozen "slot" modules and
+  maps seats to modules per episode. All seats mapped to one slot share its
+  forward pass, so opponents are inferred in batches across the env runner's
+  vectorized envs no matter how large the pool is.
+- LeagueCallbacks reports head-to-head results from the env runners and, on
+  the driver, records them, adds snapshots and refreshes the slots after each
+  training iteration.
+
+    manager = LeagueManager(SnapshotPool("league"), num_slots=3)
+    config = manager.configure(PPOConfig().environment(...), conv_module_spec())
+"""
+import json
+import os
+import pickle
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from ray.rllib.callbacks.callbacks import RLlibCallback
+from ray.rllib.core.rl_module.multi_rl_module import MultiRLModuleSpec
+from ray.rllib.utils.metrics import ENV_RUNNER_RESULTS
+from ray.rllib.utils.numpy import convert_to_numpy
+
+LEARNER_MODULE = "main"
+# Metrics key of the head-to-head results per slot module
+LEAGUE_METRICS = "league"
+
+
+class SnapshotPool:
+    def __init__(self, directory, capacity=20, min_games=20, cache_size=4):
+        """
+        directory: where snapshot files and pool.json live; an existing pool is reopened
+        capacity: snapshots kept on disk
+        min_games: games against a snapshot before its quality decides evictions
+        cache_size: snapshots whose weights are kept in memory
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self.min_games = min_games
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+            self.entries = {entry["id"]: entry for entry in meta["snapshots"]}
+            self._next_id, self._clock = meta["next_id"], meta["clock"]
+        except FileNotFoundError:
+            self.entries, self._next_id, self._clock = {}, 0, 0
+
+    def _meta_path(self):
+        return os.path.join(self.directory, "pool.json")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def ids(self):
+        """Snapshot IDs, oldest first."""
+        return sorted(self.entries)
+
+    def add(self, weights, step=0):
+        """Store `weights` (any picklable module state) as a new snapshot and return its ID."""
+        snapshot_id = self._next_id
+        self._next_id += 1
+        path = os.path.join(self.directory, f"snapshot_{snapshot_id:06d}.pkl")
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(weights, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        self.entries[snapshot_id] = {"id": snapshot_id, "step": step, "file": os.path.basename(path),
+                                     "games": 0, "learner_score": 0.0, "last_used": self._tick()}
+        while len(self.entries) > self.capacity:
+            self.evict()
+        self.save()
+        return snapshot_id
+
+    def load(self, snapshot_id):
+        """Weights of a snapshot (from the in-memory cache if possible)."""
+        entry = self.entries[snapshot_id]
+        entry["last_used"] = self._tick()
+        if snapshot_id in self._cache:
+            self._cache.move_to_end(snapshot_id)
+            return self._cache[snapshot_id]
+        with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+            weights = pickle.load(f)
+        self._cache[snapshot_id] = weights
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return weights
+
+    def record(self, snapshot_id, learner_score, games=1):
+        """Add head-to-head results: the learner's summed score (1 win, 0.5 tie, 0 loss) over `games`."""
+        entry = self.entries.get(snapshot_id)
+        if entry is not None:
+            entry["games"] += games
+            entry["learner_score"] += learner_score
+
+    def win_rate(self, snapshot_id):
+        """Learner's expected score against the snapshot (uniform prior: 0.5 before any game)."""
+        entry = self.entries[snapshot_id]
+        return (entry["learner_score"] + 1.0) / (entry["games"] + 2.0)
+
+    def pfsp_weights(self, snapshot_ids, power=2.0):
+        """
+        PFSP "hard" weighting (1 - p) ** power of the learner's win rate p:
+        opponents the learner still loses to are played most.
+        """
+        p = np.array([self.win_rate(i) for i in snapshot_ids])
+        weights = (1.0 - p) ** power + 1e-3
+        return weights / weights.sum()
+
+    def sample(self, rng, size=1, power=2.0):
+        """Draw `size` snapshot IDs by PFSP (distinct while the pool is large enough)."""
+        ids = self.ids()
+        if not ids:
+            return []
+        picked = rng.choice(ids, size=size, replace=size > len(ids), p=self.pfsp_weights(ids, power))
+        for snapshot_id in picked:
+            self.entries[int(snapshot_id)]["last_used"] = self._tick()
+        return [int(i) for i in picked]
+
+    def evict(self):
+        """
+        Drop one snapshot, never the newest: the one the learner beats most
+        often among those with at least min_games games, otherwise the least
+        recently used one.
+        """
+        candidates = self.ids()[:-1]
+        if not candidates:
+            return None
+        rated = [i for i in candidates if self.entries[i]["games"] >= self.min_games]
+        if rated:
+            victim = max(rated, key=self.win_rate)
+        else:
+            victim = min(candidates, key=lambda i: self.entries[i]["last_used"])
+        entry = self.entries.pop(victim)
+        self._cache.pop(victim, None)
+        try:
+            os.remove(os.path.join(self.directory, entry["file"]))
+        except FileNotFoundError:
+            pass
+        return victim
+
+    def save(self):
+        """Write pool.json (atomically)."""
+        meta = {"next_id": self._next_id, "clock": self._clock,
+                "snapshots": [self.entries[i] for i in self.ids()]}
+        path = self._meta_path()
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+
+class LeagueMapping:
+    """
+    Picklable agent-to-module mapping shipped to the env runners: per episode
+    one seat (chosen from the episode ID) is the learner, every other seat a
+    slot drawn with the given weights (uniformly without).
+    """
+
+    def __init__(self, agent_ids, slots, weights=None, learner=LEARNER_MODULE, seed=0):
+        self.agent_ids = list(agent_ids)
+        self.slots = list(slots)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        self.learner = learner
+        self.seed = seed
+
+    def assignment(self, episode_key):
+        """Module ID per agent ID for the episode with the given integer key."""
+        rng = np.random.default_rng([self.seed, episode_key])
+        learner_seat = int(rng.integers(len(self.agent_ids)))
+        if not self.slots:
+            return {agent_id: self.learner for agent_id in self.agent_ids}
+        picks = rng.choice(len(self.slots), size=len(self.agent_ids), p=self.weights)
+        return {agent_id: self.learner if i == learner_seat else self.slots[picks[i]]
+                for i, agent_id in enumerate(self.agent_ids)}
+
+    def __call__(self, agent_id, episode=None, **kwargs):
+        episode_id = getattr(episode, "id_", None) or getattr(episode, "episode_id", "")
+        return self.assignment(zlib.crc32(str(episode_id).encode()))[agent_id]
+
+
+def head_to_head(returns, modules, learner=LEARNER_MODULE):
+    """
+    From the per-agent episode returns (official scores) and module mapping,
+    the learner's score against every other module: {module: (score, games)}
+    with 1 per opponent seat beaten, 0.5 per tie.
+    """
+    learner_agents = [a for a, m in modules.items() if m == learner]
+    results = {}
+    for agent_id, module in modules.items():
+        if module == learner:
+            continue
+        for own in learner_agents:
+            diff = returns.get(own, 0.0) - returns.get(agent_id, 0.0)
+            score, games = results.get(module, (0.0, 0))
+            results[module] = (score + (1.0 if diff > 0 else 0.5 if diff == 0 else 0.0), games + 1)
+    return results
+
+
+class LeagueManager:
+    def __init__(self, pool, num_slots=3, snapshot_every=10, pfsp_power=2.0,
+                 agent_ids=None, learner=LEARNER_MODULE, seed=0):
+        """
+        pool: SnapshotPool
+        num_slots: frozen opponent modules (one batched forward pass each)
+        snapshot_every: training iterations between learner snapshots
+        """
+        self.pool = pool
+        self.slots = [f"league_{i}" for i in range(num_slots)]
+        self.snapshot_every = snapshot_every
+        self.pfsp_power = pfsp_power
+        self.agent_ids = agent_ids or [f"player_{i}" for i in range(4)]
+        self.learner = learner
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        # Snapshot ID currently loaded into each slot (None: not filled yet)
+        self.slot_snapshots = [None] * num_slots
+
+    def module_ids(self):
+        return [self.learner, *self.slots]
+
+    def mapping(self):
+        """Mapping for the current slots; plain self-play until the first snapshot exists."""
+        filled = [slot for slot, snap in zip(self.slots, self.slot_snapshots) if snap is not None]
+        if not filled:
+            return LeagueMapping(self.agent_ids, [], learner=self.learner, seed=self.seed)
+        # pool.sample already filled the slots by PFSP; weighting the seats again would square it
+        return LeagueMapping(self.agent_ids, filled, learner=self.learner, seed=int(self.rng.integers(2 ** 31)))
+
+    def configure(self, config, module_spec):
+        """Add the league's modules, mapping and callbacks to an AlgorithmConfig."""
+        manager = self
+
+        class _Callbacks(LeagueCallbacks):
+            league = manager
+
+        return (
+            config
+            .multi_agent(
+                policies=set(self.module_ids()),
+                policy_mapping_fn=self.mapping(),
+                policies_to_train=[self.learner],
+            )
+            .rl_module(rl_module_spec=MultiRLModuleSpec(
+                rl_module_specs={module_id: module_spec for module_id in self.module_ids()}))
+            .callbacks(_Callbacks)
+        )
+
+    def record_results(self, league_metrics):
+        """Credit {slot: {"score": s, "games": n}} to the snapshots loaded in the slots."""
+        for slot, snapshot_id in zip(self.slots, self.slot_snapshots):
+            stats = league_metrics.get(slot)
+            if snapshot_id is None or not stats or not stats.get("games"):
+                continue
+            self.pool.record(snapshot_id, float(stats["score"]), int(stats["games"]))
+
+    def update(self, algorithm, result):
+        """After a training iteration: record results, snapshot the learner, refill the slots."""
+        self.record_results(result.get(ENV_RUNNER_RESULTS, {}).get(LEAGUE_METRICS, {}))
+        if algorithm.iteration % self.snapshot_every == 0 or not len(self.pool):
+            # The learner's full module; algorithm.get_module is the env runner's inference-only copy
+            weights = algorithm.learner_group.get_weights(module_ids=[self.learner])[self.learner]
+            self.pool.add(convert_to_numpy(weights), step=algorithm.iteration)
+
+        self.slot_snapshots = self.pool.sample(self.rng, len(self.slots), self.pfsp_power)
+        algorithm.set_state({"learner_group": {"learner": {"rl_module": {
+            slot: self.pool.load(snapshot_id) for slot, snapshot_id in zip(self.slots, self.slot_snapshots)
+        }}}})
+        mapping = self.mapping()
+        algorithm.env_runner_group.foreach_env_runner(
+            lambda env_runner: env_runner.config.multi_agent(policy_mapping_fn=mapping),
+            local_env_runner=True,
+        )
+        self.pool.save()
+        result[LEAGUE_METRICS] = {
+            "pool_size": len(self.pool),
+            "slots": {slot: snap for slot, snap in zip(self.slots, self.slot_snapshots)},
+        }
+
+
+class LeagueCallbacks(RLlibCallback):
+    """Set up by LeagueManager.configure; `league` is the manager (used on the driver only)."""
+    league = None
+
+    def on_episode_end(self, *, episode, prev_episode_chunks=None, metrics_logger=None, **kwargs):
+        returns = {}
+        for chunk in [*(prev_episode_chunks or []), episode]:
+            for agent_id, agent_episode in chunk.agent_episodes.items():
+                returns[agent_id] = returns.get(agent_id, 0.0) + agent_episode.get_return()
+        modules = {agent_id: episode.module_for(agent_id) for agent_id in returns}
+        for module, (score, games) in head_to_head(returns, modules).items():
+            # "sum" stats restart after every reduce, i.e. per training iteration
+            metrics_logger.log_value((LEAGUE_METRICS, module, "score"), score, reduce="sum")
+            metrics_logger.log_value((LEAGUE_METRICS, module, "games"), games, reduce="sum")
+
+    def on_train_result(self, *, algorithm, result, **kwargs):
+        if self.league is not None:
+            self.league.update(algorithm, result)
@@ -0,0 +1,283 @@
+"""
+Monte Carlo Tree Search player for Blokus, built directly on Game/Board/Move_generator.
+
+- four-player max^n backups: every node stores one value per player and each
+  player picks children by its own component (UCT)
+- progressive widening: a node with n visits may have at most
+  ceil(widening_c * n ** widening_alpha) children, tried largest pieces first
+- subtree reuse between consecutive turns (the opponents' moves in between are
+  recovered from the board)
+- root parallelism: independent searches in a process pool, visit counts
+  merged at the root
+Moves are placement IDs (see game.placements); None means "pass".
+"""
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game.move_generator import Move_generator
+from game.placements import get_placement_table
+from game.playout import random_playout
+
+
+def rank_utility(scores):
+    """Value per player in [0, 1] from the final ranking; tied players share the better rank."""
+    scores = np.asarray(scores)
+    beaten = (scores[:, None] > scores[None, :]).sum(axis=1)
+    return beaten / (len(scores) - 1)
+
+
+class MCTSNode:
+    __slots__ = ("move", "mover", "parent", "children", "player", "out",
+                 "untried", "next_untried", "visits", "value_sum")
+
+    def __init__(self, move=None, mover=None, parent=None, num_players=4):
+        # Placement ID that led here and the player who made it
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = []
+        # Player to move at this node (None: terminal, set when the node is initialised)
+        self.player = None
+        # Players that cannot move any more
+        self.out = frozenset()
+        # Legal placements not expanded yet, in widening order (None: not initialised)
+        self.untried = None
+        self.next_untried = 0
+        self.visits = 0
+        self.value_sum = np.zeros(num_players)
+
+    def is_terminal(self):
+        return self.untried is not None and self.player is None
+
+
+class MCTSPlayer:
+    def __init__(self, time_budget=1.0, max_iterations=None, exploration=1.0,
+                 widening_c=2.0, widening_alpha=0.5, utility=rank_utility,
+                 num_workers=1, seed=None):
+        """
+        time_budget: seconds of search per move (per worker)
+        max_iterations: optional cap on iterations per move (per worker)
+        exploration: UCT exploration constant
+        widening_c / widening_alpha: progressive widening schedule
+        utility: maps final scores (array per player) to values per player
+        num_workers: >1 enables root-parallel search across a process pool
+                     (each worker searches a fresh tree; no subtree reuse)
+        """
+        if time_budget is None and max_iterations is None:
+            raise ValueError("MCTSPlayer needs a time_budget or max_iterations")
+        self.time_budget = time_budget
+        self.max_iterations = max_iterations
+        self.exploration = exploration
+        self.widening_c = widening_c
+        self.widening_alpha = widening_alpha
+        self.utility = utility
+        self.num_workers = num_workers
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self._root = None
+        self._root_game = None
+        self._pool = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def act(self, game, inactive_players=()):
+        """Return the chosen placement ID for game.current_player_index, or None to pass."""
+        visits = self.search(game, inactive_players)
+        if not visits:
+            return None
+        move = max(visits, key=lambda m: visits[m])
+        self._advance_root(move)
+        return move
+
+    def search(self, game, inactive_players=()):
+        """
+        Search the position and return {placement ID: visit count} for the root
+        moves (merged over all workers). Useful as a policy target.
+        """
+        if self.num_workers > 1:
+            return self._search_parallel(game, inactive_players)
+        root = self._search(game, inactive_players)
+        return {child.move: child.visits for child in root.children}
+
+    def reset(self):
+        """Forget the search tree (e.g. at the start of a new game)."""
+        self._root = None
+        self._root_game = None
+
+    def close(self):
+        """Shut down the worker pool, if any."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def _search(self, game, inactive_players):
+        root = self._reuse_root(game, inactive_players)
+        if root is None:
+            root = MCTSNode(num_players=len(game.players))
+            root.out = frozenset(inactive_players)
+            self._init_node(root, game, game.current_player_index)
+        self._root = root
+        self._root_game = game.copy()
+
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        iterations = 0
+        while not root.is_terminal():
+            if self.max_iterations is not None and iterations >= self.max_iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self._iterate(root, game)
+            iterations += 1
+        return root
+
+    def _iterate(self, root, root_game):
+        game = root_game.copy()
+        table = get_placement_table(game.board.size)
+        node = root
+        path = [node]
+        while not node.is_terminal():
+            limit = math.ceil(self.widening_c * max(node.visits, 1) ** self.widening_alpha)
+            if len(node.children) < limit and node.next_untried < len(node.untried):
+                move = int(node.untried[node.next_untried])
+                node.next_untried += 1
+                child = MCTSNode(move, node.player, node, len(game.players))
+                node.children.append(child)
+                self._apply(game, table, node.player, move)
+                child.out = node.out
+                self._init_node(child, game, (node.player + 1) % len(game.players))
+                path.append(child)
+                node = child
+                break
+            node = self._select(node)
+            self._apply(game, table, node.mover, node.move)
+            path.append(node)
+
+        if node.is_terminal():
+            scores = np.array(game.scores())
+        else:
+            game.current_player_index = node.player
+            scores = random_playout(game, self.rng, inactive_players=node.out, copy=False)
+        values = self.utility(scores)
+        for visited in path:
+            visited.visits += 1
+            visited.value_sum += values
+
+    def _select(self, node):
+        log_n = math.log(node.visits)
+        best, best_score = None, -math.inf
+        for child in node.children:
+            mean = child.value_sum[node.player] / child.visits
+            score = mean + self.exploration * math.sqrt(log_n / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _init_node(self, node, game, start_idx):
+        """Find the next player (from start_idx) who can move and order its legal moves."""
+        num_players = len(game.players)
+        move_gen = Move_generator(game.board)
+        out = set(node.out)
+        table = get_placement_table(game.board.size)
+        for offset in range(num_players):
+            idx = (start_idx + offset) % num_players
+            if idx in out:
+                continue
+            legal = move_gen.get_valid_placements(game.players[idx])
+            if legal.size:
+                # Largest pieces first, random order among equal sizes
+                order = np.lexsort((self.rng.random(legal.size), -table.num_cells[legal]))
+                node.player = idx
+                node.untried = legal[order]
+                node.out = frozenset(out)
+                return
+            out.add(idx)
+        node.player = None
+        node.untried = np.empty(0, dtype=np.int32)
+        node.out = frozenset(out)
+
+    @staticmethod
+    def _apply(game, table, player_idx, move):
+        game.board.place_piece(int(table.piece[move]), table.positions(move), game.players[player_idx])
+
+    # ------------------------------------------------------------------
+    # Tree reuse
+    # ------------------------------------------------------------------
+    def _advance_root(self, move):
+        if self._root is None:
+            return
+        for child in self._root.children:
+            if child.move == move:
+                self._apply(self._root_game, get_placement_table(self._root_game.board.size),
+                            self._root.player, move)
+                child.parent = None
+                self._root = child
+                return
+        self.reset()
+
+    def _reuse_root(self, game, inactive_players):
+        """
+        Walk the stored tree along the moves played since the last search
+        (recovered from the board difference). Returns the matching node or None.
+        """
+        node, old = self._root, self._root_game
+        if node is None or old is None or old.board.size != game.board.size:
+            return None
+        old = old.copy()
+        table = get_placement_table(game.board.size)
+        changed = np.argwhere(old.board.cells != game.board.cells)
+        new_cells = {}
+        for y, x in changed:
+            owner = int(game.board.cells[y, x])
+            if old.board.cells[y, x] != -1 or owner < 0:
+                return None
+            new_cells.setdefault(owner, []).append((int(x), int(y)))
+
+        for _ in range(len(game.players) + 1):
+            if node.player == game.current_player_index and not new_cells:
+                break
+            if node.player is None or node.player not in new_cells:
+                return None
+            move = table.find(new_cells.pop(node.player))
+            child = next((c for c in node.children if c.move == move), None)
+            if child is None:
+                return None
+            self._apply(old, table, node.player, move)
+            node = child
+        else:
+            return None
+        if not set(inactive_players) <= node.out:
+            return None
+        node.parent = None
+        return node
+
+    # ------------------------------------------------------------------
+    # Root parallelism
+    # ------------------------------------------------------------------
+    def _search_parallel(self, game, inactive_players):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers)
+        config = dict(time_budget=self.time_budget, max_iterations=self.max_iterations,
+                      exploration=self.exploration, widening_c=self.widening_c,
+                      widening_alpha=self.widening_alpha, utility=self.utility)
+        seeds = self.rng.integers(2 ** 63, size=self.num_workers)
+        jobs = [
+            self._pool.submit(_search_worker, game, tuple(inactive_players), config, int(seed))
+            for seed in seeds
+        ]
+        merged = {}
+        for job in jobs:
+            for move, visits in job.result().items():
+                merged[move] = merged.get(move, 0) + visits
+        return merged
+
+
+def _search_worker(game, inactive_players, config, seed):
+    """Run one independent search in a pool process and return its root visit counts."""
+    return MCTSPlayer(seed=seed, num_workers=1, **config).search(game, inactive_players)
@@ -0,0 +1,196 @@
+"""
+Ratings from finished multi-player games.
+
+A game is (labels, scores): the agent label on every seat and the final
+scores. Every pair of seats held by different agents counts as one pairwise
+result (the higher score wins, equal scores draw); seats held by the same
+agent are not compared.
+
+- elo_ratings fits a Bradley-Terry model to all pairwise results at once and
+  puts bootstrap confidence intervals on it (games are resampled, so the
+  correlation between the pairs of one game is kept).
+- trueskill_ratings runs the Weng-Lin Thurstone-Mosteller full-pair update,
+  the multi-player form of TrueSkill, over the games in the order given.
+
+Both are pure functions of the game list, so ratings of a resumed run match
+those of an uninterrupted one as long as the games are passed in a fixed
+order.
+"""
+from typing import NamedTuple
+
+import numpy as np
+from scipy.special import ndtr
+
+ELO_BASE = 1500.0
+# Elo points per unit of natural log-strength
+_ELO_SCALE = 400 / np.log(10)
+# Fraction of the ratings below and above the interval
+_TAIL = 0.025
+_Z = 1.959963984540054
+
+
+class Rating(NamedTuple):
+    value: float
+    low: float    # 95 % interval
+    high: float
+    games: int
+
+
+def pairwise_results(games, labels):
+    """
+    Arrays (game, agent i, opponent j, score of i) with one row per
+    ordered pair of seats; i and j index `labels`, draws give 0.5 both ways.
+    """
+    index = {label: i for i, label in enumerate(labels)}
+    rows = []
+    for g, (seats, scores) in enumerate(games):
+        for a in range(len(seats)):
+            for b in range(len(seats)):
+                if seats[a] == seats[b]:
+                    continue
+                score = 1.0 if scores[a] > scores[b] else 0.5 if scores[a] == scores[b] else 0.0
+                rows.append((g, index[seats[a]], index[seats[b]], score))
+    if not rows:
+        return (np.zeros(0, dtype=np.int64),) * 3 + (np.zeros(0),)
+    game, i, j, score = zip(*rows)
+    return np.array(game), np.array(i), np.array(j), np.array(score)
+
+
+def _fit_bradley_terry(wins, counts, prior, start=None, iterations=100, tol=1e-9):
+    """
+    Log-strengths maximising the Bradley-Terry likelihood of the (fractional)
+    win matrix, by damped Newton steps. The prior is `prior` drawn games of
+    every agent against a reference of log-strength 0, which keeps agents
+    without wins or losses finite and the Hessian negative definite.
+    """
+    theta = np.zeros(len(wins)) if start is None else start.copy()
+    total_wins = wins.sum(axis=1) + prior / 2
+    for _ in range(iterations):
+        expected = 1 / (1 + np.exp(theta[None, :] - theta[:, None]))
+        reference = 1 / (1 + np.exp(-theta))
+        gradient = total_wins - (counts * expected).sum(axis=1) - prior * reference
+        curvature = counts * expected * (1 - expected)
+        hessian = curvature - np.diag(curvature.sum(axis=1) + prior * reference * (1 - reference))
+        step = np.clip(np.linalg.solve(hessian, gradient), -1.0, 1.0)
+        theta -= step
+        if np.max(np.abs(step)) < tol:
+            break
+    return theta
+
+
+def _matrices(n, i, j, score, weights):
+    wins = np.zeros((n, n))
+    counts = np.zeros((n, n))
+    np.add.at(wins, (i, j), score * weights)
+    np.add.at(counts, (i, j), weights)
+    return wins, counts
+
+
+def elo_ratings(games, labels=None, bootstrap=200, prior=1.0, seed=0):
+    """
+    Bradley-Terry Elo per label (1500 = the prior's reference) with percentile
+    bootstrap intervals over `bootstrap` resamples of the games.
+    """
+    labels = _labels(games, labels)
+    game, i, j, score = pairwise_results(games, labels)
+    n = len(labels)
+    wins, counts = _matrices(n, i, j, score, np.ones(len(game)))
+    theta = _fit_bradley_terry(wins, counts, prior)
+    elo = ELO_BASE + _ELO_SCALE * theta
+
+    low = high = elo
+    if bootstrap and games:
+        rng = np.random.default_rng(seed)
+        samples = np.empty((bootstrap, n))
+        for b in range(bootstrap):
+            weights = rng.multinomial(len(games), np.full(len(games), 1 / len(games)))[game]
+            wins, counts = _matrices(n, i, j, score, weights)
+            samples[b] = ELO_BASE + _ELO_SCALE * _fit_bradley_terry(wins, counts, prior, theta)
+        low, high = np.quantile(samples, [_TAIL, 1 - _TAIL], axis=0)
+    played = _games_played(games, labels)
+    return {label: Rating(float(elo[k]), float(low[k]), float(high[k]), played[k])
+            for k, label in enumerate(labels)}
+
+
+def _v(x, t):
+    # Mean correction of a win with margin t
+    xt = x - t
+    denominator = ndtr(xt)
+    return np.where(denominator < 1e-12, -xt, _pdf(xt) / np.maximum(denominator, 1e-12))
+
+
+def _w(x, t):
+    # Variance correction of a win with margin t
+    xt = x - t
+    v = _v(x, t)
+    return np.where(ndtr(xt) < 1e-12, np.where(x < 0, 1.0, 0.0), v * (v + xt))
+
+
+def _v_draw(x, t):
+    ax = np.abs(x)
+    denominator = ndtr(t - ax) - ndtr(-t - ax)
+    numerator = _pdf(-t - ax) - _pdf(t - ax)
+    v = np.where(x < 0, -numerator, numerator) / np.maximum(denominator, 1e-12)
+    return np.where(denominator < 1e-12, np.where(x < 0, -x + t, -x - t), v)
+
+
+def _w_draw(x, t):
+    ax = np.abs(x)
+    denominator = ndtr(t - ax) - ndtr(-t - ax)
+    w = ((t - ax) * _pdf(t - ax) + (t + ax) * _pdf(-t - ax)) / np.maximum(denominator, 1e-12)
+    return np.where(denominator < 1e-12, 1.0, w + _v_draw(x, t) ** 2)
+
+
+def _pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def trueskill_ratings(games, labels=None, mu=25.0, sigma=25.0 / 3, beta=25.0 / 6,
+                      tau=25.0 / 300, draw_margin=0.1, kappa=1e-4):
+    """
+    TrueSkill-style (mu, sigma) per label after playing through `games` in
+    order; the interval is mu -/+ 1.96 sigma. An agent on several seats of one
+    game collects the updates of all its seats.
+    """
+    labels = _labels(games, labels)
+    index = {label: k for k, label in enumerate(labels)}
+    mus = np.full(len(labels), mu)
+    variances = np.full(len(labels), sigma ** 2)
+    for seats, scores in games:
+        players = np.array([index[label] for label in seats])
+        scores = np.asarray(scores)
+        variances[np.unique(players)] += tau ** 2
+        m, var = mus[players], variances[players]
+        a, b = np.nonzero(players[:, None] != players[None, :])
+        c = np.sqrt(var[a] + var[b] + 2 * beta ** 2)
+        x = (m[a] - m[b]) / c
+        t = draw_margin / c
+        won, drew = scores[a] > scores[b], scores[a] == scores[b]
+        # Rewrite losses as wins from the other side: v(-x) enters with a minus sign
+        sign = np.where(won, 1.0, -1.0)
+        v = np.where(drew, _v_draw(x, t), sign * _v(sign * x, t))
+        w = np.where(drew, _w_draw(x, t), _w(sign * x, t))
+        gamma = np.sqrt(var[a]) / c
+        omega = np.bincount(players[a], weights=var[a] / c * v, minlength=len(labels))
+        delta = np.bincount(players[a], weights=gamma * var[a] / c ** 2 * w, minlength=len(labels))
+        mus += omega
+        variances *= np.maximum(1 - delta, kappa)
+    sigmas = np.sqrt(variances)
+    played = _games_played(games, labels)
+    return {label: Rating(float(mus[k]), float(mus[k] - _Z * sigmas[k]),
+                          float(mus[k] + _Z * sigmas[k]), played[k])
+            for k, label in enumerate(labels)}
+
+
+def _labels(games, labels):
+    if labels is not None:
+        return list(labels)
+    return sorted({label for seats, _ in games for label in seats})
+
+
+def _games_played(games, labels):
+    played = dict.fromkeys(labels, 0)
+    for seats, _ in games:
+        for label in set(seats):
+            played[label] += 1
+    return [played[label] for label in labels]
@@ -0,0 +1,179 @@
+"""
+Streaming (observation, action mask, action, outcome) batches from recorded games.
+
+Recorded move sequences (game.records) are replayed through Game/Board on the
+fly, so observations and 67k-wide masks exist only for the samples currently
+in the shuffle buffer and the batch being built. Workers replay chunks of
+games in separate processes and send back compact samples (board, pieces,
+legal action indices); masks are expanded only when a batch is assembled.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from agent.mcts import rank_utility
+from agent.selfplay import replay_moves
+from game.move_generator import Move_generator
+from game.placements import placement_actions
+from game.player import NUM_PIECES
+from game.records import PASS, GameRecordReader
+
+# GameRecordReader per path, opened once per process
+_READERS = {}
+
+
+def _reader(path):
+    reader = _READERS.get(path)
+    if reader is None:
+        reader = _READERS[path] = GameRecordReader(path)
+    return reader
+
+
+def _env_action(move, actions, ids, pivot):
+    """
+    Env action index that plays placement `move`, or None if there is none:
+    the env resolves an action to the valid placement with the lowest pivot,
+    so a placement that is never the lowest of any of its actions cannot be
+    played through the env and any action would label another move.
+    """
+    order = np.lexsort((pivot, actions))
+    first = np.r_[True, actions[order][1:] != actions[order][:-1]]
+    resolved = order[first]
+    exact = actions[resolved][ids[resolved] == move]
+    return int(exact.min()) if exact.size else None
+
+
+def replay_samples(path, game_indices, include_passes=False):
+    """
+    Replay the given games of the record file at `path` and return compact
+    samples (board, pieces_mask, legal actions, action, score, outcome), one
+    per recorded ply, from the mover's point of view, and the number of plies
+    skipped because no env action plays their placement.
+    """
+    reader = _reader(path)
+    samples = []
+    skipped = 0
+    for i in game_indices:
+        record = reader[int(i)]
+        scores = np.asarray(record.scores)
+        utilities = rank_utility(scores)
+        for game, idx, move in replay_moves(record.moves, record.start_player, reader.board_size,
+                                            record.colors):
+            player = game.players[idx]
+            if move == PASS:
+                if not include_passes:
+                    continue
+                legal = np.empty(0, dtype=np.int64)
+                action = reader.board_size * reader.board_size * NUM_PIECES * 8
+            else:
+                placements = Move_generator(game.board).get_valid_placements(player)
+                legal, ids, pivot = placement_actions(placements, game.board.anchors[idx],
+                                                      reader.board_size, NUM_PIECES)
+                action = _env_action(move, legal, ids, pivot)
+                if action is None:
+                    skipped += 1
+                    continue
+            cells = game.board.cells
+            board = np.where(cells == idx, 1, np.where(cells >= 0, -1, 0)).astype(np.int8)
+            samples.append((board, player.pieces_mask.copy(), legal.astype(np.int32), action,
+                            int(scores[idx]), float(utilities[idx])))
+    return samples, skipped
+
+
+class ReplayDataset:
+    def __init__(self, paths, batch_size=256, shuffle_buffer=10_000, num_workers=0,
+                 games_per_task=8, epochs=1, include_passes=False, seed=None):
+        """
+        paths: record files written by game.records (e.g. by generate_games.py
+               --format bin or the env recorder)
+        shuffle_buffer: samples held for shuffling; bounds memory together with
+                        2 * num_workers tasks in flight
+        num_workers: replay processes (0 replays in the calling process)
+        epochs: passes over all games (None repeats forever)
+        """
+        self.paths = [str(p) for p in ([paths] if isinstance(paths, str) else paths)]
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer
+        self.num_workers = num_workers
+        self.games_per_task = games_per_task
+        self.epochs = epochs
+        self.include_passes = include_passes
+        self.rng = np.random.default_rng(seed)
+        self.board_size = GameRecordReader(self.paths[0]).board_size
+        self.num_actions = self.board_size * self.board_size * NUM_PIECES * 8 + 1
+        # Plies replayed so far whose placement no env action plays (not emitted)
+        self.skipped = 0
+
+    def _tasks(self):
+        epoch = 0
+        while self.epochs is None or epoch < self.epochs:
+            tasks = []
+            for path in self.paths:
+                games = self.rng.permutation(len(GameRecordReader(path)))
+                tasks.extend((path, games[i:i + self.games_per_task])
+                             for i in range(0, len(games), self.games_per_task))
+            for k in self.rng.permutation(len(tasks)):
+                yield tasks[k]
+            epoch += 1
+
+    def _sample_chunks(self):
+        if self.num_workers == 0:
+            for path, games in self._tasks():
+                samples, skipped = replay_samples(path, games, self.include_passes)
+                self.skipped += skipped
+                yield samples
+            return
+        with ProcessPoolExecutor(max_workers=self.num_workers) as pool:
+            tasks = self._tasks()
+            running = set()
+            while True:
+                for path, games in tasks:
+                    running.add(pool.submit(replay_samples, path, games, self.include_passes))
+                    if len(running) >= 2 * self.num_workers:
+                        break
+                if not running:
+                    return
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    samples, skipped = future.result()
+                    self.skipped += skipped
+                    yield samples
+
+    def __iter__(self):
+        """Yield dicts of NumPy arrays with batch_size rows (the last batch may be smaller)."""
+        buffer, batch = [], []
+        for chunk in self._sample_chunks():
+            for sample in chunk:
+                if len(buffer) < self.shuffle_buffer:
+                    buffer.append(sample)
+                    continue
+                # Emit a random buffered sample and keep the new one in its place
+                k = int(self.rng.integers(len(buffer)))
+                batch.append(buffer[k])
+                buffer[k] = sample
+                if len(batch) == self.batch_size:
+                    yield self._collate(batch)
+                    batch = []
+        for k in self.rng.permutation(len(buffer)):
+            batch.append(buffer[k])
+            if len(batch) == self.batch_size:
+                yield self._collate(batch)
+                batch = []
+        if batch:
+            yield self._collate(batch)
+
+    def _collate(self, samples):
+        boards, pieces, legal, actions, scores, outcomes = zip(*samples)
+        masks = np.zeros((len(samples), self.num_actions), dtype=bool)
+        rows = np.repeat(np.arange(len(samples)), [len(l) for l in legal])
+        masks[rows, np.concatenate(legal)] = True
+        # A mover without placements can only skip
+        masks[:, -1] |= ~masks[:, :-1].any(axis=1)
+        return {
+            "board": np.stack(boards),
+            "pieces_mask": np.stack(pieces),
+            "action_mask": masks,
+            "action": np.array(actions, dtype=np.int64),
+            "score": np.array(scores, dtype=np.int32),
+            "outcome": np.array(outcomes, dtype=np.float32),
+        }
@@ -0,0 +1,252 @@
+"""
+Depth-limited game-tree search for Blokus on Game/Board/Move_generator.
+
+Two multi-player variants are available:
+- "paranoid": the searching player maximises, all opponents are assumed to
+  minimise its evaluation (alpha-beta applies); with two players this is
+  plain minimax on the score differential
+- "maxn": every player maximises its own component of the evaluation vector
+Both use iterative deepening, a transposition table keyed by the Zobrist hash,
+and move ordering (TT move, killer moves, then large pieces, moves covering
+opponents' corner anchors and the history heuristic). Moves are made and taken
+back in place with Game.make_move/unmake_move. Depth is counted in plies
+(one move of one player). Moves are placement IDs; None means "pass".
+"""
+import math
+import time
+
+import numpy as np
+
+from game.move_generator import Move_generator
+from game.placements import get_placement_table
+
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+# Nodes between two time checks
+_TIME_CHECK_INTERVAL = 256
+
+
+def default_evaluation(game, out):
+    """
+    Per-player heuristic: official score so far plus a small bonus per anchor
+    cell for players that can still move.
+    """
+    anchors = game.board.anchors.reshape(len(game.players), -1).sum(axis=1)
+    return [
+        game.score(i) + (0.0 if i in out else 0.25 * float(anchors[i]))
+        for i in range(len(game.players))
+    ]
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class SearchPlayer:
+    def __init__(self, mode="paranoid", max_depth=3, time_budget=None, max_moves=24,
+                 evaluate=default_evaluation, tt_size=1_000_000):
+        """
+        mode: "paranoid" or "maxn"
+        max_depth: deepest iteration of the iterative deepening, in plies
+        time_budget: optional seconds per move; the last completed depth is used, or
+                     the first ordered move if depth 1 does not finish
+        max_moves: moves searched per node after ordering (forward pruning), None for all
+        evaluate: f(game, out) -> per-player values; `out` is the set of players
+                  that cannot move any more
+        tt_size: entries kept in the transposition table before it is cleared
+        """
+        if mode not in ("paranoid", "maxn"):
+            raise ValueError(f"Unknown search mode {mode!r}; expected 'paranoid' or 'maxn'")
+        self.mode = mode
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.max_moves = max_moves
+        self.evaluate = evaluate
+        self.tt_size = tt_size
+        self.nodes = 0
+
+    def act(self, game, inactive_players=()):
+        """Return the chosen placement ID for game.current_player_index, or None to pass."""
+        move, _ = self.search(game, inactive_players)
+        return move
+
+    def search(self, game, inactive_players=()):
+        """
+        Search from game.current_player_index and return (best move, value).
+        The value is the paranoid score differential, or the max^n value vector
+        (None if the time ran out before depth 1 was searched).
+        `game` itself is not modified.
+        """
+        game = game.copy()
+        self._root = game.current_player_index
+        self._num_players = len(game.players)
+        self._table = get_placement_table(game.board.size)
+        self._tt = {}
+        self._killers = {}
+        self._history = np.zeros(len(self._table))
+        self._deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        self.nodes = 0
+
+        out = frozenset(inactive_players)
+        if self._root in out:
+            return None, None
+        legal = Move_generator(game.board).get_valid_placements(game.players[self._root])
+        if not legal.size:
+            return None, None
+
+        # Played if not even depth 1 finishes in time: passing would put the player out for good
+        best = (self._order(game, self._root, legal, 0, None)[0], None)
+        for depth in range(1, self.max_depth + 1):
+            try:
+                if self.mode == "paranoid":
+                    value, move = self._paranoid(game, depth, self._root, out, -math.inf, math.inf, 0)
+                else:
+                    value, move = self._maxn(game, depth, self._root, out, 0)
+            except _SearchTimeout:
+                break
+            best = (move, value)
+        return best
+
+    # ------------------------------------------------------------------
+    # Paranoid alpha-beta
+    # ------------------------------------------------------------------
+    def _paranoid(self, game, depth, start, out, alpha, beta, ply):
+        self._tick()
+        if depth == 0:
+            return self._differential(self.evaluate(game, out)), None
+        idx, legal, out = self._next_to_move(game, start, out)
+        if idx is None:
+            return self._differential(self.evaluate(game, out)), None
+
+        key = (game.board.hash, idx, out)
+        tt_move = None
+        entry = self._tt.get(key)
+        if entry is not None:
+            entry_depth, entry_value, flag, tt_move = entry
+            if entry_depth >= depth:
+                if flag == TT_EXACT:
+                    return entry_value, tt_move
+                if flag == TT_LOWER:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value, tt_move
+
+        maximizing = idx == self._root
+        alpha_orig, beta_orig = alpha, beta
+        best_value = -math.inf if maximizing else math.inf
+        best_move = None
+        for move in self._order(game, idx, legal, ply, tt_move):
+            record = game.make_move(idx, move)
+            value, _ = self._paranoid(game, depth - 1, (idx + 1) % self._num_players,
+                                      out, alpha, beta, ply + 1)
+            game.unmake_move(record)
+            if maximizing:
+                if value > best_value:
+                    best_value, best_move = value, move
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_move = value, move
+                beta = min(beta, value)
+            if alpha >= beta:
+                self._record_cutoff(move, ply, depth)
+                break
+
+        if best_value <= alpha_orig:
+            flag = TT_UPPER
+        elif best_value >= beta_orig:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        self._store(key, (depth, best_value, flag, best_move))
+        return best_value, best_move
+
+    def _differential(self, values):
+        own = values[self._root]
+        return own - max(v for i, v in enumerate(values) if i != self._root)
+
+    # ------------------------------------------------------------------
+    # Max^n
+    # ------------------------------------------------------------------
+    def _maxn(self, game, depth, start, out, ply):
+        self._tick()
+        if depth == 0:
+            return np.asarray(self.evaluate(game, out), dtype=float), None
+        idx, legal, out = self._next_to_move(game, start, out)
+        if idx is None:
+            return np.asarray(self.evaluate(game, out), dtype=float), None
+
+        key = (game.board.hash, idx, out)
+        tt_move = None
+        entry = self._tt.get(key)
+        if entry is not None:
+            entry_depth, entry_value, _, tt_move = entry
+            if entry_depth >= depth:
+                return entry_value, tt_move
+
+        best_value, best_move = None, None
+        for move in self._order(game, idx, legal, ply, tt_move):
+            record = game.make_move(idx, move)
+            value, _ = self._maxn(game, depth - 1, (idx + 1) % self._num_players, out, ply + 1)
+            game.unmake_move(record)
+            if best_value is None or value[idx] > best_value[idx]:
+                best_value, best_move = value, move
+        # Without bounds on the value sum max^n cannot prune; credit the best move instead
+        self._record_cutoff(best_move, ply, depth)
+        self._store(key, (depth, best_value, TT_EXACT, best_move))
+        return best_value, best_move
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _next_to_move(self, game, start, out):
+        """First player from `start` who can move, its legal placements and the updated out set."""
+        move_gen = Move_generator(game.board)
+        newly_out = []
+        for offset in range(self._num_players):
+            idx = (start + offset) % self._num_players
+            if idx in out:
+                continue
+            legal = move_gen.get_valid_placements(game.players[idx])
+            if legal.size:
+                return idx, legal, out.union(newly_out) if newly_out else out
+            newly_out.append(idx)
+        return None, None, out.union(newly_out)
+
+    def _order(self, game, idx, legal, ply, tt_move):
+        table = self._table
+        others = [j for j in range(self._num_players) if j != idx]
+        opponent_anchors = game.board.anchors[others].any(axis=0).reshape(-1)
+        blocking = (opponent_anchors[table.cells[legal]] & table.cell_mask[legal]).sum(axis=1)
+        order = np.lexsort((-self._history[legal], -blocking, -table.num_cells[legal]))
+        moves = [int(m) for m in legal[order]]
+
+        front = [m for m in (tt_move, *self._killers.get(ply, ())) if m is not None]
+        legal_set = set(moves)
+        front = [m for i, m in enumerate(front) if m in legal_set and m not in front[:i]]
+        if front:
+            moves = front + [m for m in moves if m not in front]
+        if self.max_moves is not None:
+            moves = moves[:max(self.max_moves, len(front))]
+        return moves
+
+    def _record_cutoff(self, move, ply, depth):
+        if move is None:
+            return
+        killers = self._killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self._history[move] += depth * depth
+
+    def _store(self, key, entry):
+        if len(self._tt) >= self.tt_size:
+            self._tt.clear()
+        self._tt[key] = entry
+
+    def _tick(self):
+        self.nodes += 1
+        if (self._deadline is not None and self.nodes % _TIME_CHECK_INTERVAL == 0
+                and time.perf_counter() >= self._deadline):
+            raise _SearchTimeout()
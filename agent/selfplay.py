@@ -0,0 +1,199 @@
+"""
+Self-play on Game directly (no env): agent adapters and a single-game driver.
+
+Every agent exposes act(game, inactive_players) -> placement ID or None
+(pass), like MCTSPlayer/SearchPlayer/EndgameSolver. A game record lists the
+moves in turn order starting with the start player; players that are out are
+skipped, and PASS marks the turn on which a player dropped out.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from agent.endgame import EndgameSolver
+from agent.heuristics import HEURISTIC_POLICIES
+from agent.mcts import MCTSPlayer
+from agent.search import SearchPlayer
+from game.game import Game
+from game.move_generator import Move_generator
+from game.placements import placement_actions
+from game.player import NUM_PIECES
+from game.playout import sample_placement
+from game.records import PASS
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+class RandomAgent:
+    """Uniformly random legal placement."""
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def act(self, game, inactive_players=()):
+        idx = game.current_player_index
+        return sample_placement(game.board, game.players[idx], self.rng)
+
+
+def _env_view(game):
+    """
+    The env's view of the position for the player to move: (observation,
+    action mask, placement_actions result), or None if the player cannot move.
+    """
+    idx = game.current_player_index
+    board = game.board
+    legal = Move_generator(board).get_valid_placements(game.players[idx])
+    if legal.size == 0:
+        return None
+    actions, ids, pivot = placement_actions(legal, board.anchors[idx], board.size)
+    mask = np.zeros(board.size * board.size * NUM_PIECES * 8 + 1, dtype=bool)
+    mask[actions] = True
+    obs = np.where(board.cells == idx, 1, np.where(board.cells >= 0, -1, 0)).astype(np.int8)
+    return {"board": obs, "pieces_mask": game.players[idx].pieces_mask.copy()}, mask, (actions, ids, pivot)
+
+
+def _placement_for_action(action, actions, ids, pivot):
+    # The env plays the placement with the lowest pivot for an action
+    candidates = np.flatnonzero(actions == action)
+    return int(ids[candidates[np.argmin(pivot[candidates])]])
+
+
+class PolicyAgent:
+    """
+    Runs a policy on the env observation and action mask: one from
+    agent.heuristics, a ModulePolicy or an agent.inference_server client.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+
+    def act(self, game, inactive_players=()):
+        view = _env_view(game)
+        if view is None:
+            return None
+        obs, mask, placements = view
+        return _placement_for_action(self.policy.act(obs, mask), *placements)
+
+
+@lru_cache(maxsize=8)
+def _load_module(path):
+    from ray.rllib.core.rl_module.rl_module import RLModule
+
+    module = RLModule.from_checkpoint(path)
+    module.eval()
+    return module
+
+
+class ModulePolicy:
+    """
+    A trained RLlib RLModule (new API stack, torch) behind the heuristic policy
+    interface. `path` is the module directory of an algorithm checkpoint, e.g.
+    <checkpoint>/learner_group/learner/rl_module/shared_policy; modules are
+    cached per process. Plays the most likely valid action, or samples from
+    the masked distribution with sample=True.
+    """
+
+    def __init__(self, path, sample=False, seed=None):
+        self.module = _load_module(path)
+        self.sample = sample
+        self.rng = np.random.default_rng(seed)
+
+    def act(self, obs, action_mask):
+        batch = {key: np.asarray(value)[None] for key, value in obs.items()}
+        return int(self.act_batch(batch, np.asarray(action_mask)[None])[0])
+
+    def act_batch(self, obs, action_masks):
+        import torch
+        from ray.rllib.core.columns import Columns
+
+        masks = np.asarray(action_masks, dtype=bool)
+        inputs = {"board": obs["board"], "pieces_mask": obs["pieces_mask"], "action_mask": masks.astype(np.int8)}
+        batch = {Columns.OBS: {key: torch.from_numpy(np.ascontiguousarray(value)) for key, value in inputs.items()}}
+        with torch.no_grad():
+            logits = self.module.forward_inference(batch)[Columns.ACTION_DIST_INPUTS].numpy()
+        # Modules that do not read the mask from the observation are masked here
+        logits = np.where(masks, logits, -np.inf)
+        if self.sample:
+            logits = logits + self.rng.gumbel(size=logits.shape)
+        return logits.argmax(axis=1)
+
+
+class _EndgameAgent:
+    def __init__(self, seed=None):
+        self.solver = EndgameSolver()
+        self.fallback = RandomAgent(seed)
+
+    def act(self, game, inactive_players=()):
+        if self.solver.applies(game, inactive_players):
+            return self.solver.act(game, inactive_players)
+        return self.fallback.act(game, inactive_players)
+
+
+CHECKPOINT_PREFIX = "checkpoint:"
+
+
+def agent_names():
+    """Names accepted by make_agent, besides "checkpoint:<module path>" (ModulePolicy)."""
+    return ["random", "mcts", "search", "endgame", *HEURISTIC_POLICIES]
+
+
+def make_agent(name, seed=None, mcts_time=None, mcts_iterations=200, search_depth=2):
+    """Build an agent by name (see agent_names)."""
+    if name.startswith(CHECKPOINT_PREFIX):
+        return PolicyAgent(ModulePolicy(name[len(CHECKPOINT_PREFIX):], seed=seed))
+    if name == "random":
+        return RandomAgent(seed)
+    if name == "mcts":
+        return MCTSPlayer(time_budget=mcts_time, max_iterations=mcts_iterations, seed=seed)
+    if name == "search":
+        return SearchPlayer(max_depth=search_depth)
+    if name == "endgame":
+        # Random play until the endgame solver applies
+        return _EndgameAgent(seed)
+    if name in HEURISTIC_POLICIES:
+        return PolicyAgent(HEURISTIC_POLICIES[name](seed))
+    raise ValueError(f"Unknown agent {name!r}; expected one of {agent_names()}")
+
+
+def play_game(agents, start_player=0, board_size=BOARD_SIZE, player_colors=PLAYER_COLORS):
+    """
+    Play one game with agents[i] moving for player i.
+    Returns (placement IDs in turn order with PASS entries, final official scores).
+    """
+    game = Game(board_size=board_size, player_colors=list(player_colors))
+    num_players = len(game.players)
+    game.current_player_index = start_player
+    out = set()
+    moves = []
+    while len(out) < num_players:
+        idx = game.current_player_index
+        if idx not in out:
+            move = agents[idx].act(game, frozenset(out))
+            if move is None:
+                out.add(idx)
+                moves.append(PASS)
+            else:
+                game.make_move(idx, int(move))
+                moves.append(int(move))
+        game.current_player_index = (idx + 1) % num_players
+    return moves, game.scores()
+
+
+def replay_moves(moves, start_player=0, board_size=BOARD_SIZE, player_colors=PLAYER_COLORS):
+    """
+    Yield (game, player index, move) before each recorded move is applied;
+    the game object is updated in place after each yield.
+    """
+    game = Game(board_size=board_size, player_colors=list(player_colors))
+    num_players = len(game.players)
+    idx, out = start_player, set()
+    for move in moves:
+        while idx in out:
+            idx = (idx + 1) % num_players
+        game.current_player_index = idx
+        yield game, idx, int(move)
+        if move == PASS:
+            out.add(idx)
+        else:
+            game.make_move(idx, int(move))
+        idx = (idx + 1) % num_players
+    game.current_player_index = idx
@@ -0,0 +1,145 @@
+import copy
+
+import numpy as np
+import pytest
+from gymnasium import spaces
+from ray.rllib.core.columns import Columns
+from ray.rllib.env.multi_agent_episode import MultiAgentEpisode
+
+from agent.augmentation import SymmetryAugmentation, SymmetryAugmenter
+from env.blokus_env_multi_agent_ray_rllib import BlokusMultiAgentEnv
+from game.symmetry import NUM_SYMMETRIES, get_symmetry_tables
+from global_constants import BOARD_SIZE
+
+
+def test_augmentation_is_consistent_per_sample():
+    tables = get_symmetry_tables(BOARD_SIZE)
+    num_actions = tables.action_map.shape[1]
+    space = spaces.Dict({
+        "board": spaces.Box(low=-1, high=1, shape=(BOARD_SIZE, BOARD_SIZE), dtype=np.int8),
+        "action_mask": spaces.MultiBinary(num_actions),
+        "pieces_mask": spaces.MultiBinary(21),
+    })
+    augmenter = SymmetryAugmenter(space)
+
+    rng = np.random.default_rng(0)
+    batch_size = 6
+    boards = rng.integers(-1, 2, size=(batch_size, BOARD_SIZE, BOARD_SIZE)).astype(np.int8)
+    masks = rng.random((batch_size, num_actions)) < 0.01
+    actions = np.array([rng.choice(np.flatnonzero(m)) for m in masks])
+    pieces = rng.integers(0, 2, size=(batch_size, 21)).astype(np.int8)
+    obs = {"board": boards, "action_mask": masks, "pieces_mask": pieces}
+    logits = rng.normal(size=(batch_size, num_actions))
+
+    out, g = augmenter.augment({"obs": obs, "actions": actions, "action_dist_inputs": logits}, rng)
+    for b in range(batch_size):
+        assert np.array_equal(out["obs"]["board"][b], tables.transform_cells(boards[b], g[b]))
+        assert out["obs"]["action_mask"][b, out["actions"][b]]
+        assert out["action_dist_inputs"][b, out["actions"][b]] == logits[b, actions[b]]
+    assert np.array_equal(out["obs"]["pieces_mask"], pieces)
+
+    # Flattened observations (space key order) transform the same way
+    flat = np.concatenate([masks, boards.reshape(batch_size, -1), pieces], axis=1).astype(np.float32)
+    flat_out = augmenter.observations(flat, g)
+    expected = np.concatenate([out["obs"]["action_mask"], out["obs"]["board"].reshape(batch_size, -1),
+                               pieces], axis=1)
+    assert np.array_equal(flat_out, expected)
+
+
+def _played_episode(env, steps, rng):
+    """MultiAgentEpisode of `steps` random moves with random stored logits, as an env runner records it."""
+    obs, infos = env.reset(seed=0)
+    episode = MultiAgentEpisode(observation_space=env.observation_spaces, action_space=env.action_spaces,
+                                agent_module_ids={agent: "shared_policy" for agent in env.possible_agents})
+    episode.add_env_reset(observations=obs, infos=infos)
+    for _ in range(steps):
+        agent_id = next(iter(obs))
+        action = int(rng.choice(np.flatnonzero(obs[agent_id]["action_mask"])))
+        logits = rng.normal(size=env.action_spaces[agent_id].n).astype(np.float32)
+        obs, rewards, terminateds, truncateds, infos = env.step({agent_id: action})
+        episode.add_env_step(observations=obs, actions={agent_id: action}, rewards=rewards, infos=infos,
+                             terminateds=terminateds, truncateds=truncateds,
+                             extra_model_outputs={agent_id: {Columns.ACTION_DIST_INPUTS: logits,
+                                                             Columns.ACTION_LOGP: np.float32(0.0)}})
+    return episode.to_numpy()
+
+
+class _IndexPolicy:
+    """Not equivariant: masked logits grow with the action index."""
+    framework = None
+
+    def forward_exploration(self, batch):
+        mask = batch[Columns.OBS]["action_mask"]
+        logits = np.where(mask, np.arange(mask.shape[1]) * 1e-4, -1e9).astype(np.float32)
+        return {Columns.ACTION_DIST_INPUTS: logits}
+
+
+def test_ppo_config_augments_training_episodes():
+    from agent.PPO import build_config
+
+    env = BlokusMultiAgentEnv({"mask_in_obs": True})
+    config = build_config()
+    # The multi-agent learner pipeline gets the per-agent spaces
+    env_spaces = spaces.Dict(env.observation_spaces), spaces.Dict(env.action_spaces)
+    pipeline = config.build_learner_connector(*env_spaces)
+    (connector,) = [piece for piece in pipeline.connectors if isinstance(piece, SymmetryAugmentation)]
+    assert pipeline.connectors.index(connector) == 0
+    assert not any(isinstance(piece, SymmetryAugmentation) for piece in
+                   build_config(augment=False).build_learner_connector(*env_spaces).connectors)
+
+    episode = _played_episode(env, 12, np.random.default_rng(0))
+    original = copy.deepcopy(episode)
+    # Arrays another consumer of the episodes may hold
+    held = {agent_id: (sa_episode.get_observations(), sa_episode.get_actions())
+            for agent_id, sa_episode in episode.agent_episodes.items()}
+    policy = _IndexPolicy()
+    connector(rl_module={"shared_policy": policy}, batch={}, episodes=[episode], shared_data={})
+
+    tables = get_symmetry_tables(BOARD_SIZE)
+    used = set()
+    for agent_id, sa_episode in episode.agent_episodes.items():
+        before = original.agent_episodes[agent_id]
+        obs, actions = sa_episode.get_observations(), sa_episode.get_actions()
+        logits = sa_episode.get_extra_model_outputs(Columns.ACTION_DIST_INPUTS)
+        logp = sa_episode.get_extra_model_outputs(Columns.ACTION_LOGP)
+        old_obs, old_actions = before.get_observations(), before.get_actions()
+        symmetries = []
+        for t in range(len(sa_episode)):
+            # The symmetry of the board also maps this step's mask and action
+            (g,) = [g for g in range(NUM_SYMMETRIES)
+                    if np.array_equal(obs["board"][t], tables.transform_cells(old_obs["board"][t], g))
+                    and actions[t] == tables.action_map[g, old_actions[t]]][:1]
+            symmetries.append(g)
+            assert obs["action_mask"][t, actions[t]]
+            assert obs["action_mask"][t].sum() == old_obs["action_mask"][t].sum()
+        used.update(symmetries)
+        # The bootstrap observation gets the symmetry of the last step
+        np.testing.assert_array_equal(obs["board"][-1], tables.transform_cells(old_obs["board"][-1],
+                                                                              symmetries[-1]))
+        # Old-policy outputs are recomputed on the augmented observations
+        expected = policy.forward_exploration({Columns.OBS: {k: v[:-1] for k, v in obs.items()}})
+        np.testing.assert_array_equal(logits, expected[Columns.ACTION_DIST_INPUTS])
+        shifted = logits - logits.max(axis=1, keepdims=True)
+        np.testing.assert_allclose(logp, shifted[np.arange(len(actions)), actions]
+                                   - np.log(np.exp(shifted).sum(axis=1)), rtol=1e-5)
+        np.testing.assert_array_equal(obs["pieces_mask"], old_obs["pieces_mask"])
+        np.testing.assert_array_equal(sa_episode.get_rewards(), before.get_rewards())
+        held_obs, held_actions = held[agent_id]
+        np.testing.assert_array_equal(held_obs["board"], old_obs["board"])
+        np.testing.assert_array_equal(held_actions, old_actions)
+    assert len(used) > 1
+
+
+def test_ppo_trains_with_augmentation():
+    pytest.importorskip("torch")
+    from agent.PPO import build_config
+
+    config = (build_config()
+              .env_runners(num_env_runners=0)
+              .training(train_batch_size=64, minibatch_size=32, num_epochs=1))
+    algo = config.build()
+    try:
+        result = algo.train()
+    finally:
+        algo.stop()
+    assert result["num_env_steps_sampled_lifetime"] >= 64
@@ -0,0 +1,52 @@
+import numpy as np
+
+from game.game import Game
+from game.board import EMPTY
+from game.placements import get_placement_table
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def test_first_move_tracked_per_player():
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    board = game.board
+    red, green = game.players[0], game.players[1]
+
+    assert [p.player_id for p in game.players] == list(range(len(PLAYER_COLORS)))
+    assert board.is_first_move(red) and board.is_first_move(green)
+
+    # Piece 2 (three-cell corner) in the top-left start corner
+    assert board.place_piece(2, [(0, 0), (1, 0), (0, 1)], red)
+    assert not board.is_first_move(red)
+    assert board.is_first_move(green)
+    assert board.placed_cells[red.player_id] == 3
+    assert board.cells[0, 1] == red.player_id
+    assert board.cells[1, 1] == EMPTY
+
+
+def test_validate_many_matches_single_checks():
+    rng = np.random.default_rng(7)
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    board = game.board
+    table = get_placement_table(BOARD_SIZE)
+    all_ids = np.arange(len(table))
+
+    for ply in range(24):
+        player = game.players[ply % len(game.players)]
+        by_id = board.validate_many(player, all_ids)
+        by_coords = board.validate_many(player, table.coords)
+        sample = np.union1d(rng.choice(all_ids, 2000, replace=False), np.flatnonzero(by_id))
+        expected = [
+            board.is_valid_placement(int(table.piece[i]), table.positions(i), player)
+            for i in sample
+        ]
+        assert by_id[sample].tolist() == expected
+        # Coordinate input ignores the inventory
+        assert (by_coords | ~by_id).all()
+
+        legal = np.flatnonzero(by_id)
+        if legal.size:
+            pid = int(rng.choice(legal))
+            assert board.place_piece(int(table.piece[pid]), table.positions(pid), player)
+
+    outside = np.array([[[-1, 0], [0, 0], [0, 0], [0, 0], [0, 0]]])
+    assert not board.validate_many(game.players[0], outside).any()
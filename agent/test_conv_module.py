@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from agent.conv_module import action_gather_index
+from env.blokus_env_multi_agent_ray_rllib import BlokusMultiAgentEnv
+from global_constants import BOARD_SIZE
+
+
+def test_gather_index_follows_action_layout():
+    env = BlokusMultiAgentEnv()
+    index = action_gather_index(BOARD_SIZE)
+    assert len(index) == env.skip_index
+    rng = np.random.default_rng(0)
+    for action in rng.integers(env.skip_index, size=200):
+        x, y, piece, rot, refl = env.all_actions[action]
+        channel = piece * 8 + rot * 2 + refl
+        assert index[action] == (channel * BOARD_SIZE + y) * BOARD_SIZE + x
+    assert len(np.unique(index)) == len(index)
+
+
+def test_env_puts_mask_into_observation():
+    env = BlokusMultiAgentEnv({"mask_in_obs": True})
+    obs, info = env.reset(seed=0)
+    agent_id = next(iter(obs))
+    assert obs[agent_id]["action_mask"] is info[agent_id]["action_mask"]
+    assert env.observation_spaces[agent_id].contains(obs[agent_id])
+    action = int(np.flatnonzero(obs[agent_id]["action_mask"])[0])
+    obs, _, _, _, info = env.step({agent_id: action})
+    agent_id = next(iter(obs))
+    np.testing.assert_array_equal(obs[agent_id]["action_mask"], info[agent_id]["action_mask"])
+
+
+def test_module_masks_and_gathers_logits():
+    torch = pytest.importorskip("torch")
+    from agent.conv_module import BlokusConvRLModule
+    from ray.rllib.core.columns import Columns
+
+    env = BlokusMultiAgentEnv({"mask_in_obs": True})
+    space = env.observation_spaces["player_0"]
+    module = BlokusConvRLModule(observation_space=space, action_space=env.action_spaces["player_0"],
+                                model_config={})
+    assert sum(p.numel() for p in module.parameters()) < 150_000
+
+    obs, _ = env.reset(seed=1)
+    sample = next(iter(obs.values()))
+    batch = {Columns.OBS: {key: torch.as_tensor(value)[None] for key, value in sample.items()}}
+    logits = module.forward_inference(batch)[Columns.ACTION_DIST_INPUTS]
+    assert logits.shape == (1, env.action_space.n)
+    mask = torch.as_tensor(sample["action_mask"])
+    assert torch.all(logits[0, ~mask] < -1e30)
+    assert torch.all(logits[0, mask] > -1e30)
+    assert module.compute_values(batch).shape == (1,)
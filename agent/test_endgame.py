@@ -0,0 +1,70 @@
+import numpy as np
+
+from agent.endgame import EndgameSolver, legal_move_counts
+from game.game import Game
+from game.move_generator import Move_generator
+from game.playout import sample_placement
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def _endgame_position(seed, threshold):
+    rng = np.random.default_rng(seed)
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    out, idx = set(), 0
+    while sum(legal_move_counts(game, out)) >= threshold:
+        move = sample_placement(game.board, game.players[idx], rng)
+        if move is None:
+            out.add(idx)
+        else:
+            game.make_move(idx, move)
+        idx = (idx + 1) % len(game.players)
+        while idx in out and len(out) < len(game.players):
+            idx = (idx + 1) % len(game.players)
+    game.current_player_index = idx
+    return game, out
+
+
+def _minimax(game, start, out, root):
+    num_players = len(game.players)
+    for offset in range(num_players):
+        idx = (start + offset) % num_players
+        if idx in out:
+            continue
+        legal = Move_generator(game.board).get_valid_placements(game.players[idx])
+        if legal.size:
+            break
+        out = out | {idx}
+    else:
+        scores = game.scores()
+        return scores[root] - max(s for i, s in enumerate(scores) if i != root)
+    values = []
+    for move in legal:
+        record = game.make_move(idx, int(move))
+        values.append(_minimax(game, (idx + 1) % num_players, out, root))
+        game.unmake_move(record)
+    return max(values) if idx == root else min(values)
+
+
+def test_endgame_solver_matches_plain_minimax():
+    solver = EndgameSolver(threshold=14)
+    for seed in (0, 1, 2, 5):
+        game, out = _endgame_position(seed, solver.threshold)
+        assert solver.applies(game, out)
+        cells = game.board.cells.copy()
+        move, value = solver.solve(game, out)
+        root = game.current_player_index
+        assert value == _minimax(game.copy(), root, frozenset(out), root)
+        assert move in Move_generator(game.board).get_valid_placements(game.players[root])
+        assert np.array_equal(game.board.cells, cells)
+
+
+def test_memo_tells_apart_monomino_last():
+    solver = EndgameSolver(threshold=14)
+    game, out = _endgame_position(3, solver.threshold)
+    root = game.current_player_index
+    values = []
+    # Same cells, the root has placed everything with or without the monomino last
+    for monomino_last in (True, False):
+        game.players[root].set_pieces(0, last_piece_monomino=monomino_last)
+        values.append(solver.solve(game, out)[1])
+    assert values[0] - values[1] == 5
@@ -1,6 +1,8 @@
 from env.blokus_env_reward_end_game import Blokus_Env_Masked
 from game.game import Game
+from game.move_generator import Move_generator
 import numpy as np
+import pytest
 from numpy import random
 from global_constants import BOARD_SIZE, PLAYER_COLORS
 
@@ -55,6 +57,28 @@ def test_blokus_env_smoke():
     
 
 
+def test_action_masks_match_valid_moves():
+    env = Blokus_Env_Masked(Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS))
+    env.reset(seed=4)
+    rng = np.random.default_rng(4)
+    for _ in range(12):
+        mask = env.action_masks()
+        expected = np.zeros_like(mask)
+        coords = {}
+        for move in Move_generator(env.game.board).get_valid_moves(env.current_player):
+            action = env.all_actions.index(tuple(move[:5]))
+            expected[action] = True
+            coords.setdefault(action, move[5])
+        np.testing.assert_array_equal(mask[:-1], expected[:-1])
+        # step() places the same cells as Move_generator's first valid pivot
+        action = int(rng.choice(np.flatnonzero(mask)))
+        idx = env.game.current_player_index
+        env.step(action)
+        assert all(env.game.board.cells[y, x] == idx for x, y in coords[action])
+    with pytest.raises(ValueError):
+        env.step(int(np.flatnonzero(~env.action_masks()[:-1])[0]))
+
+
 if __name__ == "__main__":
     test_blokus_env_smoke()
     print("Smoke Test passed!")
@@ -0,0 +1,100 @@
+import copy
+
+import numpy as np
+
+from env.blokus_env import BlokusEnv
+from env.blokus_env_masked import Blokus_Env_Masked as TwoPlayerMaskedEnv
+from env.blokus_env_multi_agent_ray_rllib import BlokusMultiAgentEnv
+from env.blokus_env_reward_end_game import Blokus_Env_Masked
+from game.game import Game
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def _rollout(env, obs, info, steps, rng):
+    trace = []
+    for _ in range(steps):
+        agent_id = next(iter(obs))
+        action = int(rng.choice(np.flatnonzero(info[agent_id]["action_mask"])))
+        obs, rewards, terms, _, info = env.step({agent_id: action})
+        trace.append((action, rewards, obs[next(iter(obs))]["board"].tobytes(),
+                      info[next(iter(info))]["action_mask"].tobytes()))
+        if terms["__all__"]:
+            break
+    return trace
+
+
+def test_rllib_env_branches_from_snapshot():
+    env = BlokusMultiAgentEnv()
+    obs, info = env.reset(seed=3)
+    rng = np.random.default_rng(0)
+    _rollout(env, obs, info, 12, rng)
+
+    state = env.get_state()
+    hash_before = env.game.board.hash
+    agent_id = env.possible_agents[env.current_agent_index]
+    obs = {agent_id: env._compute_obs(env.current_agent_index)}
+    info = {agent_id: {"action_mask": env._compute_mask(env.current_agent_index)}}
+    first = _rollout(env, obs, info, 30, np.random.default_rng(1))
+    assert env.game.board.hash != hash_before
+
+    env.set_state(state)
+    assert env.game.board.hash == hash_before == state.position_key
+    second = _rollout(env, obs, info, 30, np.random.default_rng(1))
+    assert first == second
+
+    # Snapshots are immutable
+    assert not state.game.cells.flags.writeable
+
+
+def test_gym_env_snapshot_restores_position():
+    env = Blokus_Env_Masked(Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS))
+    obs, info = env.reset(seed=0)
+    state = env.get_state()
+    action = int(np.flatnonzero(info["action_mask"])[0])
+    env.step(action)
+    assert env.game.board.cells.max() >= 0
+
+    env.set_state(state)
+    np.testing.assert_array_equal(env._get_obs()["board"], obs["board"])
+    np.testing.assert_array_equal(env.get_action_mask(), info["action_mask"])
+    assert env.current_player is env.game.players[state.current_agent_index]
+
+
+def test_two_player_envs_snapshot_restores_position_and_rng():
+    # An unavailable piece makes BlokusEnv play a random fallback move from np_random
+    env = BlokusEnv(Game(board_size=BOARD_SIZE))
+    obs = env.reset(seed=4)
+    state = env.get_state()
+    action = {"x": 0, "y": 0, "piece": 0, "rotation": 0, "reflect": 0}
+    env.current_player.drop_piece(0)
+    first = env.step(action)[0]["board"]
+    env.set_state(state)
+    np.testing.assert_array_equal(env._get_obs()["board"], obs["board"])
+    assert env.current_player.pieces_mask[0] == 1
+    env.current_player.drop_piece(0)
+    np.testing.assert_array_equal(env.step(action)[0]["board"], first)
+
+    env = TwoPlayerMaskedEnv(Game(board_size=BOARD_SIZE))
+    obs, _ = env.reset(seed=0)
+    mask = env.get_action_mask()
+    state = env.get_state()
+    env.step(int(np.flatnonzero(mask)[0]))
+    env.set_state(state)
+    np.testing.assert_array_equal(env._get_obs()["board"], obs["board"])
+    np.testing.assert_array_equal(env.get_action_mask(), mask)
+
+
+def test_snapshot_rng_survives_restores_and_draws():
+    envs = [BlokusMultiAgentEnv(), Blokus_Env_Masked(Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)),
+            BlokusEnv(Game(board_size=BOARD_SIZE)), TwoPlayerMaskedEnv(Game(board_size=BOARD_SIZE))]
+    for env in envs:
+        env.reset(seed=5)
+        state = env.get_state()
+        saved = copy.deepcopy(state.rng_state)
+        env.set_state(state)
+        first = env.np_random.integers(2 ** 62, size=8)
+        env.set_state(state)
+        np.testing.assert_array_equal(env.np_random.integers(2 ** 62, size=8), first)
+        # Drawing from the restored env leaves the snapshot as it was taken
+        assert state.rng_state == saved
+        assert env.get_state().rng_state is not state.rng_state
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from env.blokus_env_multi_agent_ray_rllib import BlokusMultiAgentEnv
+from env.episode_log import FAILED, INCOMPLETE, TERMINATED, main, read_episodes, replay_episode
+
+
+def _play(env, rng, max_steps=None):
+    obs, info = env.reset()
+    steps = 0
+    while max_steps is None or steps < max_steps:
+        agent_id = next(iter(obs))
+        action = int(rng.choice(np.flatnonzero(info[agent_id]["action_mask"])))
+        obs, _, terms, _, info = env.step({agent_id: action})
+        steps += 1
+        if terms["__all__"]:
+            break
+
+
+def test_logged_episodes_replay_and_report_divergence(tmp_path):
+    path = str(tmp_path / "episodes.log")
+    env = BlokusMultiAgentEnv({"episode_log": path, "seed": 5})
+    rng = np.random.default_rng(0)
+    _play(env, rng)
+    _play(env, rng, max_steps=7)
+    env.close()
+
+    episodes = read_episodes(path)
+    assert [e.status for e in episodes] == [TERMINATED, INCOMPLETE]
+    assert len(episodes[1].steps) == 7
+    replay_env = BlokusMultiAgentEnv()
+    for episode in episodes:
+        assert replay_episode(replay_env, episode) is None
+    assert main([path]) == 0
+
+    # Episode seeds come from config["seed"], not from a fixed default
+    assert episodes[0].seed != episodes[1].seed
+    other = BlokusMultiAgentEnv({"seed": 5, "episode_log": str(tmp_path / "other.log")})
+    other.reset()
+    other.close()
+    assert read_episodes(str(tmp_path / "other.log"))[0].seed == episodes[0].seed
+
+    # A tampered reward is reported at its step
+    steps = episodes[0].steps.copy()
+    steps["reward"][3] += 1
+    divergence = replay_episode(replay_env, episodes[0]._replace(steps=steps))
+    assert (divergence.step, divergence.field) == (3, "reward")
+    steps = episodes[0].steps.copy()
+    steps["mask"][10] ^= 1
+    assert replay_episode(replay_env, episodes[0]._replace(steps=steps))[:2] == (10, "mask")
+
+
+def test_invalid_action_is_logged_as_failed_episode(tmp_path):
+    path = str(tmp_path / "episodes.log")
+    env = BlokusMultiAgentEnv({"episode_log": path, "seed": 2})
+    obs, _ = env.reset()
+    agent_id = next(iter(obs))
+    with pytest.raises(ValueError, match="Action-Index"):
+        env.step({agent_id: -3})
+    env.close()
+
+    (episode,) = read_episodes(path)
+    assert episode.status == FAILED
+    assert episode.steps["action"].tolist() == [-3]
+    # The replay raises at the same step, which matches the log
+    assert replay_episode(BlokusMultiAgentEnv(), episode) is None
+
+
+def test_replay_rebuilds_the_logged_env_config(tmp_path):
+    path = str(tmp_path / "episodes.log")
+    env = BlokusMultiAgentEnv({"episode_log": path, "seed": 4, "mask_in_obs": True})
+    _play(env, np.random.default_rng(1), max_steps=5)
+    env.close()
+
+    (episode,) = read_episodes(path)
+    assert episode.env_config == {"mask_in_obs": True, "opening_book": None}
+    assert replay_episode(BlokusMultiAgentEnv({"mask_in_obs": True}), episode) is None
+    # An env with another config is refused instead of diverging at the reset
+    divergence = replay_episode(BlokusMultiAgentEnv(), episode)
+    assert (divergence.step, divergence.field) == (-1, "config")
+    assert main([path]) == 0
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from agent.heuristics import HEURISTIC_POLICIES, HeuristicPolicy, MoveFeatures
+from game.game import Game
+from game.move_generator import Move_generator
+from game.placements import placement_actions
+from game.playout import sample_placement
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+NUM_ACTIONS = BOARD_SIZE * BOARD_SIZE * 21 * 8 + 1
+
+
+def _positions(count, seed=0):
+    """Random positions as (env board obs, action mask, env-resolved placement per action)."""
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+        plies = int(rng.integers(0, 40))
+        for ply in range(plies):
+            idx = ply % len(game.players)
+            move = sample_placement(game.board, game.players[idx], rng)
+            if move is not None:
+                game.make_move(idx, move)
+        idx = plies % len(game.players)
+        cells = game.board.cells
+        board = np.where(cells == idx, 1, np.where(cells >= 0, -1, 0)).astype(np.int8)
+        legal = Move_generator(game.board).get_valid_placements(game.players[idx])
+        actions, ids, pivot = placement_actions(legal, game.board.anchors[idx], BOARD_SIZE)
+        mask = np.zeros(NUM_ACTIONS, dtype=bool)
+        mask[actions] = True
+        mask[-1] = actions.size == 0
+        resolved = {}
+        for k in np.lexsort((pivot, actions)):
+            resolved.setdefault(int(actions[k]), int(ids[k]))
+        yield board, mask, resolved
+
+
+def test_heuristics_pick_valid_actions_in_batches():
+    boards, masks = [], []
+    for board, mask, resolved in _positions(12):
+        features = MoveFeatures(board[None], mask[None])
+        assert [resolved[int(a)] for a in features.actions] == features.placements.tolist()
+        boards.append(board)
+        masks.append(mask)
+    boards, masks = np.array(boards), np.array(masks)
+
+    for cls in HEURISTIC_POLICIES.values():
+        actions = cls(seed=0).act_batch({"board": boards}, masks)
+        assert actions.shape == (len(boards),)
+        assert masks[np.arange(len(boards)), actions].all()
+        assert masks[0, cls(seed=1).act({"board": boards[0]}, masks[0])]
+
+
+def test_policy_without_scores_cannot_be_built():
+    class Unscored(HeuristicPolicy):
+        name = "unscored"
+
+    with pytest.raises(TypeError):
+        Unscored()
+    for policy in HEURISTIC_POLICIES.values():
+        policy(seed=0)
@@ -0,0 +1,68 @@
+import multiprocessing as mp
+from functools import partial
+
+import numpy as np
+import pytest
+
+from agent.heuristics import GreedyLargestPolicy
+from agent.inference_server import InferenceServer
+from agent.selfplay import PolicyAgent, make_agent, play_game
+
+NUM_ACTIONS = 20 * 20 * 21 * 8 + 1
+
+
+class _FirstValidPolicy:
+    def act_batch(self, obs, action_masks):
+        return action_masks.argmax(axis=1)
+
+
+def _request_actions(client, worker, count, results):
+    obs = {"board": np.zeros((20, 20), dtype=np.int8), "pieces_mask": np.ones(21, dtype=np.int8)}
+    for i in range(count):
+        mask = np.zeros(NUM_ACTIONS, dtype=bool)
+        mask[worker * count + i] = True
+        results.put((worker * count + i, client.act(obs, mask)))
+
+
+def test_requests_from_many_processes_are_batched():
+    num_workers, count = 4, 25
+    with InferenceServer(_FirstValidPolicy, num_slots=num_workers, max_delay=0.05) as server:
+        results = mp.Queue()
+        workers = [mp.Process(target=_request_actions, args=(server.client(), w, count, results))
+                   for w in range(num_workers)]
+        for worker in workers:
+            worker.start()
+        answers = [results.get(timeout=30) for _ in range(num_workers * count)]
+        for worker in workers:
+            worker.join()
+        batches, requests = server.stats()
+    # Every worker gets the answer to its own request back
+    assert all(expected == action for expected, action in answers)
+    assert requests == num_workers * count
+    assert batches < requests
+
+
+def test_served_policy_plays_a_game():
+    with InferenceServer(partial(GreedyLargestPolicy, 0), num_slots=1) as server:
+        served = PolicyAgent(server.client())
+        moves, scores = play_game([served, make_agent("random", 1), served, make_agent("random", 2)])
+    assert len(moves) > 40
+
+
+class _FailingPolicy:
+    def act_batch(self, obs, action_masks):
+        raise RuntimeError("forward pass failed")
+
+
+def test_client_fails_when_server_dies():
+    obs = {"board": np.zeros((20, 20), dtype=np.int8), "pieces_mask": np.ones(21, dtype=np.int8)}
+    mask = np.zeros(NUM_ACTIONS, dtype=bool)
+    mask[0] = True
+    with InferenceServer(_FailingPolicy, num_slots=1) as server:
+        with pytest.raises(RuntimeError, match="stopped without answering"):
+            server.client().act(obs, mask)
+
+    with InferenceServer(_FirstValidPolicy, num_slots=1) as server:
+        server._process.kill()
+        with pytest.raises(RuntimeError, match="stopped without answering"):
+            server.client().act(obs, mask)
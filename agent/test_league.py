@@ -0,0 +1,170 @@
+from types import SimpleNamespace
+
+import numpy as np
+from ray.rllib.utils.metrics import ENV_RUNNER_RESULTS
+
+from agent.league import (LEAGUE_METRICS, LEARNER_MODULE, LeagueCallbacks, LeagueManager, LeagueMapping,
+                          SnapshotPool, head_to_head)
+
+
+def test_pool_persists_samples_by_pfsp_and_evicts(tmp_path):
+    pool = SnapshotPool(str(tmp_path), capacity=3, min_games=10)
+    ids = [pool.add({"w": np.full(3, i)}, step=i) for i in range(3)]
+    # The learner beats snapshot 0 and loses to snapshot 1
+    pool.record(ids[0], learner_score=19, games=20)
+    pool.record(ids[1], learner_score=1, games=20)
+    weights = pool.pfsp_weights(ids)
+    assert weights[1] > weights[2] > weights[0]
+    rng = np.random.default_rng(0)
+    draws = [pool.sample(rng)[0] for _ in range(300)]
+    assert draws.count(ids[1]) > draws.count(ids[2]) > draws.count(ids[0])
+
+    # Full pool: the easiest rated snapshot goes first, the newest stays
+    new = pool.add({"w": np.full(3, 3)}, step=3)
+    assert pool.ids() == [ids[1], ids[2], new]
+    assert not (tmp_path / "snapshot_000000.pkl").exists()
+
+    reopened = SnapshotPool(str(tmp_path), capacity=3, min_games=10)
+    assert reopened.ids() == pool.ids()
+    assert reopened.win_rate(ids[1]) == pool.win_rate(ids[1])
+    np.testing.assert_array_equal(reopened.load(new)["w"], np.full(3, 3))
+
+    # Without rated candidates the least recently used snapshot is evicted
+    reopened.load(ids[1])
+    reopened.entries[ids[1]]["games"] = 0
+    assert reopened.evict() == ids[2]
+
+
+def test_mapping_gives_learner_one_seat_per_episode():
+    agents = [f"player_{i}" for i in range(4)]
+    mapping = LeagueMapping(agents, ["league_0", "league_1"], [0.9, 0.1], seed=3)
+    seats = []
+    for key in range(200):
+        assignment = mapping.assignment(key)
+        assert assignment == mapping.assignment(key)
+        assert list(assignment.values()).count(LEARNER_MODULE) == 1
+        seats.append([a for a, m in assignment.items() if m == LEARNER_MODULE][0])
+    assert set(seats) == set(agents)
+    # Before the first snapshot everything is plain self-play
+    assert set(LeagueMapping(agents, [], []).assignment(0).values()) == {LEARNER_MODULE}
+
+
+def test_head_to_head_results_are_credited_to_slot_snapshots(tmp_path):
+    returns = {"player_0": -5.0, "player_1": -12.0, "player_2": -5.0, "player_3": 15.0}
+    modules = {"player_0": LEARNER_MODULE, "player_1": "league_0", "player_2": "league_0",
+               "player_3": "league_1"}
+    results = head_to_head(returns, modules)
+    assert results == {"league_0": (1.5, 2), "league_1": (0.0, 1)}
+
+    manager = LeagueManager(SnapshotPool(str(tmp_path)), num_slots=2)
+    manager.slot_snapshots = [manager.pool.add({}), manager.pool.add({})]
+    manager.record_results({slot: {"score": s, "games": g} for slot, (s, g) in results.items()})
+    assert [manager.pool.entries[i]["games"] for i in manager.slot_snapshots] == [2, 1]
+    mapping = manager.mapping()
+    assert mapping.slots == ["league_0", "league_1"]
+    # Seats are spread evenly over the slots PFSP filled, not weighted a second time
+    seats = [m for key in range(400) for m in mapping.assignment(key).values() if m != LEARNER_MODULE]
+    assert abs(seats.count("league_0") - seats.count("league_1")) < 0.15 * len(seats)
+
+
+class _FakeLearnerGroup:
+    def __init__(self):
+        self.weights = {"w": np.zeros(3)}
+
+    def get_weights(self, module_ids=None):
+        return {module_id: self.weights for module_id in module_ids}
+
+
+class _FakeEnvRunner:
+    def __init__(self):
+        self.config = SimpleNamespace(multi_agent=self.multi_agent)
+        self.mapping = None
+
+    def multi_agent(self, policy_mapping_fn=None):
+        self.mapping = policy_mapping_fn
+
+
+class _FakeAlgorithm:
+    def __init__(self):
+        self.iteration = 0
+        self.learner_group = _FakeLearnerGroup()
+        self.env_runners = [_FakeEnvRunner(), _FakeEnvRunner()]
+        self.env_runner_group = SimpleNamespace(foreach_env_runner=self.foreach_env_runner)
+        self.states = []
+
+    def foreach_env_runner(self, func, local_env_runner=False):
+        assert local_env_runner
+        return [func(env_runner) for env_runner in self.env_runners]
+
+    def get_module(self, module_id):
+        raise AssertionError("snapshots must come from the learner, not the env runner's module")
+
+    def set_state(self, state):
+        self.states.append(state)
+
+
+def test_update_snapshots_learner_and_refills_slots(tmp_path):
+    manager = LeagueManager(SnapshotPool(str(tmp_path)), num_slots=2, snapshot_every=2)
+    algorithm = _FakeAlgorithm()
+    algorithm.iteration = 1
+    result = {}
+    manager.update(algorithm, result)
+
+    # No pool yet: the first iteration always snapshots the learner module
+    (first,) = manager.pool.ids()
+    np.testing.assert_array_equal(manager.pool.load(first)["w"], np.zeros(3))
+    assert manager.slot_snapshots == [first, first]
+    (state,) = algorithm.states
+    slots = state["learner_group"]["learner"]["rl_module"]
+    assert set(slots) == {"league_0", "league_1"}
+    np.testing.assert_array_equal(slots["league_0"]["w"], np.zeros(3))
+    for env_runner in algorithm.env_runners:
+        assert env_runner.mapping.slots == ["league_0", "league_1"]
+    assert result[LEAGUE_METRICS] == {"pool_size": 1, "slots": {"league_0": first, "league_1": first}}
+
+    # Head-to-head results of the iteration go to the snapshots in the slots
+    algorithm.iteration = 2
+    algorithm.learner_group.weights = {"w": np.ones(3)}
+    league = {"league_0": {"score": 3.0, "games": 4}, "league_1": {"score": 1.0, "games": 2}}
+    manager.update(algorithm, {ENV_RUNNER_RESULTS: {LEAGUE_METRICS: league}})
+    assert manager.pool.entries[first]["games"] == 6
+    assert manager.pool.entries[first]["learner_score"] == 4.0
+    second = manager.pool.ids()[-1]
+    np.testing.assert_array_equal(manager.pool.load(second)["w"], np.ones(3))
+    assert len(algorithm.states) == 2
+
+
+class _FakeAgentEpisode:
+    def __init__(self, episode_return):
+        self.episode_return = episode_return
+
+    def get_return(self):
+        return self.episode_return
+
+
+class _FakeMetricsLogger:
+    def __init__(self):
+        self.logged = {}
+
+    def log_value(self, key, value, reduce="mean"):
+        assert reduce == "sum"
+        self.logged[key] = self.logged.get(key, 0) + value
+
+
+def test_episode_end_logs_head_to_head_per_slot():
+    modules = {"player_0": LEARNER_MODULE, "player_1": "league_0", "player_2": "league_0",
+               "player_3": "league_1"}
+
+    def chunk(returns):
+        return SimpleNamespace(agent_episodes={a: _FakeAgentEpisode(r) for a, r in returns.items()},
+                               module_for=modules.get)
+
+    # The returns of earlier chunks of the episode count too
+    earlier = chunk({"player_0": -10.0, "player_1": -2.0, "player_2": -5.0, "player_3": 5.0})
+    last = chunk({"player_0": 5.0, "player_1": -10.0, "player_3": 10.0})
+    logger = _FakeMetricsLogger()
+    LeagueCallbacks().on_episode_end(episode=last, prev_episode_chunks=[earlier], metrics_logger=logger)
+    assert logger.logged == {
+        (LEAGUE_METRICS, "league_0", "score"): 1.5, (LEAGUE_METRICS, "league_0", "games"): 2,
+        (LEAGUE_METRICS, "league_1", "score"): 0.0, (LEAGUE_METRICS, "league_1", "games"): 1,
+    }
@@ -0,0 +1,34 @@
+from agent.mcts import MCTSPlayer
+from game.game import Game
+from game.move_generator import Move_generator
+from game.placements import get_placement_table
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def _play(game, move):
+    table = get_placement_table(game.board.size)
+    player = game.players[game.current_player_index]
+    assert game.board.place_piece(int(table.piece[move]), table.positions(move), player)
+    game.next_turn()
+
+
+def test_mcts_plays_legal_moves_and_reuses_subtree():
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    mcts = MCTSPlayer(time_budget=None, max_iterations=150, seed=0)
+
+    move = mcts.act(game)
+    legal = Move_generator(game.board).get_valid_placements(game.players[0])
+    assert move in legal
+    _play(game, move)
+
+    # The next player answers with a move the tree already contains
+    root = mcts._root
+    reply = max(root.children, key=lambda child: child.visits)
+    _play(game, reply.move)
+    assert mcts._reuse_root(game, ()) is reply
+
+    # The reused node keeps its statistics; its first visit expanded it
+    previous = reply.visits
+    assert previous > 1
+    visits = mcts.search(game)
+    assert sum(visits.values()) == previous + 150 - 1
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from agent.selfplay import make_agent, play_game, replay_moves
+from env.blokus_env_multi_agent_ray_rllib import BlokusMultiAgentEnv
+from game.game import Game
+from game.move_generator import Move_generator
+from game.records import PASS
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def test_notation_round_trip_restores_position():
+    agents = [make_agent("random", 7 + i) for i in range(len(PLAYER_COLORS))]
+    moves, _ = play_game(agents, start_player=2)
+    out = set()
+    for ply, (game, idx, move) in enumerate(replay_moves(moves, 2)):
+        if ply % 5 == 0 or move == PASS:
+            notation = game.to_notation(out)
+            parsed, inactive = Game.from_notation(notation)
+            assert inactive == out
+            assert parsed.to_notation(inactive) == notation
+            assert parsed.current_player_index == idx
+            assert parsed.board.hash == game.board.hash
+            assert parsed.board.grid == game.board.grid
+            assert parsed.board.placed_cells == game.board.placed_cells
+            np.testing.assert_array_equal(parsed.board.cells, game.board.cells)
+            np.testing.assert_array_equal(parsed.board.blocked, game.board.blocked)
+            np.testing.assert_array_equal(parsed.board.anchors, game.board.anchors)
+            for a, b in zip(parsed.players, game.players):
+                assert (a.pieces_bits, a.remaining_squares, a.last_piece_monomino) == \
+                       (b.pieces_bits, b.remaining_squares, b.last_piece_monomino)
+                np.testing.assert_array_equal(a.pieces_mask, b.pieces_mask)
+        if move == PASS:
+            out.add(idx)
+
+
+def test_notation_rejects_bad_input():
+    empty = Game(player_colors=list(PLAYER_COLORS)).to_notation()
+    assert empty == "/".join(["20"] * 20) + " RGYB 1fffff,1fffff,1fffff,1fffff R -"
+    with pytest.raises(ValueError):
+        Game.from_notation(empty.replace("20/", "19/", 1))
+    with pytest.raises(ValueError):
+        # A stone without the matching piece leaving the inventory
+        Game.from_notation("R19" + empty[2:])
+    with pytest.raises(ValueError):
+        Game.from_notation(empty.replace(" R -", " X -"))
+
+
+def test_env_reset_from_position():
+    game = Game(board_size=BOARD_SIZE, player_colors=list(PLAYER_COLORS))
+    game.make_move(0, int(Move_generator(game.board).get_valid_placements(game.players[0])[0]))
+    game.current_player_index = 1
+    env = BlokusMultiAgentEnv()
+    obs, info = env.reset(options={"position": game.to_notation({2})})
+    assert list(obs) == ["player_1"]
+    assert env.inactive_players == {2}
+    assert env.game.board.hash == game.board.hash
+    assert obs["player_1"]["board"][game.board.cells == 0].tolist() == [-1] * int((game.board.cells == 0).sum())
+    assert info["player_1"]["action_mask"][:-1].any()
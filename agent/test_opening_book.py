@@ -0,0 +1,28 @@
+import numpy as np
+
+from env.blokus_env_multi_agent_ray_rllib import BlokusMultiAgentEnv
+from game.opening_book import OpeningBook, build_opening_book
+
+
+def test_opening_book_matches_move_generation(tmp_path):
+    path = tmp_path / "book.bin"
+    assert build_opening_book(str(path), max_plies=1) > 0
+    plain = BlokusMultiAgentEnv()
+    booked = BlokusMultiAgentEnv({"opening_book": str(path)})
+    assert len(booked.opening_book) > 0
+
+    rng = np.random.default_rng(0)
+    obs_a, info_a = plain.reset(seed=0)
+    obs_b, info_b = booked.reset(seed=0)
+    for _ in range(4):
+        agent = next(iter(obs_a))
+        mask = info_a[agent]["action_mask"]
+        assert np.array_equal(mask, info_b[agent]["action_mask"])
+        action = int(rng.choice(np.flatnonzero(mask)))
+        obs_a, _, _, _, info_a = plain.step({agent: action})
+        obs_b, _, _, _, info_b = booked.step({agent: action})
+        assert np.array_equal(plain.game.board.cells, booked.game.board.cells)
+
+    # Deeper positions are not in the book
+    assert booked.opening_book.lookup(booked.game) is None
+    assert OpeningBook(str(path)).max_plies == 1
@@ -0,0 +1,50 @@
+import pytest
+
+from game.piece import ORIENTATIONS, PIECE_ORIENTATIONS, PIECES
+from game.player import Player
+
+
+def test_orientation_table():
+    # The 21 Blokus pieces have 91 distinct fixed orientations
+    assert len(ORIENTATIONS) == 91
+    assert [o.index for o in ORIENTATIONS] == list(range(91))
+    for piece_idx, orientations in enumerate(PIECE_ORIENTATIONS):
+        shapes = {o.shape for o in orientations}
+        assert len(shapes) == len(orientations)
+        for o in orientations:
+            assert o.piece_idx == piece_idx
+            assert min(x for x, _ in o.shape) == 0 and min(y for _, y in o.shape) == 0
+            assert not set(o.edge_offsets) & set(o.shape)
+            assert not set(o.corner_offsets) & set(o.edge_offsets)
+
+
+def test_pieces_are_interned_and_immutable():
+    player = Player("R")
+    first = dict(player.available_pieces())
+    second = dict(player.available_pieces())
+    assert all(first[i] is second[i] is PIECES[i] for i in first)
+    with pytest.raises(AttributeError):
+        PIECES[0].shape = ((0, 0), (1, 0))
+    with pytest.raises(AttributeError):
+        ORIENTATIONS[0].rotation = 1
+
+
+def test_bitmask_inventory_accounting():
+    player = Player("R")
+    assert player.remaining_squares == 89
+    assert player.pieces_mask.sum() == 21
+
+    player.drop_piece(20)
+    player.drop_piece(20)  # dropping twice must not double count
+    assert player.remaining_squares == 84
+    assert not player.has_piece(20) and player.pieces_mask[20] == 0
+    assert not player.last_piece_monomino
+
+    player.drop_piece(0)
+    assert player.last_piece_monomino
+    with pytest.raises(ValueError):
+        player.pieces_mask[1] = 0
+
+    player.reset_pieces()
+    assert player.pieces_bits == (1 << 21) - 1 and player.remaining_squares == 89
+    assert player.pieces_mask.all()
@@ -0,0 +1,29 @@
+import numpy as np
+
+from game.game import Game
+from game.move_generator import Move_generator
+from game.playout import random_playout, run_playouts
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def test_playouts_are_seeded_and_leave_game_untouched():
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+
+    scores = run_playouts(game, num_playouts=5, seed=3)
+    assert scores.shape == (5, len(PLAYER_COLORS))
+    assert np.array_equal(scores, run_playouts(game, num_playouts=5, seed=3))
+    assert (scores <= 20).all() and (scores >= -89).all()
+
+    # The starting position is copied, not played on
+    assert all(game.board.is_first_move(p) for p in game.players)
+    assert (game.board.cells == -1).all()
+
+
+def test_playout_ends_without_legal_moves():
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    rng = np.random.default_rng(0)
+    scores = random_playout(game, rng, weighting="size", copy=False)
+
+    assert scores.tolist() == game.scores()
+    move_gen = Move_generator(game.board)
+    assert all(move_gen.get_valid_placements(p).size == 0 for p in game.players)
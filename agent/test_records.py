@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+
+from agent.selfplay import make_agent, play_game, replay_moves
+from game.records import PASS, GameRecordReader, GameRecordWriter, index_path
+from global_constants import PLAYER_COLORS
+
+
+def test_records_round_trip_and_recover_from_partial_writes(tmp_path):
+    path = str(tmp_path / "games.bin")
+    games = []
+    with GameRecordWriter(path) as writer:
+        for seed in range(3):
+            agents = [make_agent("random", seed * 10 + i) for i in range(len(PLAYER_COLORS))]
+            moves, scores = play_game(agents, start_player=seed)
+            writer.append(moves, seed, seed, scores, PLAYER_COLORS)
+            games.append((moves, scores))
+
+    # An interrupted append: moves without an index entry and half an entry
+    with open(path, "ab") as f:
+        f.write(np.arange(7, dtype="<u2").tobytes())
+    with open(index_path(path), "ab") as f:
+        f.write(b"\x01\x02\x03")
+    with GameRecordWriter(path) as writer:
+        assert len(writer) == 3
+        writer.append([5, PASS], 99, 1, [-1, -2], ["R", "G"], game=42)
+
+    reader = GameRecordReader(path)
+    assert len(reader) == 4
+    for i, (moves, scores) in enumerate(games):
+        record = reader[i]
+        assert record.moves.tolist() == moves
+        assert record.scores == scores and record.seed == i and record.start_player == i
+        for game, _, _ in replay_moves(record.moves, record.start_player):
+            pass
+        assert game.scores() == scores
+    last = reader[3]
+    assert (last.game, last.moves.tolist(), last.colors, last.scores) == (42, [5, PASS], ["R", "G"], [-1, -2])
+
+
+def test_writer_refuses_moves_without_index(tmp_path):
+    path = str(tmp_path / "games.bin")
+    with GameRecordWriter(path) as writer:
+        writer.append([5, PASS], seed=1, start_player=0, scores=[-88, -89], colors=["R", "B"])
+    size = os.path.getsize(path)
+    os.remove(index_path(path))
+    with pytest.raises(ValueError, match="missing"):
+        GameRecordWriter(path)
+    assert os.path.getsize(path) == size
@@ -0,0 +1,53 @@
+import numpy as np
+
+from agent.replay_dataset import ReplayDataset, _env_action
+from env.blokus_env_multi_agent_ray_rllib import BlokusMultiAgentEnv
+from game.records import PASS, GameRecordReader
+
+
+def _play_recorded_games(path, num_games):
+    env = BlokusMultiAgentEnv({"record_path": path})
+    rng = np.random.default_rng(0)
+    for game in range(num_games):
+        obs, info = env.reset(seed=game)
+        while True:
+            agent = next(iter(obs))
+            action = int(rng.choice(np.flatnonzero(info[agent]["action_mask"])))
+            obs, _, terminated, _, info = env.step({agent: action})
+            if terminated["__all__"]:
+                break
+    env.close()
+    return env
+
+
+def test_env_recordings_stream_as_training_batches(tmp_path):
+    path = str(tmp_path / "env{worker}.bin")
+    env = _play_recorded_games(path, 2)
+    path = path.format(worker=0)
+    reader = GameRecordReader(path)
+    assert len(reader) == 2
+    assert reader[1].scores == env.game.scores()
+    assert reader[1].seed == 1
+    plies = sum(int((reader[i].moves != PASS).sum()) for i in range(len(reader)))
+
+    dataset = ReplayDataset(path, batch_size=32, shuffle_buffer=50, seed=0)
+    batches = list(dataset)
+    assert sum(len(b["action"]) for b in batches) == plies
+    # The env only plays placements its actions resolve to
+    assert dataset.skipped == 0
+    for batch in batches:
+        assert batch["action_mask"][np.arange(len(batch["action"])), batch["action"]].all()
+        assert batch["board"].shape[1:] == (20, 20)
+        assert ((batch["outcome"] >= 0) & (batch["outcome"] <= 1)).all()
+
+    parallel = ReplayDataset(path, batch_size=32, num_workers=2, games_per_task=1, seed=0)
+    assert sorted(np.concatenate([b["action"] for b in parallel]).tolist()) == \
+        sorted(np.concatenate([b["action"] for b in batches]).tolist())
+
+
+def test_placement_without_exact_action_is_not_labelled():
+    # Action 5 resolves to placement 10 (lowest pivot), action 7 to placement 12
+    actions, ids, pivot = np.array([5, 5, 7]), np.array([10, 11, 12]), np.array([0, 1, 0])
+    assert _env_action(10, actions, ids, pivot) == 5
+    assert _env_action(12, actions, ids, pivot) == 7
+    assert _env_action(11, actions, ids, pivot) is None
@@ -0,0 +1,26 @@
+from game.game import Game
+from game.scoring import rank_scores
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def test_official_scores_and_bonuses():
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    red, green, yellow, blue = game.players
+
+    for piece_idx in range(21):
+        red.drop_piece(piece_idx)            # monomino (index 0) is not last
+    for piece_idx in reversed(range(21)):
+        green.drop_piece(piece_idx)          # monomino placed last
+    yellow.drop_piece(20)                    # 84 squares left
+
+    assert game.scores() == [15, 20, -84, -89]
+    result = game.result()
+    assert result.ranks == (2, 1, 3, 4)
+    assert result.winner == green.player_id
+
+
+def test_ties_share_rank():
+    result = rank_scores([-3, -3, -10, -3])
+    assert result.ranks == (1, 1, 4, 1)
+    assert result.winners == (0, 1, 3)
+    assert result.winner is None
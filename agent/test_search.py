@@ -0,0 +1,31 @@
+import numpy as np
+
+from agent.search import SearchPlayer
+from game.game import Game
+from game.move_generator import Move_generator
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def test_search_returns_legal_move_and_leaves_game_untouched():
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    cells, hash_before = game.board.cells.copy(), game.board.hash
+    legal = Move_generator(game.board).get_valid_placements(game.players[0])
+
+    for mode in ("paranoid", "maxn"):
+        searcher = SearchPlayer(mode=mode, max_depth=2, max_moves=6)
+        move, value = searcher.search(game)
+        assert move in legal
+        assert value is not None
+        assert np.array_equal(game.board.cells, cells)
+        assert game.board.hash == hash_before
+        assert all(player.pieces_bits == (1 << 21) - 1 for player in game.players)
+
+
+def test_timeout_before_depth_one_still_moves(monkeypatch):
+    monkeypatch.setattr("agent.search._TIME_CHECK_INTERVAL", 1)
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    legal = Move_generator(game.board).get_valid_placements(game.players[0])
+    for mode in ("paranoid", "maxn"):
+        move, value = SearchPlayer(mode=mode, time_budget=0.0, max_moves=None).search(game)
+        assert move in legal
+        assert value is None
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from agent.selfplay import PASS, make_agent, play_game, replay_moves
+from generate_games import main as generate_games, parse_args
+
+
+def test_play_and_replay_game():
+    agents = [make_agent(name, seed) for seed, name in
+              enumerate(["random", "greedy_largest", "random", "corner_maximiser"])]
+    moves, scores = play_game(agents, start_player=2)
+    assert moves.count(PASS) == 4
+
+    # The replay applies every move after yielding it
+    for game, _, _ in replay_moves(moves, start_player=2):
+        pass
+    assert game.scores() == scores
+
+
+def test_generator_streams_and_resumes(tmp_path):
+    path = tmp_path / "games.jsonl"
+    generate_games([str(path), "--games", "3", "--workers", "2", "--seed", "5"])
+    with open(path, "a") as f:
+        f.write('{"game": 7, "trunc')
+    generate_games([str(path), "--games", "5", "--workers", "2", "--seed", "5"])
+    records = [json.loads(line) for line in open(path)]
+    assert sorted(r["game"] for r in records) == [0, 1, 2, 3, 4]
+
+
+def test_generator_accepts_checkpoint_agents():
+    args = parse_args(["games.jsonl", "--agents", "checkpoint:ckpt/module,random,random,mcts"])
+    assert args.agents == ["checkpoint:ckpt/module", "random", "random", "mcts"]
+    assert parse_args(["games.jsonl", "--agents", "checkpoint:ckpt/module"]).agents == ["checkpoint:ckpt/module"] * 4
+    with pytest.raises(SystemExit):
+        parse_args(["games.jsonl", "--agents", "no_such_agent"])
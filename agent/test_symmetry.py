@@ -0,0 +1,49 @@
+import numpy as np
+
+from game.game import Game
+from game.move_generator import Move_generator
+from game.placements import get_placement_table
+from game.playout import sample_placement
+from game.symmetry import NUM_SYMMETRIES, get_symmetry_tables
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def _action_mask(game, idx, num_actions):
+    mask = np.zeros(num_actions, dtype=bool)
+    for x, y, p, rot, refl, _ in Move_generator(game.board).get_valid_moves(game.players[idx]):
+        mask[(((x * BOARD_SIZE + y) * 21 + p) * 4 + rot) * 2 + refl] = True
+    return mask
+
+
+def test_symmetries_map_positions_moves_and_masks():
+    tables = get_symmetry_tables(BOARD_SIZE)
+    table = get_placement_table(BOARD_SIZE)
+    num_actions = tables.action_map.shape[1]
+
+    rng = np.random.default_rng(0)
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    moves = []
+    for ply in range(12):
+        idx = ply % len(game.players)
+        move = sample_placement(game.board, game.players[idx], rng)
+        game.make_move(idx, move)
+        moves.append((idx, move))
+
+    canonical = set()
+    for g in range(NUM_SYMMETRIES):
+        assert np.array_equal(np.sort(tables.action_map[g]), np.arange(num_actions))
+        assert np.array_equal(np.sort(tables.placement_map[g]), np.arange(len(table)))
+
+        image = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+        for idx, move in moves:
+            image.make_move(idx, int(tables.transform_placement(move, g)))
+        assert np.array_equal(image.board.cells, tables.transform_cells(game.board.cells, g))
+        canonical.add(tables.canonical_key(image.board.cells)[0])
+
+        for idx in range(len(game.players)):
+            mask = _action_mask(game, idx, num_actions)
+            assert np.array_equal(tables.transform_action_values(mask, g),
+                                  _action_mask(image, idx, num_actions))
+        back = tables.inverse[g]
+        assert tables.transform_placement(tables.transform_placement(moves[0][1], g), back) == moves[0][1]
+    assert len(canonical) == 1
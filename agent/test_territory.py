@@ -0,0 +1,37 @@
+import numpy as np
+
+from game.game import Game
+from game.move_generator import Move_generator
+from game.placements import get_placement_table
+from game.playout import sample_placement
+from game.territory import TerritoryMap, reachable_cells
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def test_incremental_reach_matches_full_fill_and_covers_legal_moves():
+    table = get_placement_table(BOARD_SIZE)
+    rng = np.random.default_rng(0)
+    game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
+    territory = TerritoryMap(game.board)
+    assert territory.counts().tolist() == [BOARD_SIZE * BOARD_SIZE] * len(game.players)
+
+    out, idx = set(), 0
+    while len(out) < len(game.players):
+        if idx not in out:
+            move = sample_placement(game.board, game.players[idx], rng)
+            if move is None:
+                out.add(idx)
+            else:
+                game.make_move(idx, move)
+                territory.update(table.positions(move), idx)
+                assert np.array_equal(territory.reach, reachable_cells(game.board))
+        idx = (idx + 1) % len(game.players)
+
+        for player in game.players:
+            legal = Move_generator(game.board).get_valid_placements(player)
+            cells = table.cells[legal][table.cell_mask[legal]]
+            assert territory.reach[player.player_id].reshape(-1)[cells].all()
+
+    # Nobody can move at the end, so no anchor is usable
+    assert territory.usable_anchors(game.players).tolist() == [0] * len(game.players)
+    assert territory.contested().sum() <= territory.counts().sum()
@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+import pytest
+
+from agent.ratings import elo_ratings, trueskill_ratings
+from tournament import main as tournament, parse_agent, round_robin_tables, seat_rotations
+
+
+def test_ratings_order_agents_by_strength():
+    rng = np.random.default_rng(0)
+    strength = {"strong": 2.0, "middle": 1.0, "weak": 0.0, "weaker": -1.0, "weakest": -2.0}
+    games = []
+    for _ in range(200):
+        seats = list(rng.choice(list(strength), 4, replace=False))
+        games.append((seats, [round(strength[label] + rng.normal()) for label in seats]))
+    for ratings in (elo_ratings(games, bootstrap=50), trueskill_ratings(games)):
+        ranked = sorted(ratings, key=lambda label: -ratings[label].value)
+        assert ranked == list(strength)
+        for rating in ratings.values():
+            assert rating.low < rating.value < rating.high
+    # Seats of the same agent are not compared with each other
+    one_sided = elo_ratings([(["a", "b", "a", "b"], [10, 5, 10, 5])] * 20, bootstrap=0)
+    assert one_sided["a"].value > 1500 > one_sided["b"].value
+    assert one_sided["a"].games == 20
+
+
+def test_agent_specs_and_seat_rotation():
+    assert parse_agent("mcts:400") == ("mcts:400", "mcts", {"mcts_iterations": 400})
+    assert parse_agent("deep=search:3") == ("deep", "search", {"search_depth": 3})
+    assert parse_agent("ppo=checkpoint:runs/a=b") == ("ppo", "checkpoint:runs/a=b", {})
+    with pytest.raises(ValueError):
+        parse_agent("greedy_largest:2")
+    assert seat_rotations(("a", "b", "a", "b")) == [("a", "b", "a", "b"), ("b", "a", "b", "a")]
+    assert len(seat_rotations(("a", "b", "c", "d"))) == 4
+    assert len(round_robin_tables(list("abcde"))) == 5
+
+
+def test_tournament_resumes(tmp_path):
+    path, ratings = tmp_path / "results.jsonl", tmp_path / "ratings.json"
+    args = [str(path), "--agents", "random,greedy_largest", "--workers", "2", "--bootstrap", "10",
+            "--ratings", str(ratings)]
+    tournament(args)
+    with open(path, "a") as f:
+        f.write('{"game": "[1, ')
+    tournament(args + ["--rounds", "2"])
+    records = [json.loads(line) for line in open(path)]
+    tables = [("random", "greedy_largest") * 2, ("greedy_largest", "random") * 2]
+    assert sorted((r["round"], tuple(r["seats"])) for r in records) == sorted(
+        (r, seats) for r in range(2) for seats in tables)
+    table = json.load(open(ratings))
+    assert table["greedy_largest"]["games"] == table["random"]["games"] == 4
@@ -0,0 +1,13 @@
+import os
+
+import pytest
+
+pytest.importorskip("sb3_contrib")
+
+from agent.train_maskable_ppo import main
+
+
+def test_training_smoke_run_writes_checkpoint(tmp_path):
+    main(["--n-envs", "1", "--total-timesteps", "64", "--n-steps", "32", "--batch-size", "32",
+          "--n-epochs", "1", "--checkpoint-dir", str(tmp_path), "--report-every", "0"])
+    assert os.path.exists(tmp_path / "maskable_ppo_final.zip")
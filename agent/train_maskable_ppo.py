@@ -0,0 +1,120 @@
+"""
+Single-node MaskablePPO training (sb3-contrib) on the Gymnasium env.
+
+One shared policy plays every seat of Blokus_Env_Masked (env.blokus_env_reward_end_game);
+the envs run in SubprocVecEnv worker processes and MaskablePPO reads the valid
+actions through the env's action_masks().
+
+    python -m agent.train_maskable_ppo --n-envs 8 --total-timesteps 2000000
+    python -m agent.train_maskable_ppo --resume checkpoints/maskable_ppo_400000_steps.zip
+"""
+import argparse
+import os
+import time
+
+from sb3_contrib import MaskablePPO
+from stable_baselines3.common.callbacks import BaseCallback, CallbackList, CheckpointCallback
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+from env.blokus_env_reward_end_game import Blokus_Env_Masked
+from game.game import Game
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def make_env():
+    """Env factory for one vector env worker; Monitor records episode returns and lengths."""
+    return Monitor(Blokus_Env_Masked(Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)))
+
+
+class ThroughputCallback(BaseCallback):
+    """Logs env steps/s and finished episodes/s over each reporting interval."""
+
+    def __init__(self, report_every=30.0, verbose=1):
+        super().__init__(verbose)
+        self.report_every = report_every
+        self._last_time = None
+        self._last_steps = 0
+        self._episodes = 0
+
+    def _on_training_start(self):
+        self._last_time = time.perf_counter()
+        self._last_steps = self.num_timesteps
+
+    def _on_step(self):
+        self._episodes += sum(1 for info in self.locals.get("infos", ()) if "episode" in info)
+        now = time.perf_counter()
+        elapsed = now - self._last_time
+        if elapsed >= self.report_every:
+            steps_per_second = (self.num_timesteps - self._last_steps) / elapsed
+            episodes_per_second = self._episodes / elapsed
+            self.logger.record("throughput/env_steps_per_second", steps_per_second)
+            self.logger.record("throughput/episodes_per_second", episodes_per_second)
+            if self.verbose:
+                print(f"{self.num_timesteps} steps, {steps_per_second:.1f} steps/s, "
+                      f"{episodes_per_second:.2f} episodes/s")
+            self._last_time, self._last_steps, self._episodes = now, self.num_timesteps, 0
+        return True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train MaskablePPO on Blokus with SubprocVecEnv")
+    parser.add_argument("--n-envs", type=int, default=os.cpu_count(), help="parallel envs (1 runs in-process)")
+    parser.add_argument("--total-timesteps", type=int, default=1_000_000)
+    parser.add_argument("--n-steps", type=int, default=256, help="rollout steps per env and update")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--n-epochs", type=int, default=4)
+    parser.add_argument("--learning-rate", type=float, default=3e-4)
+    parser.add_argument("--gamma", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--checkpoint-dir", default="checkpoints")
+    parser.add_argument("--checkpoint-every", type=int, default=100_000, help="env steps between checkpoints")
+    parser.add_argument("--report-every", type=float, default=30.0, help="seconds between throughput lines")
+    parser.add_argument("--tensorboard", default=None, help="TensorBoard log directory")
+    parser.add_argument("--resume", default=None, help="checkpoint .zip to continue training from")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    env_fns = [make_env] * args.n_envs
+    # Each worker builds its own env, so the 67k-entry action tables are never pickled
+    vec_env = SubprocVecEnv(env_fns) if args.n_envs > 1 else DummyVecEnv(env_fns)
+    # Env i is reset with seed + i
+    vec_env.seed(args.seed)
+
+    if args.resume:
+        model = MaskablePPO.load(args.resume, env=vec_env, device=args.device,
+                                 tensorboard_log=args.tensorboard)
+    else:
+        model = MaskablePPO(
+            "MultiInputPolicy",
+            vec_env,
+            n_steps=args.n_steps,
+            batch_size=args.batch_size,
+            n_epochs=args.n_epochs,
+            learning_rate=args.learning_rate,
+            gamma=args.gamma,
+            seed=args.seed,
+            device=args.device,
+            tensorboard_log=args.tensorboard,
+            verbose=1,
+        )
+
+    callbacks = CallbackList([
+        # save_freq counts vector env calls, i.e. n_envs env steps each
+        CheckpointCallback(save_freq=max(args.checkpoint_every // args.n_envs, 1),
+                           save_path=args.checkpoint_dir, name_prefix="maskable_ppo"),
+        ThroughputCallback(args.report_every),
+    ])
+    try:
+        model.learn(total_timesteps=args.total_timesteps, callback=callbacks,
+                    reset_num_timesteps=not args.resume)
+    finally:
+        model.save(os.path.join(args.checkpoint_dir, "maskable_ppo_final"))
+        vec_env.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
+import copy
+
 import gymnasium as gym
 from gymnasium import spaces
+from gymnasium.utils import seeding
 import numpy as np
 from game.pieces_definition import PIECES_DEFINITION as ALL_PIECES
 from game.piece import Piece
-from random import choice
 from game.move_generator import Move_generator
+from env.state import EnvState
 from global_constants import BOARD_SIZE
 
 # Reward shaping constants
@@ -38,12 +41,32 @@ class BlokusEnv(gym.Env):
         })
         self.current_player = None
 
-    def reset(self):
+    def reset(self, seed=None):
+        if seed is not None:
+            # Per-env generator, also used for the opponents' random moves
+            self.np_random, _ = seeding.np_random(seed)
         self.game.__init__(board_size=BOARD_SIZE, player_colors=["R", "B"])
         self.current_player = self.game.players[0]
         self.current_player.reset_pieces()
         return self._get_obs()
 
+    def get_state(self) -> EnvState:
+        """Immutable snapshot of the episode state for set_state."""
+        return EnvState(
+            game=self.game.get_state(),
+            inactive_players=frozenset(),
+            current_agent_index=self.game.current_player_index,
+            rng_state=copy.deepcopy(self.np_random.bit_generator.state),
+            position_key=self.game.board.hash,
+        )
+
+    def set_state(self, state: EnvState):
+        """Restore a snapshot from get_state."""
+        self.game.set_state(state.game)
+        self.game.current_player_index = state.current_agent_index
+        self.current_player = self.game.players[state.current_agent_index]
+        self.np_random.bit_generator.state = copy.deepcopy(state.rng_state)
+
     def step(self, action):
         # Initialize
         done = False
@@ -65,7 +88,7 @@ class BlokusEnv(gym.Env):
             # Penalty and fallback
             reward = REWARD_PIECE_NOT_AVAILABLE
             if valid_moves:
-                X, Y, fb_idx, rotations, reflection, fb_coords = choice(valid_moves)
+                X, Y, fb_idx, rotations, reflection, fb_coords = valid_moves[int(self.np_random.integers(len(valid_moves)))]
                 self.game.board.place_piece(fb_idx, fb_coords, self.current_player)
                 self.current_player.drop_piece(fb_idx)
                 reward += REWARD_NO_SUCCESSFUL_MOVES
@@ -80,7 +103,7 @@ class BlokusEnv(gym.Env):
         if (ox, oy) not in valid_origins:
             reward = REWARD_NOT_THE_RIGHT_ORIGIN
             if valid_moves:
-                X, Y, fb_idx, rotations, reflection, fb_coords = choice(valid_moves)
+                X, Y, fb_idx, rotations, reflection, fb_coords = valid_moves[int(self.np_random.integers(len(valid_moves)))]
                 self.game.board.place_piece(fb_idx, fb_coords, self.current_player)
                 self.current_player.drop_piece(fb_idx)
                 reward += REWARD_NO_SUCCESSFUL_MOVES
@@ -103,7 +126,7 @@ class BlokusEnv(gym.Env):
             reward = len(coords)
         else:
             reward = REWARD_NO_SUCCESSFUL_MOVES
-            X, Y, fb_idx, rotations, reflection, fb_coords = choice(valid_moves)
+            X, Y, fb_idx, rotations, reflection, fb_coords = valid_moves[int(self.np_random.integers(len(valid_moves)))]
             self.game.board.place_piece(fb_idx, fb_coords, self.current_player)
             self.current_player.drop_piece(fb_idx)
             # reward remains as fallback penalty
@@ -1,10 +1,12 @@
+import copy
+
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-import random
 
 from game.pieces_definition import PIECES_DEFINITION as ALL_PIECES
 from game.move_generator import Move_generator
+from env.state import EnvState
 from global_constants import BOARD_SIZE, PLAYER_COLORS
 
 
@@ -48,10 +50,8 @@ class Blokus_Env_Masked(gym.Env):
             obs (dict): Initial observation
             info (dict): Empty info dict
         """
-        # Seed randomness for reproducibility
-        if seed is not None:
-            np.random.seed(seed)
-            random.seed(seed)
+        # Seed the per-env generator (self.np_random); the global random modules stay untouched
+        super().reset(seed=seed)
 
         # Reinitialize the game instance
         self.game.__init__(board_size=BOARD_SIZE, player_colors=["X", "O"])
@@ -60,6 +60,23 @@ class Blokus_Env_Masked(gym.Env):
         observation = self._get_obs()
         return observation, {}
 
+    def get_state(self) -> EnvState:
+        """Immutable snapshot of the episode state for set_state."""
+        return EnvState(
+            game=self.game.get_state(),
+            inactive_players=frozenset(),
+            current_agent_index=self.game.current_player_index,
+            rng_state=copy.deepcopy(self.np_random.bit_generator.state),
+            position_key=self.game.board.hash,
+        )
+
+    def set_state(self, state: EnvState):
+        """Restore a snapshot from get_state."""
+        self.game.set_state(state.game)
+        self.game.current_player_index = state.current_agent_index
+        self.current_player = self.game.players[state.current_agent_index]
+        self.np_random.bit_generator.state = copy.deepcopy(state.rng_state)
+
     def step(self, action_idx):
         """
         Execute an action by index, applying action masking.
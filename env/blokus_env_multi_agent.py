@@ -137,15 +137,9 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
 
         # If skip or invalid action, end player's game
         if action_idx == self.skip_index or not mask[action_idx]:
-            # Compute end-of-game reward penalty or bonus
-            remaining = sum(
-                len(ALL_PIECES[i])
-                for i, available in enumerate(current_player.pieces_mask) if available
-            )
-            reward = 15.0 if remaining == 0 else -float(remaining)
-
-            # First time penalty only, subsequent skips yield zero
+            # End-of-game reward (official score), first time only; subsequent skips yield zero
             if player_idx not in self.inactive_players:
+                reward = float(self.game.score(player_idx))
                 self.inactive_players.add(player_idx)
             else:
                 reward = 0.0
@@ -137,13 +137,9 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
         # Wenn der Zug ungültig ist oder gepasst wird
         if action_idx == self.skip_index or not valid_mask[action_idx]:
             reward = 0.0
-            # Nur beim ersten Mal passen gibt es eine Strafe
+            # Nur beim ersten Mal passen gibt es die Endwertung (offizielle Punktzahl)
             if player_idx not in self.inactive_players:
-                remaining = sum(
-                    len(ALL_PIECES[i])
-                    for i, available in enumerate(current_player.pieces_mask) if available
-                )
-                reward = 15.0 if remaining == 0 else -float(remaining)
+                reward = float(self.game.score(player_idx))
                 self.inactive_players.add(player_idx)
 
             terminated = len(self.inactive_players) == self.num_players
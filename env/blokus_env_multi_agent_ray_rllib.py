@@ -7,12 +7,18 @@ from ray.rllib.env.multi_agent_env import MultiAgentEnv
 #Helper
 import numpy as np
 import logging
+import copy
 from typing import Dict, Tuple, Any, Set, Optional, List
 logging.basicConfig(level=logging.INFO)
 
 #Game logic
 from game.move_generator import Move_generator
 from game.game import Game
+from game.opening_book import OpeningBook
+from game.placements import get_placement_table, placement_actions
+from game.records import PASS, GameRecorder, GameRecordWriter
+from env.episode_log import EpisodeLog
+from env.state import EnvState
 
 #Global constants
 from global_constants import PLAYER_COLORS, BOARD_SIZE
@@ -52,10 +58,16 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
         # Discrete–Space deckt 0…N ab
         self.action_space = spaces.Discrete(len(self.all_actions))
         _action_space_all = spaces.Discrete(len(self.all_actions))
-        _observation_space_all = spaces.Dict({
+        # config["mask_in_obs"]: also put the action mask into the observation,
+        # for RLModules that mask their logits themselves (agent.conv_module)
+        self.mask_in_obs = bool((config or {}).get("mask_in_obs", False))
+        obs_spaces = {
             "board": spaces.Box(low=-1, high=1, shape=(BOARD_SIZE, BOARD_SIZE), dtype=np.int8),
             "pieces_mask": spaces.MultiBinary(len(ALL_PIECES))
-        })
+        }
+        if self.mask_in_obs:
+            obs_spaces["action_mask"] = spaces.MultiBinary(len(self.all_actions))
+        _observation_space_all = spaces.Dict(obs_spaces)
         self.action_spaces = {
             agent: _action_space_all
             for agent in self.possible_agents
@@ -74,14 +86,51 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
         # Build mapping from action tuple to index for fast mask computation
         self._action_to_index = {action: idx for idx, action in enumerate(self.all_actions)}
 
-
-    def reset(self, *, seed=421, options=None) -> ResetReturn:
+        # Optional opening book (path in config["opening_book"]) for the first plies
+        book_path = (config or {}).get("opening_book")
+        self.opening_book = OpeningBook(book_path) if book_path else None
+        # Config an env replaying this env's episode log needs (env.episode_log)
+        self.replay_config = {"mask_in_obs": self.mask_in_obs, "opening_book": book_path or None}
+
+        # Optional game recorder (path in config["record_path"]; "{worker}" and
+        # "{vector}" are replaced so every env writes its own file)
+        record_path = (config or {}).get("record_path")
+        self.recorder = None
+        if record_path:
+            record_path = record_path.format(worker=getattr(config, "worker_index", 0),
+                                             vector=getattr(config, "vector_index", 0))
+            self.recorder = GameRecorder(GameRecordWriter(record_path, BOARD_SIZE))
+
+        # Optional per-step episode log for replay checks (env.episode_log),
+        # path in config["episode_log"] with the same placeholders
+        log_path = (config or {}).get("episode_log")
+        self.episode_log = None
+        if log_path:
+            self.episode_log = EpisodeLog(log_path.format(worker=getattr(config, "worker_index", 0),
+                                                          vector=getattr(config, "vector_index", 0)),
+                                          self.replay_config)
+
+        # Episode seeds for reset(seed=None); config["seed"] makes them reproducible per worker
+        base_seed = (config or {}).get("seed")
+        self._episode_seeds = np.random.default_rng(
+            None if base_seed is None else [base_seed, getattr(config, "worker_index", 0),
+                                            getattr(config, "vector_index", 0)])
+        self.np_random = None
+
+
+    def reset(self, *, seed=None, options=None) -> ResetReturn:
         """
         Reset the game to an initial state.
-        Randomly select starting player using the seeded RNG.
+        Randomly select starting player using the seeded RNG. Without a seed,
+        a fresh episode seed is drawn, so every episode can be replayed from
+        the seed it logs.
+        options={"position": notation} starts from a position in Game.to_notation
+        form instead (such games are not recorded).
         Returns initial observations dict for each agent.
         """
-        self.np_random, _ = seeding.np_random(seed)
+        if seed is None:
+            seed = int(self._episode_seeds.integers(2 ** 63))
+        self.np_random, seed = seeding.np_random(seed)
         self.inactive_players.clear()
 
         self.agents = self.possible_agents[:]
@@ -89,16 +138,76 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
         # Choose starting player in a reproducible way
         self.current_agent_index = int(self.np_random.integers(self.num_players))
         self.game.current_player_index = self.current_agent_index
+        position = (options or {}).get("position")
+        if position is not None:
+            game, inactive = Game.from_notation(position)
+            if game.board.size != BOARD_SIZE or len(game.players) != self.num_players:
+                raise ValueError(f"Position must have a {BOARD_SIZE}x{BOARD_SIZE} board "
+                                 f"and {self.num_players} players")
+            self.game = game
+            self.inactive_players.update(inactive)
+            self.current_agent_index = game.current_player_index
+            if self.current_agent_index in self.inactive_players:
+                self._advance_to_next_active()
+            if self.recorder is not None:
+                self.recorder.discard()
+        elif self.recorder is not None:
+            self.recorder.start(seed, self.current_agent_index)
         # Compute and return observations for all agents
         agent_id = self.possible_agents[self.current_agent_index]
         obs_dict  = {agent_id: self._compute_obs(self.current_agent_index)}
         info_dict = {agent_id: {"action_mask": self._compute_mask(self.current_agent_index)}}
+        if self.mask_in_obs:
+            obs_dict[agent_id]["action_mask"] = info_dict[agent_id]["action_mask"]
+        if self.episode_log is not None:
+            self.episode_log.start(seed, position, obs_dict, info_dict)
         return obs_dict, info_dict
 
+    def get_state(self) -> EnvState:
+        """Immutable snapshot of the episode state for set_state."""
+        recorder = self.recorder
+        return EnvState(
+            game=self.game.get_state(),
+            inactive_players=frozenset(self.inactive_players),
+            current_agent_index=self.current_agent_index,
+            rng_state=copy.deepcopy(self.np_random.bit_generator.state),
+            position_key=self.game.board.hash,
+            recorded_moves=tuple(recorder.moves) if recorder is not None and recorder.moves is not None else None,
+        )
+
+    def set_state(self, state: EnvState):
+        """
+        Restore a snapshot from get_state. The env must have been reset once;
+        observations and masks are then computed as usual from the restored state.
+        """
+        self.game.set_state(state.game)
+        self.inactive_players = set(state.inactive_players)
+        self.current_agent_index = state.current_agent_index
+        self.np_random.bit_generator.state = copy.deepcopy(state.rng_state)
+        if self.recorder is not None:
+            self.recorder.moves = None if state.recorded_moves is None else list(state.recorded_moves)
+        if self.episode_log is not None:
+            # A branched episode cannot be replayed from its seed and actions
+            self.episode_log.discard()
+
     def step(self, action_dict: Dict[str, int]) -> StepReturn:
         """
         Führt einen Zeitschritt in der Umgebung aus. Entspricht der Gymnasium-API.
         """
+        if self.episode_log is None:
+            return self._step(action_dict)
+        action = action_dict.get(self.possible_agents[self.current_agent_index])
+        try:
+            obs_dict, reward_dict, term_dict, trunc_dict, info_dict = self._step(action_dict)
+        except Exception:
+            self.episode_log.fail(action)
+            raise
+        self.episode_log.step(action, obs_dict, reward_dict, info_dict)
+        if term_dict["__all__"]:
+            self.episode_log.finish()
+        return obs_dict, reward_dict, term_dict, trunc_dict, info_dict
+
+    def _step(self, action_dict: Dict[str, int]) -> StepReturn:
         cur_idx = self.current_agent_index
         cur_id = self.agents[cur_idx]
         action_idx = action_dict[cur_id]
@@ -116,6 +225,13 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
 
         obs_dict     = { next_id: self._compute_obs(next_idx) }
         info_dict    = { next_id: { "action_mask": self._compute_mask(next_idx) } }
+        if self.mask_in_obs:
+            obs_dict[next_id]["action_mask"] = info_dict[next_id]["action_mask"]
+        if terminated:
+            # Final standings for evaluation tools
+            info_dict[next_id]["game_result"] = self.game.result()._asdict()
+            if self.recorder is not None:
+                self.recorder.finish(self.game.scores(), PLAYER_COLORS)
         reward_dict  = { cur_id: reward }
         term_dict    = { "__all__": terminated }
         trunc_dict   = { "__all__": truncated }
@@ -153,20 +269,28 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
         # Wenn der Zug ungültig ist oder gepasst wird
         if action_idx == self.skip_index or not valid_mask[action_idx]:
             reward = 0.0
-            # Nur beim ersten Mal passen gibt es eine Strafe
+            # Nur beim ersten Mal passen gibt es die Endwertung (offizielle Punktzahl)
             if player_idx not in self.inactive_players:
-                remaining = sum(
-                    len(ALL_PIECES[i])
-                    for i, available in enumerate(current_player.pieces_mask) if available
-                )
-                reward = 15.0 if remaining == 0 else -float(remaining)
+                reward = float(self.game.score(player_idx))
                 self.inactive_players.add(player_idx)
+                if self.recorder is not None:
+                    self.recorder.record(PASS)
 
             terminated = len(self.inactive_players) == self.num_players
             return reward, terminated
 
         # Gültiger Zug
         x, y, p_idx, rot, refl = self.all_actions[action_idx]
+        book_actions = self._book_actions(player_idx)
+        if book_actions is not None:
+            # Wie Move_generator: erste gültige Lage mit dem Ankerfeld als Pivot
+            actions, ids, pivot = book_actions
+            candidates = np.flatnonzero(actions == action_idx)
+            placement_id = ids[candidates[np.argmin(pivot[candidates])]]
+            self.game.make_move(player_idx, int(placement_id))
+            if self.recorder is not None:
+                self.recorder.record(placement_id)
+            return 0.0, False
         raw_valid = Move_generator(self.game.board).get_valid_moves(current_player)
         coords = next(
             coord for vx, vy, pi, r, rf, coord in raw_valid
@@ -174,6 +298,8 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
         )
         self.game.board.place_piece(p_idx, coords, current_player)
         current_player.drop_piece(p_idx)
+        if self.recorder is not None:
+            self.recorder.record(get_placement_table(BOARD_SIZE).find(coords))
 
 
         return 0.0, False
@@ -200,6 +326,12 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
             return mask
         
             
+        book_actions = self._book_actions(player_idx)
+        if book_actions is not None:
+            mask = np.zeros(len(self.all_actions), dtype=bool)
+            mask[book_actions[0]] = True
+            return mask
+
         player = self.game.players[player_idx]
         raw_valid = Move_generator(self.game.board).get_valid_moves(player)
         valid_actions = {(vx, vy, pi, r, rf) for vx, vy, pi, r, rf, _ in raw_valid}
@@ -213,6 +345,18 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
         return mask
 
  
+    def _book_actions(self, player_idx: int):
+        """
+        (actions, placement IDs, pivots) from the opening book for the player
+        to move, or None if there is no book or the position is not in it.
+        """
+        if self.opening_book is None:
+            return None
+        entry = self.opening_book.lookup(self.game, player_idx)
+        if entry is None or len(entry[0]) == 0:
+            return None
+        return placement_actions(entry[0], self.game.board.anchors[player_idx], BOARD_SIZE, len(ALL_PIECES))
+
     def render(self, mode="human"):
         """
         Render the board.
@@ -256,9 +400,12 @@ class BlokusMultiAgentEnv(MultiAgentEnv):
 
     def close(self):
         """
-        Clean up any resources (placeholder).
+        Clean up any resources (closes the game recorder, if any).
         """
-        pass
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.episode_log is not None:
+            self.episode_log.close()
 
 
 
@@ -1,11 +1,14 @@
+import copy
+
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-import random
 
 from game.pieces_definition import PIECES_DEFINITION as ALL_PIECES
 from game.move_generator import Move_generator
 from game.game import Game
+from game.placements import placement_actions
+from env.state import EnvState
 from global_constants import BOARD_SIZE, PLAYER_COLORS
 
 
@@ -21,6 +24,8 @@ class Blokus_Env_Masked(gym.Env):
         self.all_pieces = ALL_PIECES
         self.num_pieces = len(self.all_pieces)
         self.num_players = len(PLAYER_COLORS)
+        # ((board hash, player index), _legal_placements result) of the last position
+        self._mask_cache = None
 
         # build full action list once
         self.all_actions = [
@@ -46,31 +51,44 @@ class Blokus_Env_Masked(gym.Env):
     def reset(self, *, seed=None, options=None):
         # English comment: reset inactive state and re-create game
         self.inactive_players = set()
-        if seed is not None:
-            np.random.seed(seed)
-            random.seed(seed)
+        # Per-env generator (self.np_random); the global random modules stay untouched
+        super().reset(seed=seed)
 
         # re-instantiate Game so everything is clean
         self.game = Game(board_size=BOARD_SIZE, player_colors=PLAYER_COLORS)
         # pick a random starting player
-        self.game.current_player_index = random.randrange(self.num_players)
+        self.game.current_player_index = int(self.np_random.integers(self.num_players))
         self.current_player = self.game.players[self.game.current_player_index]
 
         obs = self._get_obs()
         return obs, {'action_mask': self.get_action_mask()}
 
-    def step(self, action_idx: int):
-        mask = self.get_action_mask()
+    def get_state(self) -> EnvState:
+        """Immutable snapshot of the episode state for set_state."""
+        return EnvState(
+            game=self.game.get_state(),
+            inactive_players=frozenset(self.inactive_players),
+            current_agent_index=self.game.current_player_index,
+            rng_state=copy.deepcopy(self.np_random.bit_generator.state),
+            position_key=self.game.board.hash,
+        )
+
+    def set_state(self, state: EnvState):
+        """Restore a snapshot from get_state."""
+        self.game.set_state(state.game)
+        self.inactive_players = set(state.inactive_players)
+        self.game.current_player_index = state.current_agent_index
+        self.current_player = self.game.players[state.current_agent_index]
+        self.np_random.bit_generator.state = copy.deepcopy(state.rng_state)
 
+    def step(self, action_idx: int):
         # decode action
         action = self.all_actions[action_idx]
 
         # 1) No-Op branch: skip/dropout
         if action is None:
-            # compute end-reward for this player
-            remaining = sum(len(ALL_PIECES[i])
-                            for i, av in enumerate(self.current_player.pieces_mask) if av)
-            reward = 15.0 if remaining == 0 else -1.0 * remaining
+            # end-reward for this player: official score
+            reward = float(self.game.score(self.game.current_player_index))
             # mark dropout und evtl. beenden
             self.inactive_players.add(self.game.current_player_index)
             print(f"Player {self.current_player.color} has no valid moves left. Reward: {reward:.1f}")
@@ -84,14 +102,13 @@ class Blokus_Env_Masked(gym.Env):
 
             return self._get_obs(), reward, done, False, {'action_mask': self.get_action_mask()}
 
-        # 2) normaler Zug
-        x, y, p_idx, rot, refl = action
-        raw_valid = Move_generator(self.game.board).get_valid_moves(self.current_player)
-        coords = next(c for vx, vy, pi, r, rf, c in raw_valid
-                      if (vx, vy, pi, r, rf) == (x, y, p_idx, rot, refl))
-
-        self.game.board.place_piece(p_idx, coords, self.current_player)
-        self.current_player.drop_piece(p_idx)
+        # 2) normaler Zug: like Move_generator, the first valid pivot on the anchor cell
+        _, actions, ids, pivot = self._legal_placements()
+        candidates = np.flatnonzero(actions == action_idx)
+        if candidates.size == 0:
+            raise ValueError(f"Invalid action index: {action_idx}")
+        placement_id = ids[candidates[np.argmin(pivot[candidates])]]
+        self.game.make_move(self.game.current_player_index, int(placement_id))
 
         # kein Zwischenschritt-Reward
         reward = 0.0
@@ -109,20 +126,36 @@ class Blokus_Env_Masked(gym.Env):
                 self.current_player = self.game.players[idx]
                 return
 
+    def _legal_placements(self):
+        """
+        (action mask, actions, placement IDs, pivots) of the player to move.
+        They only depend on the position and the player, so they are cached
+        for the action_masks() call and the step() that follow under MaskablePPO.
+        """
+        key = (self.game.board.hash, self.game.current_player_index)
+        if self._mask_cache is not None and self._mask_cache[0] == key:
+            return self._mask_cache[1]
+
+        board = self.game.board
+        player = self.current_player
+        placements = Move_generator(board).get_valid_placements(player)
+        mask = np.zeros(len(self.all_actions), dtype=bool)
+        actions, ids, pivot = placement_actions(placements, board.anchors[player.player_id],
+                                                BOARD_SIZE, self.num_pieces)
+        if placements.size == 0:
+            # only allow skip if no real moves exist
+            mask[self.skip_index] = True
+        else:
+            mask[actions] = True
+        self._mask_cache = (key, (mask, actions, ids, pivot))
+        return self._mask_cache[1]
+
     def get_action_mask(self) -> np.ndarray:
-        raw_valid = Move_generator(self.game.board).get_valid_moves(self.current_player)
-        valid_keys = {(vx, vy, p, r, rf) for vx, vy, p, r, rf, _ in raw_valid}
+        return self._legal_placements()[0].copy()
 
-        mask = np.zeros(len(self.all_actions), dtype=bool)
-        for idx, action in enumerate(self.all_actions):
-            if action is None:
-                # only allow skip if no real moves exist
-                if not valid_keys:
-                    mask[idx] = True
-            else:
-                if action in valid_keys:
-                    mask[idx] = True
-        return mask
+    def action_masks(self) -> np.ndarray:
+        """Valid actions of the player to move, as expected by sb3-contrib's MaskablePPO."""
+        return self.get_action_mask()
 
 
     def _get_obs(self):
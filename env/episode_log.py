@@ -0,0 +1,246 @@
+"""
+Compact per-step episode logs for deterministic replay.
+
+Every episode is logged with its reset seed, start position (if any) and
+the env config that shapes observations (the env's replay_config, e.g.
+mask_in_obs), then one 20-byte entry per step: the action index and CRC32 digests of the
+resulting observation and action mask plus the reward. Replaying the logged
+actions with the same seed in an env built from the logged config must
+reproduce every digest; replay_episode reports the first step where it does
+not.
+
+    python -m env.episode_log episodes.log               # check every episode
+    python -m env.episode_log episodes.log --episode 17
+
+File layout: 16-byte header, then per episode an EPISODE_HEADER, the position
+notation bytes, the env config as JSON and num_steps STEP_DTYPE entries. An episode is written when
+it ends, fails with an exception in step() or the env is closed.
+"""
+import argparse
+import json
+import struct
+import sys
+import zlib
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+MAGIC = b"BLKEPLOG"
+VERSION = 2
+_HEADER = struct.Struct("<8sII")
+# seed, num_steps, status, reset obs digest, reset mask digest, position length, config length
+EPISODE_HEADER = struct.Struct("<QIBIIHH")
+
+# Episode status
+INCOMPLETE = 0   # env closed mid-episode
+TERMINATED = 1
+FAILED = 2       # the last logged action raised in step()
+
+STEP_DTYPE = np.dtype([
+    # Signed, so an invalid action that made step() raise can be logged as given
+    ("action", "<i4"),
+    ("obs", "<u4"),
+    ("mask", "<u4"),
+    ("reward", "<f8"),
+])
+
+
+def _crc(arrays, crc=0):
+    for array in arrays:
+        crc = zlib.crc32(np.ascontiguousarray(array).tobytes(), crc)
+    return crc
+
+
+def digests(obs_dict, info_dict, reward_dict=None):
+    """(observation digest, action mask digest, summed reward) of one reset/step result."""
+    obs_crc = mask_crc = 0
+    for agent_id in sorted(obs_dict):
+        obs = obs_dict[agent_id]
+        obs_crc = zlib.crc32(agent_id.encode(), obs_crc)
+        obs_crc = _crc((obs[key] for key in sorted(obs)), obs_crc)
+    for agent_id in sorted(info_dict):
+        mask = info_dict[agent_id].get("action_mask")
+        if mask is not None:
+            mask_crc = _crc([mask], zlib.crc32(agent_id.encode(), mask_crc))
+    reward = float(sum(reward_dict.values())) if reward_dict else 0.0
+    return obs_crc, mask_crc, reward
+
+
+class Episode(NamedTuple):
+    seed: int
+    status: int
+    position: Optional[str]
+    env_config: dict
+    reset_obs: int
+    reset_mask: int
+    steps: np.ndarray  # STEP_DTYPE
+
+
+class EpisodeLog:
+    """Collects the running episode in memory and appends it to `path` when it ends."""
+
+    def __init__(self, path, env_config=None):
+        """env_config: JSON-serialisable env config an env replaying the episodes needs"""
+        self.path = path
+        self.env_config = json.dumps(env_config or {}, sort_keys=True).encode()
+        try:
+            with open(path, "rb") as f:
+                _check_header(f, path)
+        except FileNotFoundError:
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, 0))
+        self._file = open(path, "ab")
+        self._episode = None
+
+    def start(self, seed, position, obs_dict, info_dict):
+        """Begin an episode; an unfinished previous one is written as INCOMPLETE."""
+        self.finish(INCOMPLETE)
+        obs_crc, mask_crc, _ = digests(obs_dict, info_dict)
+        self._episode = (int(seed) % 2 ** 64, position or "", obs_crc, mask_crc, [])
+
+    def step(self, action, obs_dict, reward_dict, info_dict):
+        if self._episode is not None:
+            self._episode[4].append((int(action), *digests(obs_dict, info_dict, reward_dict)))
+
+    def fail(self, action):
+        """
+        Log an action whose step() raised and write the episode as FAILED;
+        an action that is not an int32 is logged as -1.
+        """
+        if self._episode is None:
+            return
+        try:
+            action = int(action)
+        except (TypeError, ValueError):
+            action = -1
+        if not -2 ** 31 <= action < 2 ** 31:
+            action = -1
+        self._episode[4].append((action, 0, 0, 0.0))
+        self.finish(FAILED)
+
+    def discard(self):
+        """Drop the running episode without writing it."""
+        self._episode = None
+
+    def finish(self, status=TERMINATED):
+        if self._episode is None:
+            return
+        seed, position, obs_crc, mask_crc, steps = self._episode
+        position = position.encode()
+        self._file.write(EPISODE_HEADER.pack(seed, len(steps), status, obs_crc, mask_crc, len(position),
+                                             len(self.env_config)))
+        self._file.write(position)
+        self._file.write(self.env_config)
+        self._file.write(np.array(steps, dtype=STEP_DTYPE).tobytes())
+        self._file.flush()
+        self._episode = None
+
+    def close(self):
+        self.finish(INCOMPLETE)
+        self._file.close()
+
+
+def _check_header(f, path):
+    found, version, _ = _HEADER.unpack(f.read(_HEADER.size))
+    if found != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not an episode log (version {VERSION})")
+
+
+def read_episodes(path):
+    """All complete episode entries of the log at `path`; a truncated last entry is ignored."""
+    with open(path, "rb") as f:
+        _check_header(f, path)
+        data = f.read()
+    episodes, pos = [], 0
+    while pos + EPISODE_HEADER.size <= len(data):
+        header = EPISODE_HEADER.unpack_from(data, pos)
+        seed, num_steps, status, obs_crc, mask_crc, length, config_length = header
+        pos += EPISODE_HEADER.size
+        steps_at = pos + length + config_length
+        end = steps_at + num_steps * STEP_DTYPE.itemsize
+        if end > len(data):
+            break
+        position = data[pos:pos + length].decode() or None
+        env_config = json.loads(data[pos + length:steps_at])
+        steps = np.frombuffer(data, dtype=STEP_DTYPE, count=num_steps, offset=steps_at)
+        episodes.append(Episode(seed, status, position, env_config, obs_crc, mask_crc, steps))
+        pos = end
+    return episodes
+
+
+class Divergence(NamedTuple):
+    step: int        # -1 for the reset
+    field: str       # "config", "obs", "mask", "reward" or "exception"
+    expected: object
+    actual: object
+
+
+def replay_episode(env, episode):
+    """
+    Re-run `episode` in `env` (a multi-agent env like the one that logged it)
+    and return the first Divergence, or None if every digest matches. An env
+    whose replay_config differs from the logged one is refused up front
+    (Divergence(-1, "config", ...)) instead of diverging at the reset.
+    """
+    env_config = getattr(env, "replay_config", None)
+    if env_config is not None and env_config != episode.env_config:
+        return Divergence(-1, "config", episode.env_config, env_config)
+    options = {"position": episode.position} if episode.position else None
+    obs, info = env.reset(seed=episode.seed, options=options)
+    obs_crc, mask_crc, _ = digests(obs, info)
+    if obs_crc != episode.reset_obs:
+        return Divergence(-1, "obs", episode.reset_obs, obs_crc)
+    if mask_crc != episode.reset_mask:
+        return Divergence(-1, "mask", episode.reset_mask, mask_crc)
+
+    for i, entry in enumerate(episode.steps):
+        failed = episode.status == FAILED and i == len(episode.steps) - 1
+        agent_id = next(iter(obs))
+        try:
+            obs, rewards, _, _, info = env.step({agent_id: int(entry["action"])})
+        except Exception as exc:
+            if failed:
+                return None
+            return Divergence(i, "exception", None, repr(exc))
+        if failed:
+            return Divergence(i, "exception", "exception", None)
+        actual = digests(obs, info, rewards)
+        for field, value in zip(("obs", "mask", "reward"), actual):
+            if value != entry[field]:
+                return Divergence(i, field, entry[field].item(), value)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged episodes and report the first divergence")
+    parser.add_argument("log", help="episode log written via the env's episode_log config")
+    parser.add_argument("--episode", type=int, default=None, help="only this episode (default: all)")
+    args = parser.parse_args(argv)
+
+    from env.blokus_env_multi_agent_ray_rllib import BlokusMultiAgentEnv
+
+    episodes = read_episodes(args.log)
+    indices = range(len(episodes)) if args.episode is None else [args.episode]
+    # One env per logged config
+    envs = {}
+    diverged = 0
+    for i in indices:
+        episode = episodes[i]
+        key = json.dumps(episode.env_config, sort_keys=True)
+        if key not in envs:
+            envs[key] = BlokusMultiAgentEnv(episode.env_config)
+        divergence = replay_episode(envs[key], episode)
+        if divergence is None:
+            print(f"episode {i} (seed {episode.seed}, {len(episode.steps)} steps): ok")
+            continue
+        diverged += 1
+        where = "reset" if divergence.step < 0 else f"step {divergence.step}"
+        print(f"episode {i} (seed {episode.seed}): {divergence.field} diverges at {where}: "
+              f"expected {divergence.expected}, got {divergence.actual}")
+    for env in envs.values():
+        env.close()
+    return 1 if diverged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""
+Snapshots of env state for branching (search in the loop, planners, debugging).
+
+get_state() on an env returns an EnvState; set_state() restores it without
+rebuilding the env or its action tables. Snapshots are immutable and can be
+restored any number of times, also into another instance of the same env class.
+"""
+from typing import NamedTuple, Optional
+
+from game.game import GameState
+
+
+class EnvState(NamedTuple):
+    game: GameState
+    inactive_players: frozenset
+    current_agent_index: int
+    # np_random.bit_generator.state
+    rng_state: dict
+    # Zobrist hash of the board; caches keyed by position (opening book,
+    # transposition tables) stay valid across a restore
+    position_key: int
+    # Moves the game recorder has collected so far (None without recorder)
+    recorded_moves: Optional[tuple] = None
@@ -1,40 +1,84 @@
 import os
+from functools import lru_cache
+
+import numpy as np
 from colorama import init, Fore, Style
 
+from global_constants import PLAYER_COLORS
+from game.placements import get_placement_table
+
 # Initialisiere colorama (macht Windows-kompatible ANSI-Ausgabe)
 init(autoreset=True)
+
+# Value of an unoccupied cell in Board.cells
+EMPTY = -1
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size, num_players):
+    """Fixed 64-bit Zobrist keys, keys[player_id][y * size + x], identical in every process."""
+    rng = np.random.default_rng(size * 1009 + num_players)
+    keys = rng.integers(1, 2 ** 63, size=(num_players, size * size), dtype=np.int64)
+    return tuple(tuple(int(k) for k in row) for row in keys)
+
+
 class Board:
-    def __init__(self, size=20):
+    def __init__(self, size=20, num_players=len(PLAYER_COLORS)):
         self.size = size
+        self.num_players = num_players
         self.grid = [[None for _ in range(size)] for _ in range(size)]
+        # Numeric mirror of the grid: player_id of the owner, EMPTY for free cells
+        self.cells = np.full((size, size), EMPTY, dtype=np.int8)
+        # Number of cells each player (by player_id) has covered so far
+        self.placed_cells = [0] * num_players
+        # Zobrist hash of the occupied cells; a player's stones never touch by edge,
+        # so the cells also determine every inventory
+        self.hash = 0
+
+        # Per-player planes, maintained incrementally by place_piece:
+        # blocked: occupied or sharing an edge with the player's own stones
+        # anchors: free cells a new piece may be attached to (diagonal contact,
+        #          or the start corners before the player's first move)
+        self.blocked = np.zeros((num_players, size, size), dtype=bool)
+        self.anchors = np.zeros((num_players, size, size), dtype=bool)
+        last = size - 1
+        for x, y in [(0, 0), (0, last), (last, 0), (last, last)]:
+            self.anchors[:, y, x] = True
+
+    def copy(self):
+        """Return an independent copy of the board and its planes."""
+        clone = Board.__new__(Board)
+        clone.size = self.size
+        clone.num_players = self.num_players
+        clone.grid = [row[:] for row in self.grid]
+        clone.cells = self.cells.copy()
+        clone.placed_cells = self.placed_cells[:]
+        clone.hash = self.hash
+        clone.blocked = self.blocked.copy()
+        clone.anchors = self.anchors.copy()
+        return clone
 
     def in_bounds(self, pos):
         x, y = pos
         return 0 <= x < self.size and 0 <= y < self.size
 
     def is_candidate_placement(self, positions, player):
-        # Check that all positions are within the board and empty
-        for pos in positions:
-            if not self.in_bounds(pos) or not self.is_empty(pos):
-                return False
-
-        # Additional rule checks:
-        if self.is_first_move(player):
-            # On the first move, at least one of the positions must be in one of the allowed corners.
-            allowed_starts = [
-                (0, 0),
-                (0, self.size - 1),
-                (self.size - 1, 0),
-                (self.size - 1, self.size - 1)
-            ]
-            return any(pos in allowed_starts for pos in positions)
-        else:
-            # For subsequent moves: must touch one of your own pieces by corner, but not by edge.
-            if not self.has_corner_contact(positions, player.color):
-                return False
-            if self.has_edge_contact(positions, player.color):
+        """
+        Checks the placement rules without looking at the player's inventory:
+        all cells on the board and free of own edge contact, and at least one
+        cell on an anchor (a start corner for the first move, otherwise a
+        diagonal contact to an own piece).
+        """
+        blocked = self.blocked[player.player_id]
+        anchors = self.anchors[player.player_id]
+        size = self.size
+        touches_anchor = False
+        for x, y in positions:
+            if not (0 <= x < size and 0 <= y < size) or blocked[y, x]:
                 return False
-            return True
+            if anchors[y, x]:
+                touches_anchor = True
+        return touches_anchor
 
     def is_empty(self, pos):
         x, y = pos
@@ -42,11 +86,7 @@ class Board:
 
     def is_first_move(self, player):
         """Checks whether the player has not made any move yet."""
-        for row in self.grid:
-            for cell in row:
-                if cell == player.color:
-                    return False
-        return True
+        return self.placed_cells[player.player_id] == 0
 
     def has_corner_contact(self, positions, player_color):
         """Checks if at least one corner of the piece touches an existing piece of the same color."""
@@ -79,33 +119,43 @@ class Board:
     def is_valid_placement(self, piece_num, positions, player):
 
         # 1. Has the player still piece
-        if player.pieces_mask[piece_num] == 0:
+        if not player.has_piece(piece_num):
             return False
 
-        # First: all cells must be within the board and empty
-        for pos in positions:
-            if not self.in_bounds(pos) or not self.is_empty(pos):
-                return False
-
-        # Special check for the first move: the piece must cover one of the defined start corners.
-        if self.is_first_move(player):
-            start_corners = [
-                (0, 0),
-                (0, self.size - 1),
-                (self.size - 1, 0),
-                (self.size - 1, self.size - 1)
-            ]
-            return any(corner in positions for corner in start_corners)
+        # 2. Board rules: inside, free, no own edge contact, touching an anchor
+        return self.is_candidate_placement(positions, player)
 
-        # For subsequent moves: must have at least one corner contact...
-        if not self.has_corner_contact(positions, player.color):
-            return False
+    def validate_many(self, player, placements):
+        """
+        Vectorized validity check for many placements of one player.
+        placements: either a 1-D array of placement IDs (see game.placements),
+                    which also checks the player's inventory, or a (K, n, 2)
+                    array of (x, y) coordinates (pieces with fewer than n cells
+                    repeat one of their cells), which checks board rules only.
+        Returns a boolean vector of length K.
+        """
+        placements = np.asarray(placements)
+        blocked = self.blocked[player.player_id].reshape(-1)
+        anchors = self.anchors[player.player_id].reshape(-1)
 
-        # ... and must not have any edge contact.
-        if self.has_edge_contact(positions, player.color):
-            return False
+        if placements.ndim == 1:
+            table = get_placement_table(self.size)
+            valid = player.pieces_mask[table.piece[placements]].astype(bool)
+            # Only gather the board for placements of pieces still in the inventory
+            candidates = placements[valid]
+            cells = table.cells[candidates]
+            valid[valid] = ~blocked[cells].any(axis=1) & anchors[cells].any(axis=1)
+            return valid
+        elif placements.ndim == 3 and placements.shape[2] == 2:
+            x = placements[..., 0]
+            y = placements[..., 1]
+            inside = (x >= 0) & (x < self.size) & (y >= 0) & (y < self.size)
+            cells = np.where(inside, y * self.size + x, 0)
+            valid = inside.all(axis=1)
+        else:
+            raise ValueError(f"Expected placement IDs or a (K, n, 2) coordinate array, got shape {placements.shape}")
 
-        return True
+        return valid & ~blocked[cells].any(axis=1) & anchors[cells].any(axis=1)
 
     def place_piece(self, piece_num, positions, player):
         """Attempts to place a piece. If successful,remove piece from players pieces, updates the board."""
@@ -113,11 +163,91 @@ class Board:
         if not self.is_valid_placement(piece_num, positions, player):
             return False
         else:
-            player.pieces_mask[piece_num] = 0
+            player.drop_piece(piece_num)
+            keys = zobrist_keys(self.size, self.num_players)[player.player_id]
             for x, y in positions:
                 self.grid[y][x] = player.color
+                self.cells[y, x] = player.player_id
+                self.hash ^= keys[y * self.size + x]
+            self._update_planes(positions, player.player_id)
+            self.placed_cells[player.player_id] += len(positions)
             return True
 
+    def remove_piece(self, positions, player, planes):
+        """
+        Undo a place_piece of `positions` by `player`. `planes` is the
+        (blocked, anchors) pair of copies taken before the placement; the
+        player's inventory is restored separately (see Game.unmake_move).
+        """
+        keys = zobrist_keys(self.size, self.num_players)[player.player_id]
+        for x, y in positions:
+            self.grid[y][x] = None
+            self.cells[y, x] = EMPTY
+            self.hash ^= keys[y * self.size + x]
+        self.placed_cells[player.player_id] -= len(positions)
+        self.blocked, self.anchors = planes
+
+    def set_cells(self, cells, colors):
+        """
+        Replace the position by `cells` (player_id per cell, EMPTY for free
+        cells) and rebuild the grid, hash, cell counts and planes from scratch.
+        colors[player_id] is the grid symbol of each player.
+        """
+        cells = np.asarray(cells, dtype=np.int8)
+        if cells.shape != (self.size, self.size):
+            raise ValueError(f"Expected a {self.size}x{self.size} cell array, got {cells.shape}")
+        size = self.size
+        keys = zobrist_keys(size, self.num_players)
+        self.cells = cells.copy()
+        self.grid = [[None if c == EMPTY else colors[c] for c in row] for row in cells.tolist()]
+        self.hash = 0
+        for y, x in zip(*np.nonzero(cells != EMPTY)):
+            self.hash ^= keys[cells[y, x]][y * size + x]
+
+        occupied = cells != EMPTY
+        last = size - 1
+        corner_ys, corner_xs = [0, last, 0, last], [0, 0, last, last]
+        self.blocked[:] = occupied
+        self.anchors[:] = False
+        for pid in range(self.num_players):
+            own = np.pad(cells == pid, 1)
+            self.placed_cells[pid] = int(own.sum())
+            if not self.placed_cells[pid]:
+                self.anchors[pid, corner_ys, corner_xs] = ~occupied[corner_ys, corner_xs]
+                continue
+            edges = own[:-2, 1:-1] | own[2:, 1:-1] | own[1:-1, :-2] | own[1:-1, 2:]
+            diagonals = own[:-2, :-2] | own[:-2, 2:] | own[2:, :-2] | own[2:, 2:]
+            self.blocked[pid] |= edges
+            self.anchors[pid] = diagonals & ~self.blocked[pid]
+
+    def _update_planes(self, positions, player_id):
+        """Incrementally update the blocked/anchor planes after player_id covered positions."""
+        xs = [x for x, _ in positions]
+        ys = [y for _, y in positions]
+        # Covered cells are blocked for everybody
+        self.blocked[:, ys, xs] = True
+        self.anchors[:, ys, xs] = False
+
+        blocked = self.blocked[player_id]
+        anchors = self.anchors[player_id]
+        if self.placed_cells[player_id] == 0:
+            # The start corners stop being anchors after the first move
+            anchors[:] = False
+        covered = set(positions)
+        size = self.size
+        edges = set()
+        for x, y in positions:
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < size and 0 <= ny < size and (nx, ny) not in covered:
+                    edges.add((nx, ny))
+        for x, y in edges:
+            blocked[y, x] = True
+            anchors[y, x] = False
+        for x, y in positions:
+            for nx, ny in ((x - 1, y - 1), (x - 1, y + 1), (x + 1, y - 1), (x + 1, y + 1)):
+                if 0 <= nx < size and 0 <= ny < size and not blocked[ny, nx]:
+                    anchors[ny, nx] = True
+
     def display(self):
         """Print current board with ANSI colors."""
         color_map = {
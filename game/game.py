@@ -1,21 +1,199 @@
-from game.player import Player
-from game.board import Board
+import re
+from typing import NamedTuple
+
+import numpy as np
+
+from game.player import Player, TOTAL_SQUARES
+from game.board import Board, EMPTY
+from game.placements import get_placement_table
+from game.scoring import player_score, rank_scores
+
+# One token of a notation row: a run of empty cells or a single stone
+_ROW_TOKEN = re.compile(r"[1-9][0-9]*|[A-Za-z]")
+
+
+class GameState(NamedTuple):
+    """Immutable snapshot of a Game (see Game.get_state); the arrays are read-only copies."""
+    cells: np.ndarray
+    blocked: np.ndarray
+    anchors: np.ndarray
+    grid: tuple
+    placed_cells: tuple
+    hash: int
+    inventories: tuple
+    current_player_index: int
+
+
+def _frozen(array):
+    array = array.copy()
+    array.flags.writeable = False
+    return array
+
 
 class Game:
     def __init__(self, board_size=20, player_colors=["R", "B", "G", "Y"]):
-        self.board = Board(board_size)
-        # Create player objects based on the defined colors.
-        self.players = [Player(color) for color in player_colors]
+        self.board = Board(board_size, num_players=len(player_colors))
+        # Create player objects based on the defined colors; the list index is the player_id.
+        self.players = [Player(color, player_id) for player_id, color in enumerate(player_colors)]
         self.current_player_index = 0
         self.current_player = self.players[self.current_player_index]
 
+    def copy(self):
+        """Return an independent copy of the game (board, players, turn)."""
+        clone = Game.__new__(Game)
+        clone.board = self.board.copy()
+        clone.players = [player.copy() for player in self.players]
+        clone.current_player_index = self.current_player_index
+        clone.current_player = clone.players[self.current_player_index]
+        return clone
+
+    def get_state(self):
+        """Snapshot of the position for set_state; much cheaper than copy() to take and restore."""
+        board = self.board
+        return GameState(
+            cells=_frozen(board.cells),
+            blocked=_frozen(board.blocked),
+            anchors=_frozen(board.anchors),
+            grid=tuple(map(tuple, board.grid)),
+            placed_cells=tuple(board.placed_cells),
+            hash=board.hash,
+            inventories=tuple(player.inventory() for player in self.players),
+            current_player_index=self.current_player_index,
+        )
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state (of a game with the same size and players)."""
+        board = self.board
+        np.copyto(board.cells, state.cells)
+        np.copyto(board.blocked, state.blocked)
+        np.copyto(board.anchors, state.anchors)
+        board.grid = [list(row) for row in state.grid]
+        board.placed_cells = list(state.placed_cells)
+        board.hash = state.hash
+        for player, inventory in zip(self.players, state.inventories):
+            player.set_inventory(inventory)
+        self.current_player_index = state.current_player_index
+        self.current_player = self.players[state.current_player_index]
+
+    def to_notation(self, inactive_players=()):
+        """
+        Compact text form of the position, FEN-like, with five space separated fields:
+        - grid rows from y = 0 joined by "/"; a number is a run of empty cells,
+          a letter a stone of the player with that color
+        - player colors in player_id order, e.g. "RGYB"
+        - inventories in player_id order as hex pieces_bits, comma separated;
+          a trailing "*" marks last_piece_monomino
+        - color of the player to move
+        - colors of the inactive players, or "-"
+        """
+        colors = [player.color for player in self.players]
+        rows = []
+        for row in self.board.cells.tolist():
+            tokens, empty = [], 0
+            for owner in row:
+                if owner == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    tokens.append(str(empty))
+                    empty = 0
+                tokens.append(colors[owner])
+            if empty:
+                tokens.append(str(empty))
+            rows.append("".join(tokens))
+        inventories = ",".join(f"{player.pieces_bits:x}{'*' if player.last_piece_monomino else ''}"
+                               for player in self.players)
+        inactive = "".join(colors[i] for i in sorted(inactive_players)) or "-"
+        return " ".join(["/".join(rows), "".join(colors), inventories,
+                         colors[self.current_player_index], inactive])
+
+    @classmethod
+    def from_notation(cls, notation):
+        """
+        Build a game from to_notation output.
+        Returns (game, frozenset of inactive player indices).
+        Raises ValueError for malformed or inconsistent notation.
+        """
+        fields = notation.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 fields in position notation, got {len(fields)}")
+        grid, colors, inventories, to_move, inactive = fields
+        if len(set(colors)) != len(colors) or not colors.isalpha():
+            raise ValueError(f"Invalid player colors {colors!r}")
+        owner = {color: player_id for player_id, color in enumerate(colors)}
+
+        rows = grid.split("/")
+        size = len(rows)
+        cells = np.full((size, size), EMPTY, dtype=np.int8)
+        for y, row in enumerate(rows):
+            x = 0
+            for token in _ROW_TOKEN.findall(row):
+                if token.isdigit():
+                    x += int(token)
+                    continue
+                if token not in owner or x >= size:
+                    raise ValueError(f"Invalid row {y}: {row!r}")
+                cells[y, x] = owner[token]
+                x += 1
+            if x != size or sum(map(len, _ROW_TOKEN.findall(row))) != len(row):
+                raise ValueError(f"Invalid row {y}: {row!r}")
+
+        game = cls(board_size=size, player_colors=list(colors))
+        inventories = inventories.split(",")
+        if len(inventories) != len(colors):
+            raise ValueError(f"Expected {len(colors)} inventories, got {len(inventories)}")
+        for player, inventory in zip(game.players, inventories):
+            monomino_last = inventory.endswith("*")
+            try:
+                bits = int(inventory.rstrip("*"), 16)
+            except ValueError:
+                raise ValueError(f"Invalid inventory {inventory!r}") from None
+            player.set_pieces(bits, monomino_last)
+        game.board.set_cells(cells, colors)
+        for player in game.players:
+            if TOTAL_SQUARES - player.remaining_squares != game.board.placed_cells[player.player_id]:
+                raise ValueError(f"Inventory of player {player.color} does not match its stones")
+
+        if to_move not in owner:
+            raise ValueError(f"Unknown player to move {to_move!r}")
+        game.current_player_index = owner[to_move]
+        game.current_player = game.players[game.current_player_index]
+        if inactive == "-":
+            inactive = ""
+        if any(color not in owner for color in inactive):
+            raise ValueError(f"Invalid inactive players {inactive!r}")
+        return game, frozenset(owner[color] for color in inactive)
+
+    def make_move(self, player_idx, placement_id):
+        """
+        Place the piece given by placement_id (see game.placements) for player_idx
+        in place and return an undo record for unmake_move.
+        Raises ValueError if the placement is not valid.
+        """
+        table = get_placement_table(self.board.size)
+        player = self.players[player_idx]
+        piece_idx = int(table.piece[placement_id])
+        positions = table.positions(placement_id)
+        record = (player_idx, piece_idx, positions, player.last_piece_monomino,
+                  (self.board.blocked.copy(), self.board.anchors.copy()))
+        if not self.board.place_piece(piece_idx, positions, player):
+            raise ValueError(f"Placement {placement_id} is not valid for player {player_idx}")
+        return record
+
+    def unmake_move(self, record):
+        """Take back a move made with make_move (records must be undone in reverse order)."""
+        player_idx, piece_idx, positions, last_piece_monomino, planes = record
+        player = self.players[player_idx]
+        self.board.remove_piece(positions, player, planes)
+        player.restore_piece(piece_idx, last_piece_monomino)
+
     def play_turn(self):
         current_player = self.players[self.current_player_index]
         print(f"Player {current_player.color}’s turn.")
 
         # Normally here would be input (e.g., via console or GUI)
         # For this example, simply take the first available piece.
-        if not current_player.pieces_mask:
+        if not current_player.pieces_bits:
             print(f"Player {current_player.color} has no pieces left!")
             self.next_turn()
             return
@@ -38,3 +216,15 @@ class Game:
 
     def get_board(self):
         return self.board.grid
+
+    def score(self, player_idx):
+        """Official score of one player (remaining squares and bonuses)."""
+        return player_score(self.players[player_idx])
+
+    def scores(self):
+        """Official scores of all players, indexed by player_id."""
+        return [player_score(player) for player in self.players]
+
+    def result(self):
+        """Current standings as a GameResult (scores, ranks, winners)."""
+        return rank_scores(self.scores())
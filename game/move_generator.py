@@ -1,4 +1,12 @@
-from game.piece import Piece
+import numpy as np
+
+from game.piece import PIECES, PIECE_ORIENTATIONS, unique_orientations
+from game.placements import get_placement_table
+
+# Interned orientations keyed by the shape of the corresponding entry in PIECES
+_ORIENTATIONS_BY_SHAPE = {
+    piece.shape: orientations for piece, orientations in zip(PIECES, PIECE_ORIENTATIONS)
+}
 
 # In move_generator.py
 class Move_generator:
@@ -17,28 +25,14 @@ class Move_generator:
         """
         Generate all unique rotations and reflections of a piece.
         Returns:
-             a list of Piece objects with distinct normalized shapes.
-             reflection_flag
-             rotation amount
+             a list of [Orientation, rotation amount, reflection_flag] entries with
+             distinct normalized shapes (each Orientation exposes `.shape`).
+        Known pieces are served from the interned table in game.piece.
         """
-        transformations = []
-        seen = set()
-        for reflect_flag in range(2):
-            for rotations in range(4):
-                # Copy the original shape
-                temp_piece = Piece(list(piece.shape))
-                piece_shape = temp_piece.get_positions((5,5),rotations, reflect_flag)
-                # Normalize and sort shape for canonical representation
-                norm_shape = self.normalize_shape(piece_shape)
-                canon_shape = tuple(sorted(norm_shape))
-                if canon_shape not in seen:
-                    seen.add(canon_shape)
-                    transformations.append([
-                        Piece(list(canon_shape)),
-                        rotations,
-                        reflect_flag
-                    ])
-        return transformations
+        orientations = _ORIENTATIONS_BY_SHAPE.get(tuple(piece.shape))
+        if orientations is None:
+            orientations = unique_orientations(piece.shape)
+        return [[o, o.rotation, o.reflect] for o in orientations]
 
     def get_valid_origins(self, player, board = None):
         """
@@ -97,26 +91,23 @@ class Move_generator:
           (X, Y, Piece index, roations, refelction_flag, candidate position list)
         """
         valid_moves = []
-        # Iterate over available pieces and their indices via mask
-        for piece_idx, piece in player.available_pieces():
-            transforms = self.generate_unique_transformations(piece)
-            for trans_piece in transforms:
-                for pivot in trans_piece[0].shape:
+        # Iterate over available pieces and their precomputed orientations
+        for piece_idx, _ in player.available_pieces():
+            for orientation in PIECE_ORIENTATIONS[piece_idx]:
+                for pivot in orientation.shape:
                     # Compute translation vector to align pivot with origin
-                    translation = (origin[0] - pivot[0], origin[1] - pivot[1])
+                    tx = origin[0] - pivot[0]
+                    ty = origin[1] - pivot[1]
                     # Compute absolute positions on board
-                    candidate_positions = [
-                        (b[0] + translation[0], b[1] + translation[1])
-                        for b in trans_piece[0].shape
-                    ]
+                    candidate_positions = [(bx + tx, by + ty) for bx, by in orientation.shape]
                     # Check placement validity
                     if self.board.is_candidate_placement(candidate_positions, player):
                         valid_moves.append((
                             origin[0],
                             origin[1],
                             piece_idx,
-                            trans_piece[1],
-                            trans_piece[2],
+                            orientation.rotation,
+                            orientation.reflect,
                             candidate_positions))
         return valid_moves
 
@@ -130,3 +121,16 @@ class Move_generator:
             valid_moves.extend(self.get_moves_for_origin(player, origin))
         return valid_moves
 
+    def get_valid_placements(self, player):
+        """
+        Return the sorted placement IDs (see game.placements) of all valid moves
+        for a player. Only placements covering one of the board's anchor cells
+        are considered, and they are validated in one vectorized batch.
+        """
+        board = self.board
+        anchor_cells = np.flatnonzero(board.anchors[player.player_id])
+        if anchor_cells.size == 0 or not player.pieces_bits:
+            return np.empty(0, dtype=np.int32)
+        table = get_placement_table(board.size)
+        candidates = np.unique(np.concatenate([table.covering[c] for c in anchor_cells]))
+        return candidates[board.validate_many(player, candidates)]
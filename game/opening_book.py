@@ -0,0 +1,157 @@
+"""
+Opening book: the legal placements of every position in the first plies,
+precomputed once and stored in a memory-mapped file.
+
+Positions are keyed by their canonical Zobrist key (see game.symmetry) combined
+with the player to move, so the 8 symmetric variants share one entry. An entry
+holds the sorted legal placement IDs (uint16) in the canonical frame and,
+optionally, one uint32 statistic per move (e.g. search visit counts). Action
+masks and observations follow from the placements and the board in one
+vectorized step (see game.placements.placement_actions).
+
+File layout (little endian): header, keys int64[n] (sorted), offsets
+int64[n + 1], placement IDs uint16[m], stats uint32[m] (if present).
+"""
+import struct
+
+import numpy as np
+
+from game.game import Game
+from game.move_generator import Move_generator
+from game.player import NUM_PIECES
+from game.symmetry import get_symmetry_tables
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+MAGIC = b"BLKBOOK1"
+# magic, board size, num players, max plies, has stats, num entries, num placement IDs
+_HEADER = struct.Struct("<8sIIIIQQ")
+
+
+def mover_keys(size, num_players):
+    """Fixed 64-bit keys combined with the position key for the player to move."""
+    rng = np.random.default_rng(size * 7919 + num_players)
+    return rng.integers(1, 2 ** 63, size=num_players, dtype=np.int64)
+
+
+def plies_played(game):
+    """Number of pieces placed by all players together."""
+    return sum(NUM_PIECES - bin(player.pieces_bits).count("1") for player in game.players)
+
+
+def position_key(board, mover):
+    """Return (book key, g) where g is the symmetry to the canonical frame."""
+    tables = get_symmetry_tables(board.size)
+    key, g = tables.canonical_key(board.cells, board.num_players)
+    return key ^ int(mover_keys(board.size, board.num_players)[mover]), g
+
+
+def build_opening_book(path, max_plies=2, board_size=BOARD_SIZE, player_colors=PLAYER_COLORS,
+                       move_stats=None):
+    """
+    Enumerate every position reachable in at most `max_plies` plies from the
+    empty board (any player may start) and write the book to `path`.
+    move_stats: optional f(game, player_idx, legal placement IDs) -> counts per
+                move, stored alongside the placements
+    Returns the number of positions stored.
+    """
+    tables = get_symmetry_tables(board_size)
+    num_players = len(player_colors)
+    entries = {}
+    frontier = {}
+    for mover in range(num_players):
+        game = Game(board_size=board_size, player_colors=list(player_colors))
+        game.current_player_index = mover
+        frontier.setdefault(position_key(game.board, mover)[0], game)
+
+    for ply in range(max_plies + 1):
+        next_frontier = {}
+        for key, game in frontier.items():
+            mover = game.current_player_index
+            legal = Move_generator(game.board).get_valid_placements(game.players[mover])
+            _, g = position_key(game.board, mover)
+            canonical = tables.placement_map[g, legal]
+            order = np.argsort(canonical)
+            stats = None
+            if move_stats is not None:
+                stats = np.asarray(move_stats(game, mover, legal), dtype=np.uint32)[order]
+            entries[key] = (canonical[order].astype(np.uint16), stats)
+            if ply == max_plies:
+                continue
+            for move in legal:
+                child = game.copy()
+                child.make_move(mover, int(move))
+                child.current_player_index = (mover + 1) % num_players
+                child_key = position_key(child.board, child.current_player_index)[0]
+                if child_key not in entries and child_key not in next_frontier:
+                    next_frontier[child_key] = child
+        frontier = next_frontier
+
+    keys = np.array(sorted(entries), dtype=np.int64)
+    ids = [entries[int(k)][0] for k in keys]
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(i) for i in ids])
+    has_stats = move_stats is not None
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, board_size, num_players, max_plies, int(has_stats),
+                             len(keys), int(offsets[-1])))
+        f.write(keys.tobytes())
+        f.write(offsets.tobytes())
+        f.write(np.concatenate(ids).astype(np.uint16).tobytes())
+        if has_stats:
+            f.write(np.concatenate([entries[int(k)][1] for k in keys]).astype(np.uint32).tobytes())
+    return len(keys)
+
+
+class OpeningBook:
+    def __init__(self, path):
+        """Open a book written by build_opening_book; the arrays stay on disk (np.memmap)."""
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+        magic, self.size, self.num_players, self.max_plies, has_stats, n, m = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an opening book")
+        offset = _HEADER.size
+        self._keys = np.memmap(path, dtype="<i8", mode="r", offset=offset, shape=(n,))
+        offset += 8 * n
+        self._offsets = np.memmap(path, dtype="<i8", mode="r", offset=offset, shape=(n + 1,))
+        offset += 8 * (n + 1)
+        self._ids = np.memmap(path, dtype="<u2", mode="r", offset=offset, shape=(m,)) if m else np.empty(0, np.uint16)
+        offset += 2 * m
+        self._stats = None
+        if has_stats and m:
+            self._stats = np.memmap(path, dtype="<u4", mode="r", offset=offset, shape=(m,))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, game, mover=None):
+        """
+        Return (legal placement IDs, stats or None) for the player to move, or
+        None if the position is not in the book.
+        """
+        if mover is None:
+            mover = game.current_player_index
+        board = game.board
+        if (board.size != self.size or board.num_players != self.num_players
+                or plies_played(game) > self.max_plies):
+            return None
+        key, g = position_key(board, mover)
+        i = int(np.searchsorted(self._keys, key))
+        if i == len(self._keys) or self._keys[i] != key:
+            return None
+        start, stop = int(self._offsets[i]), int(self._offsets[i + 1])
+        tables = get_symmetry_tables(board.size)
+        ids = tables.placement_map[tables.inverse[g], self._ids[start:stop]]
+        order = np.argsort(ids)
+        stats = None if self._stats is None else np.array(self._stats[start:stop])[order]
+        return ids[order], stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the Blokus opening book")
+    parser.add_argument("path", help="output file")
+    parser.add_argument("--plies", type=int, default=2, help="plies from the empty board")
+    args = parser.parse_args()
+    print(f"{build_opening_book(args.path, args.plies)} positions written to {args.path}")
@@ -1,16 +1,37 @@
+import numpy as np
+
+from game.pieces_definition import PIECES_DEFINITION
+
+# (rotation, reflect) -> coefficients (a, b, c, d) mapping (x, y) to (a*x + b*y, c*x + d*y).
+# One clockwise rotation is (x, y) -> (y, -x); the reflection (-x, y) is applied afterwards.
+_TRANSFORMS = {}
+for _reflect in range(2):
+    for _rotation in range(4):
+        a, b, c, d = 1, 0, 0, 1
+        for _ in range(_rotation):
+            a, b, c, d = c, d, -a, -b
+        if _reflect:
+            a, b = -a, -b
+        _TRANSFORMS[(_rotation, _reflect)] = (a, b, c, d)
+
+
+def _freeze(self, **fields):
+    for name, value in fields.items():
+        object.__setattr__(self, name, value)
+
+
 class Piece:
+    __slots__ = ("shape",)
+
     def __init__(self, shape):
         """
         shape: List of tuples defining the relative positions of the squares,
                e.g. [(0, 0), (1, 0), (0, 1)] for an L-shaped piece.
         """
-        self.shape = shape
-
-    def __rotate_once(self, coords):
-        return [(y, -x) for x, y in coords]
+        _freeze(self, shape=tuple(shape))
 
-    def __reflect_once(self, coords):
-        return [(-x, y) for x, y in coords]
+    def __setattr__(self, name, value):
+        raise AttributeError("Piece objects are immutable")
 
     def get_positions(self, origin, rotation=0, reflect=0):
         """
@@ -18,20 +39,9 @@ class Piece:
         rotation: number of 90° clockwise rotations (0–3)
         reflect: 0=no reflect, 1=reflect horizontally
         """
-        # 1. Start from the original shape
-        coords = list(self.shape)
-
-        # 2. Apply rotations (mod 4)
-        for _ in range(rotation % 4):
-            coords = self.__rotate_once(coords)
-
-        # 3. Apply a single reflection if requested
-        if reflect:
-            coords = self.__reflect_once(coords)
-
-        # 4. Translate to board origin
+        a, b, c, d = _TRANSFORMS[(rotation % 4, 1 if reflect else 0)]
         ox, oy = origin
-        return [(ox + x, oy + y) for x, y in coords]
+        return [(ox + a * x + b * y, oy + c * x + d * y) for x, y in self.shape]
 
     def pretty_print(self, shape=None):
         """
@@ -62,3 +72,96 @@ class Piece:
         # Print the grid row by row
         for row in grid:
             print("".join(row))
+
+
+class Orientation:
+    """
+    One fixed orientation (rotation/reflection) of a piece with everything the
+    move generation needs precomputed. Instances are immutable and, for the
+    pieces in PIECES_DEFINITION, created once per process (see ORIENTATIONS).
+    """
+    __slots__ = ("index", "piece_idx", "rotation", "reflect", "shape", "cells_array",
+                 "width", "height", "edge_offsets", "corner_offsets")
+
+    def __init__(self, index, piece_idx, rotation, reflect, cells):
+        cell_set = set(cells)
+        edge = {
+            (x + dx, y + dy)
+            for x, y in cells
+            for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))
+        } - cell_set
+        corner = {
+            (x + dx, y + dy)
+            for x, y in cells
+            for dx, dy in ((-1, -1), (-1, 1), (1, -1), (1, 1))
+        } - cell_set - edge
+        cells_array = np.array(cells, dtype=np.int8)
+        cells_array.flags.writeable = False
+        _freeze(
+            self,
+            index=index,
+            piece_idx=piece_idx,
+            rotation=rotation,
+            reflect=reflect,
+            # normalised (min x/y == 0) and sorted cell coordinates
+            shape=tuple(cells),
+            cells_array=cells_array,
+            width=max(x for x, _ in cells) + 1,
+            height=max(y for _, y in cells) + 1,
+            # cells sharing an edge with the piece (forbidden for the same colour)
+            edge_offsets=tuple(sorted(edge)),
+            # cells touching the piece only diagonally (future anchors)
+            corner_offsets=tuple(sorted(corner)),
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Orientation objects are immutable")
+
+    def __len__(self):
+        return len(self.shape)
+
+    def __repr__(self):
+        return (f"Orientation(piece={self.piece_idx}, rotation={self.rotation}, "
+                f"reflect={self.reflect}, shape={self.shape})")
+
+
+def unique_orientations(shape, piece_idx=None, first_index=None):
+    """
+    Build the distinct orientations of `shape` in the canonical order used by
+    the action space: reflect 0 before 1, rotations 0–3, first occurrence wins.
+    """
+    piece = Piece(shape)
+    orientations = []
+    seen = set()
+    for reflect in range(2):
+        for rotation in range(4):
+            coords = piece.get_positions((0, 0), rotation, reflect)
+            min_x = min(x for x, _ in coords)
+            min_y = min(y for _, y in coords)
+            canon = tuple(sorted((x - min_x, y - min_y) for x, y in coords))
+            if canon in seen:
+                continue
+            seen.add(canon)
+            index = None if first_index is None else first_index + len(orientations)
+            orientations.append(Orientation(index, piece_idx, rotation, reflect, canon))
+    return tuple(orientations)
+
+
+def _build_orientation_tables():
+    per_piece = []
+    count = 0
+    for piece_idx, shape in enumerate(PIECES_DEFINITION):
+        orientations = unique_orientations(shape, piece_idx, count)
+        count += len(orientations)
+        per_piece.append(orientations)
+    return tuple(per_piece)
+
+
+# Interned piece objects, one per entry of PIECES_DEFINITION
+PIECES = tuple(Piece(shape) for shape in PIECES_DEFINITION)
+# Number of squares per piece index
+PIECE_SIZES = tuple(len(shape) for shape in PIECES_DEFINITION)
+# Distinct orientations per piece index, in action-space order
+PIECE_ORIENTATIONS = _build_orientation_tables()
+# All fixed orientations (91 for the standard set); Orientation.index is the position here
+ORIENTATIONS = tuple(o for orientations in PIECE_ORIENTATIONS for o in orientations)
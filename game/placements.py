@@ -0,0 +1,115 @@
+from functools import lru_cache
+
+import numpy as np
+
+from game.piece import ORIENTATIONS
+from game.player import NUM_PIECES
+
+# Cells per placement row; smaller pieces repeat their last cell as padding
+MAX_CELLS = 5
+
+# Normalised sorted shape -> global orientation index (shapes are unique across pieces)
+_ORIENTATION_BY_SHAPE = {o.shape: o.index for o in ORIENTATIONS}
+
+
+class PlacementTable:
+    """
+    Every in-bounds placement (fixed orientation + translation) on a board of
+    the given size. A placement ID is a row index into the arrays below; IDs
+    are ordered by orientation index, then by translation y, then x.
+    Build it through get_placement_table so it exists once per process.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        orientation, origin_x, origin_y = [], [], []
+        for o in ORIENTATIONS:
+            for oy in range(size - o.height + 1):
+                for ox in range(size - o.width + 1):
+                    orientation.append(o.index)
+                    origin_x.append(ox)
+                    origin_y.append(oy)
+
+        self.orientation = np.array(orientation, dtype=np.int16)
+        # Translation (x, y) of the orientation's normalised (0, 0) cell
+        self.origin = np.stack([origin_x, origin_y], axis=1).astype(np.int16)
+
+        shapes = np.zeros((len(ORIENTATIONS), MAX_CELLS, 2), dtype=np.int16)
+        for o in ORIENTATIONS:
+            padded = list(o.shape) + [o.shape[-1]] * (MAX_CELLS - len(o.shape))
+            shapes[o.index] = padded
+        self.piece = np.array([o.piece_idx for o in ORIENTATIONS], dtype=np.int8)[self.orientation]
+        self.rotation = np.array([o.rotation for o in ORIENTATIONS], dtype=np.int8)[self.orientation]
+        self.reflect = np.array([o.reflect for o in ORIENTATIONS], dtype=np.int8)[self.orientation]
+        self.num_cells = np.array([len(o) for o in ORIENTATIONS], dtype=np.int8)[self.orientation]
+        # (P, 5, 2) absolute (x, y) coordinates and (P, 5) flat indices y * size + x
+        self.coords = shapes[self.orientation] + self.origin[:, None, :]
+        self.cells = (self.coords[..., 1].astype(np.int32) * size + self.coords[..., 0])
+        # (P, 5) True for real cells, False for the padding repeats
+        self.cell_mask = np.arange(MAX_CELLS)[None, :] < self.num_cells[:, None]
+
+        # id_grid[orientation, y, x] -> placement ID or -1 if the piece would leave the board
+        self.id_grid = np.full((len(ORIENTATIONS), size, size), -1, dtype=np.int32)
+        self.id_grid[self.orientation, self.origin[:, 1], self.origin[:, 0]] = np.arange(len(self))
+
+        # covering[cell] -> IDs of all placements occupying that flat cell index
+        flat_ids = np.repeat(np.arange(len(self)), MAX_CELLS)
+        flat_cells = self.cells.reshape(-1)
+        keep = self.cell_mask.reshape(-1)
+        order = np.argsort(flat_cells[keep], kind="stable")
+        sorted_ids = flat_ids[keep][order].astype(np.int32)
+        bounds = np.searchsorted(flat_cells[keep][order], np.arange(size * size + 1))
+        self.covering = tuple(sorted_ids[bounds[i]:bounds[i + 1]] for i in range(size * size))
+
+        for array in (self.orientation, self.origin, self.piece, self.rotation, self.reflect,
+                      self.num_cells, self.coords, self.cells, self.cell_mask, self.id_grid,
+                      *self.covering):
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.orientation)
+
+    def find(self, positions):
+        """Return the placement ID covering exactly `positions` ((x, y) tuples), or -1."""
+        if not positions:
+            return -1
+        min_x = min(x for x, _ in positions)
+        min_y = min(y for _, y in positions)
+        shape = tuple(sorted((x - min_x, y - min_y) for x, y in positions))
+        orientation = _ORIENTATION_BY_SHAPE.get(shape)
+        if orientation is None or not (0 <= min_x < self.size and 0 <= min_y < self.size):
+            return -1
+        return int(self.id_grid[orientation, min_y, min_x])
+
+    def positions(self, placement_id):
+        """Return the placement as a list of (x, y) tuples, like Move_generator does."""
+        n = self.num_cells[placement_id]
+        return [(int(x), int(y)) for x, y in self.coords[placement_id, :n]]
+
+
+@lru_cache(maxsize=None)
+def get_placement_table(size):
+    """Return the shared PlacementTable for a board of the given size."""
+    return PlacementTable(size)
+
+
+def placement_actions(placement_ids, anchors, size, num_pieces=NUM_PIECES):
+    """
+    Map valid placements to the env action layout
+    ((((x * size + y) * num_pieces + piece) * 4 + rotation) * 2 + reflect).
+    The env names a placement by one of its cells that is an anchor for the
+    mover, so a placement yields one action per anchor it covers.
+    anchors: (size, size) anchor plane of the mover (Board.anchors[player_id])
+    Returns (actions, placement IDs, pivot) arrays, one entry per action, where
+    pivot is the index of the anchor cell within the placement's sorted cells.
+    """
+    table = get_placement_table(size)
+    placement_ids = np.asarray(placement_ids, dtype=np.int64)
+    cells = table.cells[placement_ids]
+    covered = np.asarray(anchors).reshape(-1)[cells] & table.cell_mask[placement_ids]
+    rows, pivot = np.nonzero(covered)
+    ids = placement_ids[rows]
+    y, x = np.divmod(cells[rows, pivot].astype(np.int64), size)
+    actions = ((((x * size + y) * num_pieces + table.piece[ids]) * 4 + table.rotation[ids]) * 2
+               + table.reflect[ids])
+    return actions, ids, pivot
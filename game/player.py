@@ -1,38 +1,114 @@
 from game.pieces_definition import PIECES_DEFINITION  # global list of all piece shapes
-from game.piece import Piece
+from game.piece import PIECES, PIECE_SIZES
 import numpy as np
 import logging
 
+NUM_PIECES = len(PIECES_DEFINITION)
+# Inventory with every piece still available (bit i <=> piece index i)
+ALL_PIECES_BITS = (1 << NUM_PIECES) - 1
+# Squares of a full inventory (89 for the standard set)
+TOTAL_SQUARES = sum(PIECE_SIZES)
+# Piece index of the single square, relevant for the official scoring bonus
+MONOMINO_INDEX = PIECE_SIZES.index(1)
+_PIECE_SHIFTS = np.arange(NUM_PIECES)
+
+
 class Player:
-    def __init__(self, color):
+    def __init__(self, color, player_id=0):
         self.color = color
-        # Binary mask: 1 = piece still available, 0 = piece already placed
-        self.pieces_mask = np.ones(len(PIECES_DEFINITION), dtype=np.int8)
+        # Small integer identifying the player on the board (index into Game.players)
+        self.player_id = player_id
+        # NumPy mirror of pieces_bits for observations: 1 = available, 0 = placed
+        self._pieces_mask = np.ones(NUM_PIECES, dtype=np.int8)
+        self._pieces_mask_view = self._pieces_mask.view()
+        self._pieces_mask_view.flags.writeable = False
+        self.reset_pieces()
+
+    def copy(self):
+        """Return an independent copy of the player and its inventory."""
+        clone = Player(self.color, self.player_id)
+        clone.pieces_bits = self.pieces_bits
+        clone.remaining_squares = self.remaining_squares
+        clone.last_piece_monomino = self.last_piece_monomino
+        clone._pieces_mask[:] = self._pieces_mask
+        return clone
+
+    @property
+    def pieces_mask(self):
+        """
+        Read-only int8 view of the inventory (1 = piece still available).
+        Use drop_piece to change it; copy it before handing it out as an observation.
+        """
+        return self._pieces_mask_view
+
+    def has_piece(self, piece_idx):
+        """Return True if the piece at piece_idx has not been placed yet."""
+        return (self.pieces_bits >> piece_idx) & 1 == 1
 
     def available_pieces(self):
         """
         Return a list of (index, Piece) tuples for every piece
         that is still available according to the mask.
+        The Piece objects are the shared, immutable instances from game.piece.PIECES.
         """
+        bits = self.pieces_bits
         return [
-            (i, Piece(PIECES_DEFINITION[i]))
-            for i in range(len(PIECES_DEFINITION))
-            if self.pieces_mask[i] == 1
+            (i, PIECES[i])
+            for i in range(NUM_PIECES)
+            if (bits >> i) & 1
         ]
 
     def drop_piece(self, piece_idx):
         """
         Mark the piece at piece_idx as placed (i.e. no longer available).
+        Dropping an already placed piece is a no-op.
         Raises IndexError if piece_idx is out of bounds.
         """
-        if 0 <= piece_idx < len(self.pieces_mask):
-            self.pieces_mask[piece_idx] = 0
-        else:
+        if not 0 <= piece_idx < NUM_PIECES:
             raise IndexError(f"No piece with index {piece_idx}")
+        bit = 1 << piece_idx
+        if self.pieces_bits & bit:
+            self.pieces_bits ^= bit
+            self.remaining_squares -= PIECE_SIZES[piece_idx]
+            self.last_piece_monomino = piece_idx == MONOMINO_INDEX
+            self._pieces_mask[piece_idx] = 0
+
+    def restore_piece(self, piece_idx, last_piece_monomino):
+        """Undo drop_piece(piece_idx); last_piece_monomino is the flag from before the drop."""
+        bit = 1 << piece_idx
+        if not self.pieces_bits & bit:
+            self.pieces_bits |= bit
+            self.remaining_squares += PIECE_SIZES[piece_idx]
+            self._pieces_mask[piece_idx] = 1
+        self.last_piece_monomino = last_piece_monomino
+
+    def set_pieces(self, pieces_bits, last_piece_monomino=False):
+        """Replace the inventory with pieces_bits (bit i <=> piece i still available)."""
+        if not 0 <= pieces_bits <= ALL_PIECES_BITS:
+            raise ValueError(f"Invalid inventory bits {pieces_bits:#x}")
+        self.pieces_bits = pieces_bits
+        self.remaining_squares = sum(PIECE_SIZES[i] for i in range(NUM_PIECES) if (pieces_bits >> i) & 1)
+        self.last_piece_monomino = last_piece_monomino
+        self._pieces_mask[:] = [(pieces_bits >> i) & 1 for i in range(NUM_PIECES)]
+
+    def inventory(self):
+        """Immutable snapshot (pieces_bits, remaining_squares, last_piece_monomino) for set_inventory."""
+        return self.pieces_bits, self.remaining_squares, self.last_piece_monomino
+
+    def set_inventory(self, inventory):
+        """Restore a snapshot taken with inventory()."""
+        self.pieces_bits, self.remaining_squares, self.last_piece_monomino = inventory
+        self._pieces_mask[:] = (self.pieces_bits >> _PIECE_SHIFTS) & 1
 
     def reset_pieces(self):
         """
         Reset the availability mask so that all pieces become available again.
         Call this at the start of a new game/episode.
         """
-        self.pieces_mask[:] = 1
+        # Bit i set = piece i still available
+        self.pieces_bits = ALL_PIECES_BITS
+        # Squares of all pieces not yet placed
+        self.remaining_squares = TOTAL_SQUARES
+        # True if the most recently placed piece was the monomino
+        self.last_piece_monomino = False
+        self._pieces_mask[:] = 1
@@ -0,0 +1,100 @@
+import numpy as np
+
+from game.placements import get_placement_table
+
+# Candidates tested one by one before falling back to validating all of them
+LAZY_TRIES = 16
+
+
+def _placement_weights(table, weighting):
+    if weighting == "uniform":
+        return np.ones(len(table), dtype=np.float64)
+    if weighting == "size":
+        return table.num_cells.astype(np.float64)
+    raise ValueError(f"Unknown weighting {weighting!r}; expected 'uniform' or 'size'")
+
+
+def sample_placement(board, player, rng, weights=None, lazy_tries=LAZY_TRIES):
+    """
+    Draw one valid placement ID for `player`, or return None if it has no move.
+
+    Candidates are the placements covering the board's anchor cells for that
+    player. A placement touching k anchors appears k times among them, so a
+    candidate is accepted with probability w / (w_max * k); this keeps the draw
+    exactly uniform (or proportional to `weights`) over the valid placements
+    without building the full move list. After `lazy_tries` rejections all
+    candidates are validated in one vectorized batch instead.
+    """
+    table = get_placement_table(board.size)
+    anchors = board.anchors[player.player_id].reshape(-1)
+    anchor_cells = np.flatnonzero(anchors)
+    if anchor_cells.size == 0:
+        return None
+    candidates = np.concatenate([table.covering[c] for c in anchor_cells])
+    candidates = candidates[player.pieces_mask[table.piece[candidates]] == 1]
+    if candidates.size == 0:
+        return None
+
+    blocked = board.blocked[player.player_id].reshape(-1)
+    w_max = 1.0 if weights is None else float(weights.max())
+    for i in rng.integers(candidates.size, size=lazy_tries):
+        placement_id = candidates[i]
+        cells = table.cells[placement_id, :table.num_cells[placement_id]]
+        if blocked[cells].any():
+            continue
+        k = int(anchors[cells].sum())
+        w = 1.0 if weights is None else weights[placement_id]
+        if rng.random() * w_max * k < w:
+            return int(placement_id)
+
+    # Every candidate covers an anchor by construction; only the blocked cells remain to check
+    cells = table.cells[candidates]
+    valid = candidates[~blocked[cells].any(axis=1)]
+    if valid.size == 0:
+        return None
+    k = (anchors[table.cells[valid]] & table.cell_mask[valid]).sum(axis=1)
+    p = 1.0 / k if weights is None else weights[valid] / k
+    cumulative = np.cumsum(p)
+    return int(valid[np.searchsorted(cumulative, rng.random() * cumulative[-1], side="right")])
+
+def random_playout(game, rng, inactive_players=(), weighting="uniform", copy=True):
+    """
+    Play `game` to completion with random valid moves, starting with
+    game.current_player_index. Players in `inactive_players` (and every player
+    who runs out of moves) pass for the rest of the game.
+    weighting: "uniform" over valid placements or "size" (proportional to piece size).
+    Returns the official final scores as an int array indexed by player_id.
+    """
+    if copy:
+        game = game.copy()
+    board = game.board
+    table = get_placement_table(board.size)
+    weights = None if weighting == "uniform" else _placement_weights(table, weighting)
+
+    num_players = len(game.players)
+    out = set(inactive_players)
+    idx = game.current_player_index
+    while len(out) < num_players:
+        if idx not in out:
+            player = game.players[idx]
+            placement_id = sample_placement(board, player, rng, weights)
+            if placement_id is None:
+                out.add(idx)
+            else:
+                board.place_piece(int(table.piece[placement_id]), table.positions(placement_id), player)
+        idx = (idx + 1) % num_players
+    game.current_player_index = idx
+    return np.array(game.scores(), dtype=np.int32)
+
+
+def run_playouts(game, num_playouts=1, seed=None, inactive_players=(), weighting="uniform"):
+    """
+    Run `num_playouts` independent random playouts from the same position.
+    seed: int, None or np.random.Generator used for all playouts.
+    Returns an int array of shape (num_playouts, num_players) with final scores.
+    """
+    rng = np.random.default_rng(seed)
+    return np.stack([
+        random_playout(game, rng, inactive_players, weighting)
+        for _ in range(num_playouts)
+    ])
@@ -0,0 +1,214 @@
+"""
+Compact binary game records.
+
+Games are packed into two append-only files:
+- `<path>`: 16-byte header, then the moves of all games as uint16 placement
+  IDs (see game.placements), 2 bytes per ply; PASS_CODE marks a pass
+- `<path>.idx`: 16-byte header, then one fixed-size INDEX_DTYPE entry per game
+  (where its moves start, ply count, seed, colours, start player, final scores)
+Both are read through np.memmap without parsing. The index entry is written
+after the moves, so a crash leaves at most moves without an index entry, and
+the writer trims those when it reopens the file.
+"""
+import os
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+from global_constants import BOARD_SIZE
+
+# Move entry for a player who cannot (or chooses not to) move any more
+PASS = -1
+# PASS as stored on disk
+PASS_CODE = 0xFFFF
+MAX_PLAYERS = 4
+
+MOVES_MAGIC = b"BLKMOVES"
+INDEX_MAGIC = b"BLKINDEX"
+VERSION = 1
+# magic, version, board size
+_HEADER = struct.Struct("<8sII")
+
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),          # first ply in the moves file
+    ("num_plies", "<u4"),
+    ("game", "<u4"),            # caller-chosen game number (e.g. generator index)
+    ("seed", "<u8"),
+    ("start_player", "u1"),
+    ("num_players", "u1"),
+    ("colors", "S4"),
+    ("scores", "<i2", (MAX_PLAYERS,)),
+])
+
+
+class GameRecord(NamedTuple):
+    game: int
+    seed: int
+    colors: list
+    start_player: int
+    scores: list
+    moves: np.ndarray  # placement IDs in turn order, PASS for passes
+
+
+def index_path(path):
+    return f"{path}.idx"
+
+
+def _check_header(f, magic, path):
+    header = f.read(_HEADER.size)
+    found, version, board_size = _HEADER.unpack(header)
+    if found != magic or version != VERSION:
+        raise ValueError(f"{path} is not a game record file (version {VERSION})")
+    return board_size
+
+
+class GameRecordWriter:
+    def __init__(self, path, board_size=BOARD_SIZE):
+        """
+        Open (or create) the record files at `path` for appending. Raises
+        ValueError if only one of the two files exists.
+        """
+        self.path = path
+        self.board_size = board_size
+        moves_path, idx_path = path, index_path(path)
+        if os.path.exists(idx_path) and os.path.exists(moves_path):
+            with open(idx_path, "rb") as f:
+                _check_header(f, INDEX_MAGIC, idx_path)
+            with open(moves_path, "rb") as f:
+                _check_header(f, MOVES_MAGIC, moves_path)
+            # Drop a partial index entry and moves that were never indexed
+            count = (os.path.getsize(idx_path) - _HEADER.size) // INDEX_DTYPE.itemsize
+            end = 0
+            if count:
+                with open(idx_path, "rb") as f:
+                    f.seek(_HEADER.size + (count - 1) * INDEX_DTYPE.itemsize)
+                    last = np.frombuffer(f.read(INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)[0]
+                end = int(last["offset"]) + int(last["num_plies"])
+            os.truncate(idx_path, _HEADER.size + count * INDEX_DTYPE.itemsize)
+            os.truncate(moves_path, _HEADER.size + 2 * end)
+            self._count, self._plies = count, end
+        elif os.path.exists(idx_path) or os.path.exists(moves_path):
+            # Seeds, colours and scores only live in the index, so neither file can be rebuilt
+            missing = idx_path if os.path.exists(moves_path) else moves_path
+            raise ValueError(f"{missing} is missing; refusing to overwrite the other record file")
+        else:
+            for p, magic in ((moves_path, MOVES_MAGIC), (idx_path, INDEX_MAGIC)):
+                with open(p, "wb") as f:
+                    f.write(_HEADER.pack(magic, VERSION, board_size))
+            self._count, self._plies = 0, 0
+        self._moves = open(moves_path, "ab")
+        self._index = open(idx_path, "ab")
+
+    def __len__(self):
+        return self._count
+
+    def append(self, moves, seed, start_player, scores, colors, game=None):
+        """Append one game; `moves` are placement IDs in turn order with PASS entries."""
+        if len(scores) > MAX_PLAYERS:
+            raise ValueError(f"At most {MAX_PLAYERS} players are supported")
+        moves = np.asarray(moves, dtype=np.int64)
+        stored = np.where(moves == PASS, PASS_CODE, moves).astype("<u2")
+        entry = np.zeros(1, dtype=INDEX_DTYPE)
+        entry["offset"] = self._plies
+        entry["num_plies"] = len(stored)
+        entry["game"] = self._count if game is None else game
+        entry["seed"] = seed
+        entry["start_player"] = start_player
+        entry["num_players"] = len(scores)
+        entry["colors"] = "".join(colors).encode()
+        entry["scores"][0, :len(scores)] = scores
+
+        self._moves.write(stored.tobytes())
+        self._moves.flush()
+        self._index.write(entry.tobytes())
+        self._index.flush()
+        self._count += 1
+        self._plies += len(stored)
+
+    def close(self):
+        self._moves.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecordReader:
+    def __init__(self, path):
+        """Memory-map the record files at `path`."""
+        idx_path = index_path(path)
+        with open(idx_path, "rb") as f:
+            self.board_size = _check_header(f, INDEX_MAGIC, idx_path)
+        with open(path, "rb") as f:
+            _check_header(f, MOVES_MAGIC, path)
+        count = (os.path.getsize(idx_path) - _HEADER.size) // INDEX_DTYPE.itemsize
+        plies = (os.path.getsize(path) - _HEADER.size) // 2
+        # np.memmap cannot map zero bytes
+        self.index = (np.memmap(idx_path, dtype=INDEX_DTYPE, mode="r", offset=_HEADER.size, shape=(count,))
+                      if count else np.zeros(0, dtype=INDEX_DTYPE))
+        self.moves = (np.memmap(path, dtype="<u2", mode="r", offset=_HEADER.size, shape=(plies,))
+                      if plies else np.zeros(0, dtype="<u2"))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        entry = self.index[i]
+        start = int(entry["offset"])
+        raw = self.moves[start:start + int(entry["num_plies"])]
+        num_players = int(entry["num_players"])
+        return GameRecord(
+            game=int(entry["game"]),
+            seed=int(entry["seed"]),
+            colors=list(entry["colors"].decode()),
+            start_player=int(entry["start_player"]),
+            scores=[int(s) for s in entry["scores"][:num_players]],
+            moves=np.where(raw == PASS_CODE, PASS, raw.astype(np.int64)),
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class GameRecorder:
+    """
+    Collects the moves of the running game in memory and appends the game to a
+    GameRecordWriter when it ends. Cheap enough to leave on inside envs.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.moves = None
+        self.seed = 0
+        self.start_player = 0
+
+    def start(self, seed, start_player):
+        """Begin a new game; an unfinished previous game is dropped."""
+        # Seeds are stored as uint64
+        self.seed = 0 if seed is None else int(seed) % 2 ** 64
+        self.start_player = start_player
+        self.moves = []
+
+    def discard(self):
+        """Drop the running game without writing it."""
+        self.moves = None
+
+    def record(self, move):
+        """Record one ply: a placement ID or PASS."""
+        if self.moves is not None:
+            self.moves.append(int(move))
+
+    def finish(self, scores, colors):
+        """Write the game with its final scores."""
+        if self.moves is None:
+            return
+        self.writer.append(self.moves, self.seed, self.start_player, scores, colors)
+        self.moves = None
+
+    def close(self):
+        self.writer.close()
@@ -0,0 +1,41 @@
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+# Official Blokus scoring: -1 per square left over, +15 for placing all pieces
+# and +5 more if the last piece placed was the monomino.
+ALL_PLACED_BONUS = 15
+MONOMINO_LAST_BONUS = 5
+
+
+class GameResult(NamedTuple):
+    """Final (or current) standings, indexed by player_id."""
+    scores: Tuple[int, ...]
+    # 1 = best; tied players share the better rank (1, 1, 3, 4)
+    ranks: Tuple[int, ...]
+    # player_ids sharing the top score
+    winners: Tuple[int, ...]
+
+    @property
+    def winner(self) -> Optional[int]:
+        """The single winning player_id, or None for a shared first place."""
+        return self.winners[0] if len(self.winners) == 1 else None
+
+
+def player_score(player) -> int:
+    """
+    Official score of one player. Constant time: it only reads the counters
+    Player maintains in drop_piece.
+    """
+    if player.remaining_squares:
+        return -player.remaining_squares
+    if player.last_piece_monomino:
+        return ALL_PLACED_BONUS + MONOMINO_LAST_BONUS
+    return ALL_PLACED_BONUS
+
+
+def rank_scores(scores: Sequence[int]) -> GameResult:
+    """Build a GameResult (ranks and winners) from per-player scores."""
+    scores = tuple(int(s) for s in scores)
+    ranks = tuple(1 + sum(other > s for other in scores) for s in scores)
+    best = max(scores)
+    winners = tuple(i for i, s in enumerate(scores) if s == best)
+    return GameResult(scores, ranks, winners)
@@ -0,0 +1,174 @@
+from functools import lru_cache
+
+import numpy as np
+
+from global_constants import PLAYER_COLORS
+from game.board import EMPTY, zobrist_keys
+from game.piece import _TRANSFORMS, ORIENTATIONS, PIECES
+from game.placements import get_placement_table
+
+# The 8 symmetries of the square board as (rotation, reflect), using the same
+# coefficients as Piece.get_positions; index 0 is the identity.
+SYMMETRIES = tuple((rotation, reflect) for reflect in range(2) for rotation in range(4))
+NUM_SYMMETRIES = len(SYMMETRIES)
+# (rotation, reflect) labels of the env action layout, indexed rotation * 2 + reflect
+_LABELS = tuple((rotation, reflect) for rotation in range(4) for reflect in range(2))
+
+_ORIENTATION_BY_SHAPE = {o.shape: o.index for o in ORIENTATIONS}
+
+
+def _normalised(coords):
+    min_x = min(x for x, _ in coords)
+    min_y = min(y for _, y in coords)
+    return tuple(sorted((x - min_x, y - min_y) for x, y in coords))
+
+
+def _apply(coefficients, coords):
+    a, b, c, d = coefficients
+    return [(a * x + b * y, c * x + d * y) for x, y in coords]
+
+
+class SymmetryTables:
+    """
+    Index permutations for the 8 dihedral symmetries of a board of the given size.
+    Every player may start in any corner, so the symmetries need no colour permutation.
+
+    The *_map arrays send an index to its image under symmetry g; the *_gather
+    arrays are their inverses, so `values[..., gather[g]]` transforms a whole
+    mask or policy vector with one gather. Build it through get_symmetry_tables.
+
+    Env action indices ((((x * size + y) * pieces + p) * 4 + rot) * 2 + refl,
+    skip last) map cell to cell and orientation to orientation, so action masks
+    and policy targets transform exactly. Rotation/reflection slots that repeat
+    an earlier orientation of a symmetric piece (never valid) are permuted
+    among themselves.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        num_cells = size * size
+        num_pieces = len(PIECES)
+        table = get_placement_table(size)
+
+        coefficients = [_TRANSFORMS[s] for s in SYMMETRIES]
+        by_coefficients = {c: g for g, c in enumerate(coefficients)}
+        inverse = []
+        for a, b, c, d in coefficients:
+            # Orthogonal matrices: the inverse is the transpose
+            inverse.append(by_coefficients[(a, c, b, d)])
+        self.inverse = np.array(inverse, dtype=np.int8)
+
+        # cell_map[g, y * size + x] -> flat index of the image cell
+        ys, xs = np.divmod(np.arange(num_cells), size)
+        self.cell_map = np.empty((NUM_SYMMETRIES, num_cells), dtype=np.int32)
+        for g, (a, b, c, d) in enumerate(coefficients):
+            new_x = a * xs + b * ys + (size - 1 if a + b < 0 else 0)
+            new_y = c * xs + d * ys + (size - 1 if c + d < 0 else 0)
+            self.cell_map[g] = new_y * size + new_x
+
+        # orientation_map[g, o] -> orientation index of the transformed shape
+        self.orientation_map = np.array([
+            [_ORIENTATION_BY_SHAPE[_normalised(_apply(c, o.shape))] for o in ORIENTATIONS]
+            for c in coefficients
+        ], dtype=np.int16)
+
+        # placement_map[g, id] -> placement ID covering the image cells
+        self.placement_map = np.empty((NUM_SYMMETRIES, len(table)), dtype=np.int32)
+        for g, (a, b, c, d) in enumerate(coefficients):
+            x, y = table.coords[..., 0], table.coords[..., 1]
+            new_x = (a * x + b * y + (size - 1 if a + b < 0 else 0)).min(axis=1)
+            new_y = (c * x + d * y + (size - 1 if c + d < 0 else 0)).min(axis=1)
+            self.placement_map[g] = table.id_grid[self.orientation_map[g, table.orientation], new_y, new_x]
+
+        # label_map[g, piece, label] -> label of the image orientation slot
+        label_map = np.empty((NUM_SYMMETRIES, num_pieces, len(_LABELS)), dtype=np.int32)
+        for p, piece in enumerate(PIECES):
+            classes = {}
+            for label, (rotation, reflect) in enumerate(_LABELS):
+                shape = _normalised(piece.get_positions((0, 0), rotation, reflect))
+                classes.setdefault(_ORIENTATION_BY_SHAPE[shape], []).append(label)
+            for members in classes.values():
+                # Canonical slot (reflect 0 before 1, rotations 0-3) first
+                members.sort(key=lambda label: (_LABELS[label][1], _LABELS[label][0]))
+            for g in range(NUM_SYMMETRIES):
+                for o, members in classes.items():
+                    image = classes[int(self.orientation_map[g, o])]
+                    for label, image_label in zip(members, image):
+                        label_map[g, p, label] = image_label
+
+        num_actions = num_cells * num_pieces * len(_LABELS) + 1
+        action = np.arange(num_actions - 1)
+        label = action % len(_LABELS)
+        piece = (action // len(_LABELS)) % num_pieces
+        square = action // (len(_LABELS) * num_pieces)
+        x, y = np.divmod(square, size)
+        self.action_map = np.empty((NUM_SYMMETRIES, num_actions), dtype=np.int32)
+        for g in range(NUM_SYMMETRIES):
+            new_y, new_x = np.divmod(self.cell_map[g, y * size + x], size)
+            new_square = new_x * size + new_y
+            self.action_map[g, :-1] = (new_square * num_pieces + piece) * len(_LABELS) + label_map[g, piece, label]
+            self.action_map[g, -1] = num_actions - 1
+
+        self.cell_gather = np.argsort(self.cell_map, axis=1).astype(np.int32)
+        self.placement_gather = np.argsort(self.placement_map, axis=1).astype(np.int32)
+        self.action_gather = np.argsort(self.action_map, axis=1).astype(np.int32)
+
+        for array in (self.inverse, self.cell_map, self.orientation_map, self.placement_map,
+                      self.action_map, self.cell_gather, self.placement_gather, self.action_gather):
+            array.flags.writeable = False
+
+    def transform_cells(self, array, g):
+        """Transform board-shaped data (..., size, size), indexed [y, x], by symmetry g."""
+        array = np.asarray(array)
+        flat = array.reshape(array.shape[:-2] + (self.size * self.size,))
+        return flat[..., self.cell_gather[g]].reshape(array.shape)
+
+    def transform_positions(self, positions, g):
+        """Transform a list of (x, y) tuples by symmetry g."""
+        size = self.size
+        images = self.cell_map[g, [y * size + x for x, y in positions]]
+        return [(int(cell % size), int(cell // size)) for cell in images]
+
+    def transform_placement(self, placement_id, g):
+        """Image of a placement ID (or an array of them) under symmetry g."""
+        return self.placement_map[g, placement_id]
+
+    def transform_action(self, action, g):
+        """Image of an env action index (or an array of them) under symmetry g."""
+        return self.action_map[g, action]
+
+    def transform_action_values(self, values, g):
+        """Transform masks or policy vectors over the action axis (last) by symmetry g."""
+        return np.asarray(values)[..., self.action_gather[g]]
+
+    def keys(self, cells, num_players=len(PLAYER_COLORS)):
+        """
+        Zobrist keys (as in Board.hash) of the 8 transforms of `cells`, the
+        (size, size) owner plane of Board.cells.
+        """
+        cells = np.asarray(cells).reshape(-1)
+        occupied = np.flatnonzero(cells != EMPTY)
+        if occupied.size == 0:
+            return np.zeros(NUM_SYMMETRIES, dtype=np.int64)
+        keys = np.array(zobrist_keys(self.size, num_players), dtype=np.int64)
+        return np.bitwise_xor.reduce(keys[cells[occupied], self.cell_map[:, occupied]], axis=1)
+
+    def canonical_key(self, cells, num_players=len(PLAYER_COLORS)):
+        """
+        Return (key, g): the smallest Zobrist key over the 8 transforms of
+        `cells` and the symmetry producing it. Symmetric positions share the key.
+        """
+        keys = self.keys(cells, num_players)
+        g = int(np.argmin(keys))
+        return int(keys[g]), g
+
+    def canonical_form(self, cells, num_players=len(PLAYER_COLORS)):
+        """Return (canonical cells, g) with canonical cells = transform_cells(cells, g)."""
+        _, g = self.canonical_key(cells, num_players)
+        return self.transform_cells(cells, g), g
+
+
+@lru_cache(maxsize=None)
+def get_symmetry_tables(size):
+    """Return the shared SymmetryTables for a board of the given size."""
+    return SymmetryTables(size)
@@ -0,0 +1,103 @@
+"""
+Territory / reachability maps on top of the Board planes.
+
+A player's reach is the set of cells it could still cover: a flood fill from
+its anchor cells through cells that are not blocked for it (Board.blocked),
+stepping to all 8 neighbours because later pieces connect at corners. It is
+an optimistic bound, since future stones only shrink it. Cells in the reach of
+two or more players are contested.
+"""
+import numpy as np
+
+from game.move_generator import Move_generator
+from game.placements import get_placement_table
+
+
+def _dilate(planes):
+    """Grow (P, N, N) boolean planes by one cell in all 8 directions."""
+    grown = planes.copy()
+    grown[:, 1:, :] |= planes[:, :-1, :]
+    grown[:, :-1, :] |= planes[:, 1:, :]
+    result = grown.copy()
+    result[:, :, 1:] |= grown[:, :, :-1]
+    result[:, :, :-1] |= grown[:, :, 1:]
+    return result
+
+
+def flood_fill(seeds, allowed):
+    """Cells of `allowed` 8-connected to `seeds` within `allowed`, per plane (P, N, N)."""
+    reach = seeds & allowed
+    while True:
+        grown = _dilate(reach) & allowed
+        if np.array_equal(grown, reach):
+            return reach
+        reach = grown
+
+
+def reachable_cells(board, player_ids=None):
+    """Reach planes (len(player_ids), N, N) computed from scratch."""
+    if player_ids is None:
+        player_ids = range(board.num_players)
+    player_ids = list(player_ids)
+    return flood_fill(board.anchors[player_ids], ~board.blocked[player_ids])
+
+
+class TerritoryMap:
+    def __init__(self, board):
+        """
+        Reach planes for every player of `board`. Call update(positions, player_id)
+        after each Board.place_piece to keep them current.
+        """
+        self.board = board
+        self.reach = reachable_cells(board)
+
+    def refresh(self):
+        """Recompute all reach planes from scratch."""
+        self.reach = reachable_cells(self.board)
+
+    def update(self, positions, player_id):
+        """
+        Update after `player_id` placed a piece on `positions` ((x, y) tuples).
+        Reach only ever shrinks, so each affected plane is refilled within its
+        previous reach; players whose reach does not touch the new stones keep
+        theirs unchanged.
+        """
+        xs = [x for x, _ in positions]
+        ys = [y for _, y in positions]
+        touched = self.reach[:, ys, xs].any(axis=1)
+        touched[player_id] = True
+        affected = np.flatnonzero(touched)
+        board = self.board
+        self.reach[affected] = flood_fill(board.anchors[affected],
+                                          self.reach[affected] & ~board.blocked[affected])
+
+    def counts(self):
+        """Number of reachable cells per player."""
+        return self.reach.reshape(len(self.reach), -1).sum(axis=1)
+
+    def contested(self):
+        """(N, N) boolean plane of cells reachable by at least two players."""
+        return self.reach.sum(axis=0) >= 2
+
+    def exclusive_counts(self):
+        """Number of cells only that player can reach, per player."""
+        alone = self.reach & (self.reach.sum(axis=0) == 1)
+        return alone.reshape(len(self.reach), -1).sum(axis=1)
+
+    def usable_anchors(self, players):
+        """
+        Number of anchor cells per player that some legal placement covers
+        (players: Player objects indexed by player_id).
+        """
+        board = self.board
+        table = get_placement_table(board.size)
+        move_gen = Move_generator(board)
+        counts = np.zeros(len(players), dtype=np.int64)
+        for player in players:
+            legal = move_gen.get_valid_placements(player)
+            if legal.size == 0:
+                continue
+            anchors = board.anchors[player.player_id].reshape(-1)
+            cells = table.cells[legal][table.cell_mask[legal]]
+            counts[player.player_id] = np.unique(cells[anchors[cells]]).size
+        return counts
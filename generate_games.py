@@ -0,0 +1,167 @@
+"""
+Play many Blokus games between configurable agents across a process pool and
+stream the finished game records to disk, either one JSON object per line or
+in the binary record format of game.records (--format bin).
+
+    python generate_games.py games.jsonl --games 1000 --agents random,mcts,random,greedy_largest
+    python generate_games.py games.bin --format bin --games 1000000
+
+Game i is seeded from (--seed, i), so results do not depend on the number of
+workers or the completion order. Re-running with the same output file skips
+the games already in it.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from agent.selfplay import CHECKPOINT_PREFIX, agent_names, make_agent, play_game
+from game.records import GameRecordReader, GameRecordWriter, index_path
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+
+def game_seed(base_seed, game_index):
+    """Seed of one game, independent of which worker plays it."""
+    return int(np.random.SeedSequence([base_seed, game_index]).generate_state(1, np.uint64)[0])
+
+
+def play_one(game_index, base_seed, agents, start_player, agent_options):
+    """Worker entry point: play game `game_index` and return its record."""
+    seed = game_seed(base_seed, game_index)
+    rng = np.random.default_rng(seed)
+    if start_player is None:
+        start_player = int(rng.integers(len(PLAYER_COLORS)))
+    seeds = rng.integers(2 ** 63, size=len(agents))
+    players = [make_agent(name, int(s), **agent_options) for name, s in zip(agents, seeds)]
+    moves, scores = play_game(players, start_player, BOARD_SIZE, PLAYER_COLORS)
+    return {
+        "game": game_index,
+        "seed": seed,
+        "agents": list(agents),
+        "colors": list(PLAYER_COLORS),
+        "start_player": start_player,
+        "moves": moves,
+        "scores": list(scores),
+    }
+
+
+def completed_games(path, fmt="jsonl"):
+    """
+    Game indices already in `path`. A trailing partial line left by an
+    interrupted run is cut off so appending continues cleanly (the binary
+    writer trims unindexed moves itself when it reopens the files).
+    """
+    if fmt == "bin":
+        if not (os.path.exists(path) and os.path.exists(index_path(path))):
+            return set()
+        with GameRecordWriter(path):
+            pass
+        return set(GameRecordReader(path).index["game"].tolist())
+    done = set()
+    if not os.path.exists(path):
+        return done
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["game"])
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(line)
+    with open(path, "r+b") as f:
+        f.truncate(valid_bytes)
+    return done
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Blokus self-play games")
+    parser.add_argument("output", help="file the game records are appended to")
+    parser.add_argument("--format", choices=("jsonl", "bin"), default="jsonl",
+                        help="JSON lines or binary records (game.records)")
+    parser.add_argument("--games", type=int, default=100, help="total number of games")
+    parser.add_argument("--agents", default="random",
+                        help=f"one name for all players or one per player, comma separated "
+                             f"({', '.join(agent_names())}, {CHECKPOINT_PREFIX}<module path>)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="base seed")
+    parser.add_argument("--start-player", type=int, default=None,
+                        help="fixed start player (default: random per game)")
+    parser.add_argument("--mcts-iterations", type=int, default=200)
+    parser.add_argument("--mcts-time", type=float, default=None, help="MCTS seconds per move")
+    parser.add_argument("--search-depth", type=int, default=2)
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    agents = args.agents.split(",")
+    if len(agents) == 1:
+        agents = agents * len(PLAYER_COLORS)
+    if len(agents) != len(PLAYER_COLORS):
+        parser.error(f"--agents needs 1 or {len(PLAYER_COLORS)} names")
+    for name in agents:
+        if name not in agent_names() and not name.startswith(CHECKPOINT_PREFIX):
+            parser.error(f"unknown agent {name!r}")
+    args.agents = agents
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    agent_options = dict(mcts_time=args.mcts_time, mcts_iterations=args.mcts_iterations,
+                         search_depth=args.search_depth)
+    done = completed_games(args.output, args.format)
+    pending = [i for i in range(args.games) if i not in done]
+    print(f"{len(done)} games already in {args.output}, {len(pending)} to play", file=sys.stderr)
+
+    start = last_report = time.perf_counter()
+    games = plies = 0
+    if args.format == "bin":
+        out = GameRecordWriter(args.output, BOARD_SIZE)
+    else:
+        out = open(args.output, "a")
+    with out, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        queue = iter(pending)
+        running = set()
+        try:
+            while True:
+                # Keep a bounded number of games in flight
+                for game_index in queue:
+                    running.add(pool.submit(play_one, game_index, args.seed, args.agents,
+                                            args.start_player, agent_options))
+                    if len(running) >= 2 * args.workers:
+                        break
+                if not running:
+                    break
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    if args.format == "bin":
+                        out.append(record["moves"], record["seed"], record["start_player"],
+                                   record["scores"], record["colors"], game=record["game"])
+                    else:
+                        out.write(json.dumps(record) + "\n")
+                        out.flush()
+                    games += 1
+                    plies += len(record["moves"])
+
+                now = time.perf_counter()
+                if now - last_report >= args.report_every:
+                    elapsed = now - start
+                    print(f"{len(done) + games}/{args.games} games, "
+                          f"{games / elapsed:.2f} games/s, {plies / elapsed:.1f} plies/s", file=sys.stderr)
+                    last_report = now
+        except KeyboardInterrupt:
+            for future in running:
+                future.cancel()
+            print("Interrupted; rerun the same command to resume", file=sys.stderr)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"Played {games} games in {elapsed:.1f}s "
+          f"({games / elapsed:.2f} games/s, {plies / elapsed:.1f} plies/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Rate agents against each other: round-robin or Swiss tournaments of Blokus
+games across a process pool, with Elo and TrueSkill ratings.
+
+    python tournament.py results.jsonl --agents random,greedy_largest,corner_maximiser,mcts:400
+    python tournament.py results.jsonl --format swiss --rounds 8 \\
+        --agents search:2,mcts,ppo=checkpoint:ckpt/learner_group/learner/rl_module/shared_policy
+
+An agent is a make_agent name with an optional ":<arg>" (MCTS iterations,
+search depth, checkpoint module path) and an optional "<label>=" prefix.
+With --serve every checkpoint runs in one agent.inference_server process
+that batches the moves of all workers, instead of once per worker.
+
+A table is the agents on the four colours of one game; every table is played
+in each rotation of its seats, so every agent plays every colour and Red
+always moves first. Round robin plays every set of four distinct agents each
+round (with fewer than four agents, every pair plays two colours each).
+Swiss sorts the agents by their Elo after the previous rounds and seats
+neighbours together, four per table; with a remainder the last table is the
+bottom four agents, so a few agents play twice that round.
+
+Every game is appended to the output file as one JSON line as soon as it
+ends and is seeded from (--seed, round, seats), so rerunning the same command
+skips the games already played and the ratings only depend on the results.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from itertools import combinations
+
+import numpy as np
+
+from agent.inference_server import InferenceServer
+from agent.mcts import rank_utility
+from agent.ratings import elo_ratings, trueskill_ratings
+from agent.selfplay import CHECKPOINT_PREFIX, ModulePolicy, PolicyAgent, agent_names, make_agent, play_game
+from generate_games import completed_games
+from global_constants import BOARD_SIZE, PLAYER_COLORS
+
+# make_agent option set by the ":<arg>" of an agent spec
+_AGENT_ARGS = {"mcts": ("mcts_iterations", int), "search": ("search_depth", int)}
+# Inference clients of the served agents in a worker process, by label
+_SERVED = {}
+
+
+def parse_agent(spec):
+    """'[label=]name[:arg]' -> (label, make_agent name, make_agent options)."""
+    label, sep, agent = spec.partition("=")
+    if not sep or ":" in label:
+        label, agent = "", spec
+    if agent.startswith(CHECKPOINT_PREFIX):
+        return label or agent, agent, {}
+    name, _, arg = agent.partition(":")
+    if name not in agent_names():
+        raise ValueError(f"Unknown agent {name!r}; expected one of {agent_names()} or {CHECKPOINT_PREFIX}<path>")
+    options = {}
+    if arg:
+        if name not in _AGENT_ARGS:
+            raise ValueError(f"Agent {name!r} takes no argument")
+        key, kind = _AGENT_ARGS[name]
+        options[key] = kind(arg)
+    return label or agent, name, options
+
+
+def seat_rotations(table):
+    """The distinct cyclic rotations of a table, in order."""
+    rotations = []
+    for k in range(len(table)):
+        rotated = tuple(table[k:] + table[:k])
+        if rotated not in rotations:
+            rotations.append(rotated)
+    return rotations
+
+
+def round_robin_tables(labels, num_seats=len(PLAYER_COLORS)):
+    if len(labels) < num_seats:
+        return [(a, b) * (num_seats // 2) for a, b in combinations(labels, 2)]
+    return list(combinations(labels, num_seats))
+
+
+def swiss_tables(labels, results, rng, num_seats=len(PLAYER_COLORS)):
+    """Tables of neighbours in the Elo ranking of `results`; equal ratings in random order."""
+    if len(labels) < num_seats:
+        return round_robin_tables(labels, num_seats)
+    ratings = elo_ratings(_rated_games(results), labels, bootstrap=0)
+    order = rng.permutation(len(labels))
+    ranked = sorted((labels[k] for k in order), key=lambda label: -ratings[label].value)
+    tables = [tuple(ranked[k:k + num_seats]) for k in range(0, len(ranked) - num_seats + 1, num_seats)]
+    if len(ranked) % num_seats:
+        tables.append(tuple(ranked[-num_seats:]))
+    return tables
+
+
+def game_key(round_index, seats):
+    return json.dumps([round_index, list(seats)])
+
+
+def game_seed(base_seed, round_index, seats):
+    """Seed of one game, independent of which worker plays it and when."""
+    words = [base_seed, round_index, zlib.crc32(json.dumps(list(seats)).encode())]
+    return int(np.random.SeedSequence(words).generate_state(1, np.uint64)[0])
+
+
+def _init_worker(clients):
+    _SERVED.update(clients)
+
+
+def play_one(round_index, seats, base_seed, agents):
+    """Worker entry point: play one game with agents[label] = (name, options) on the seats."""
+    seed = game_seed(base_seed, round_index, seats)
+    seeds = np.random.default_rng(seed).integers(2 ** 63, size=len(seats))
+    players = []
+    for label, s in zip(seats, seeds):
+        if label in _SERVED:
+            players.append(PolicyAgent(_SERVED[label]))
+            continue
+        name, options = agents[label]
+        players.append(make_agent(name, int(s), **options))
+    moves, scores = play_game(players, 0, BOARD_SIZE, PLAYER_COLORS)
+    return {
+        "game": game_key(round_index, seats),
+        "round": round_index,
+        "seats": list(seats),
+        "seed": seed,
+        "moves": moves,
+        "scores": list(scores),
+    }
+
+
+def load_results(path):
+    """Game records in `path` (a trailing partial line is cut off first)."""
+    completed_games(path)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _rated_games(results):
+    # A fixed order, so sequential ratings do not depend on the completion order
+    ordered = sorted(results, key=lambda record: (record["round"], record["game"]))
+    return [(record["seats"], record["scores"]) for record in ordered]
+
+
+def ratings_table(results, labels, bootstrap=200, seed=0):
+    """Per label: games, mean rank utility, Elo and TrueSkill ratings with 95 % intervals."""
+    games = _rated_games(results)
+    elo = elo_ratings(games, labels, bootstrap=bootstrap, seed=seed)
+    trueskill = trueskill_ratings(games, labels)
+    utility = {label: [] for label in labels}
+    for seats, scores in games:
+        for label, value in zip(seats, rank_utility(scores)):
+            utility[label].append(value)
+    return {
+        label: {
+            "games": elo[label].games,
+            "rank_utility": float(np.mean(utility[label])) if utility[label] else None,
+            "elo": elo[label]._asdict(),
+            "trueskill": trueskill[label]._asdict(),
+        }
+        for label in labels
+    }
+
+
+def format_ratings(table):
+    lines = [f"{'agent':<24} {'games':>6} {'rank':>5} {'Elo':>6} {'95% CI':>13} {'TrueSkill':>9} {'95% CI':>13}"]
+    for label, row in sorted(table.items(), key=lambda item: -item[1]["elo"]["value"]):
+        elo, ts = row["elo"], row["trueskill"]
+        rank = "-" if row["rank_utility"] is None else f"{row['rank_utility']:.2f}"
+        lines.append(f"{label:<24} {row['games']:>6} {rank:>5} {elo['value']:>6.0f} "
+                     f"[{elo['low']:>5.0f},{elo['high']:>5.0f}] {ts['value']:>9.2f} "
+                     f"[{ts['low']:>5.1f},{ts['high']:>5.1f}]")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Blokus tournament with Elo and TrueSkill ratings")
+    parser.add_argument("output", help="file the game results are appended to")
+    parser.add_argument("--agents", required=True,
+                        help=f"comma separated [label=]name[:arg] ({', '.join(agent_names())}, "
+                             f"{CHECKPOINT_PREFIX}<module path>)")
+    parser.add_argument("--format", choices=("round-robin", "swiss"), default="round-robin")
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="base seed")
+    parser.add_argument("--mcts-iterations", type=int, default=200)
+    parser.add_argument("--mcts-time", type=float, default=None, help="MCTS seconds per move")
+    parser.add_argument("--search-depth", type=int, default=2)
+    parser.add_argument("--serve", action="store_true",
+                        help="run each checkpoint in one batched inference server process "
+                             "instead of a copy per worker")
+    parser.add_argument("--bootstrap", type=int, default=200, help="resamples for the Elo intervals")
+    parser.add_argument("--ratings", default=None, help="JSON file rewritten with the ratings after every round")
+    parser.add_argument("--report-every", type=float, default=30.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    agents = {}
+    for spec in args.agents.split(","):
+        try:
+            label, name, options = parse_agent(spec)
+        except ValueError as exc:
+            parser.error(str(exc))
+        if label in agents:
+            parser.error(f"duplicate agent label {label!r}")
+        defaults = dict(mcts_time=args.mcts_time, mcts_iterations=args.mcts_iterations,
+                        search_depth=args.search_depth)
+        agents[label] = (name, {**defaults, **options})
+    if len(agents) < 2:
+        parser.error("--agents needs at least two agents")
+    args.agents = agents
+    return args
+
+
+def _play(pool, jobs, out, args, progress):
+    """Play (round, seats) jobs with a bounded number in flight; returns the new records."""
+    records = []
+    queue = iter(jobs)
+    running = set()
+    try:
+        while True:
+            for round_index, seats in queue:
+                running.add(pool.submit(play_one, round_index, seats, args.seed, args.agents))
+                if len(running) >= 2 * args.workers:
+                    break
+            if not running:
+                return records
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                records.append(record)
+            progress(len(finished))
+    except BaseException:
+        for future in running:
+            future.cancel()
+        raise
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    labels = list(args.agents)
+    results = [record for record in load_results(args.output)
+               if record["round"] < args.rounds and set(record["seats"]) <= set(labels)]
+    done = {record["game"] for record in results}
+    print(f"{len(done)} games already in {args.output}", file=sys.stderr)
+
+    start = last_report = time.perf_counter()
+    played = 0
+
+    def progress(count):
+        nonlocal played, last_report
+        played += count
+        now = time.perf_counter()
+        if now - last_report >= args.report_every:
+            print(f"{len(results) + played} games, {played / (now - start):.2f} games/s", file=sys.stderr)
+            last_report = now
+
+    def report():
+        table = ratings_table(results, labels, args.bootstrap, args.seed)
+        print(format_ratings(table))
+        if args.ratings:
+            with open(args.ratings + ".tmp", "w") as f:
+                json.dump(table, f, indent=2)
+            os.replace(args.ratings + ".tmp", args.ratings)
+
+    def jobs(round_indices, tables):
+        return [(r, seats) for r in round_indices for table in tables for seats in seat_rotations(table)
+                if game_key(r, seats) not in done]
+
+    with ExitStack() as stack:
+        clients = {}
+        if args.serve:
+            for label, (name, _) in args.agents.items():
+                if name.startswith(CHECKPOINT_PREFIX):
+                    server = InferenceServer(functools.partial(ModulePolicy, name[len(CHECKPOINT_PREFIX):]),
+                                             num_slots=args.workers)
+                    clients[label] = stack.enter_context(server).client()
+        out = stack.enter_context(open(args.output, "a"))
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                                       initargs=(clients,)))
+        try:
+            if args.format == "round-robin":
+                # The tables do not depend on results, so all rounds are queued at once
+                results.extend(_play(pool, jobs(range(args.rounds), round_robin_tables(labels)),
+                                     out, args, progress))
+                report()
+            else:
+                for r in range(args.rounds):
+                    # A Swiss round is seated from the ratings after the previous rounds
+                    previous = [record for record in results if record["round"] < r]
+                    tables = swiss_tables(labels, previous, np.random.default_rng([args.seed, r]))
+                    results.extend(_play(pool, jobs([r], tables), out, args, progress))
+                    print(f"round {r + 1}/{args.rounds}", file=sys.stderr)
+                    report()
+        except KeyboardInterrupt:
+            print("Interrupted; rerun the same command to resume", file=sys.stderr)
+            return
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"Played {played} games in {elapsed:.1f}s ({played / elapsed:.2f} games/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()